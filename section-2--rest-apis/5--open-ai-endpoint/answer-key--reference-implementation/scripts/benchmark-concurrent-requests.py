@@ -0,0 +1,148 @@
+# pylint: disable=invalid-name
+"""
+Measure concurrent-request throughput of the Files API against a moto server.
+
+Each S3 backend mode from `Settings.s3_backend` is benchmarked with the same workload:
+`--requests` `GET /v1/files/{file_path}` requests, `--concurrency` of them in flight at a time.
+
+moto answers from memory in well under a millisecond of network time, so `--latency-ms` adds a
+simulated round trip to every S3 call to approximate talking to the real S3 service.
+
+Usage:
+
+    python scripts/benchmark-concurrent-requests.py --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import (
+    List,
+    NamedTuple,
+)
+
+import boto3
+import httpx
+
+from files_api.main import create_app
+from files_api.settings import Settings
+
+BUCKET_NAME = "benchmark-bucket"
+NUM_FILES = 20
+FILE_CONTENT = b"x" * 1024
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    requests: int
+    concurrency: int
+    latency_ms: float
+    port: int
+
+
+class BenchmarkResult(NamedTuple):
+    """Timing of one benchmarked backend mode."""
+
+    mode: str
+    seconds: float
+    requests: int
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Total number of requests per backend mode.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Number of requests in flight at once.")
+    parser.add_argument("--latency-ms", type=float, default=30, help="Simulated network latency per S3 call.")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the moto server.")
+    args = parser.parse_args()
+    return Args(requests=args.requests, concurrency=args.concurrency, latency_ms=args.latency_ms, port=args.port)
+
+
+def seed_bucket() -> List[str]:
+    """Create the benchmark bucket and upload the files that will be downloaded."""
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    object_keys = [f"benchmark/file-{i}.txt" for i in range(NUM_FILES)]
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=object_key, Body=FILE_CONTENT, ContentType="text/plain")
+    return object_keys
+
+
+async def run_benchmark(mode: str, object_keys: List[str], args: Args) -> BenchmarkResult:
+    """Send `args.requests` downloads through the app with at most `args.concurrency` in flight."""
+    app = create_app(settings=Settings(s3_bucket_name=BUCKET_NAME, s3_backend=mode))  # type: ignore[arg-type]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    def simulate_network_latency(**_kwargs) -> None:
+        time.sleep(args.latency_ms / 1000)
+
+    app.state.s3_clients.get_client().meta.events.register("before-send.s3", simulate_network_latency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+
+        async def download(i: int) -> None:
+            async with semaphore:
+                response = await client.get(f"/v1/files/{object_keys[i % len(object_keys)]}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(download(i) for i in range(args.requests)))
+        seconds = time.perf_counter() - start
+
+    app.state.s3_clients.close()
+    return BenchmarkResult(mode=mode, seconds=seconds, requests=args.requests)
+
+
+def start_moto_server(port: int) -> subprocess.Popen:
+    """Start moto in its own process so it does not compete with the benchmarked app for the GIL."""
+    # pylint: disable=consider-using-with
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(50):
+        try:
+            httpx.get(f"http://localhost:{port}/moto-api/")
+            return process
+        except httpx.ConnectError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"moto server failed to start on port {port}")
+
+
+def main() -> None:
+    args = parse_args()
+
+    moto_process = start_moto_server(port=args.port)
+    os.environ.update(
+        {
+            "AWS_ENDPOINT_URL": f"http://localhost:{args.port}",
+            "AWS_ACCESS_KEY_ID": "mock",
+            "AWS_SECRET_ACCESS_KEY": "mock",
+            "AWS_DEFAULT_REGION": "us-east-1",
+        }
+    )
+
+    try:
+        object_keys = seed_bucket()
+        results = [asyncio.run(run_benchmark(mode, object_keys, args)) for mode in ("blocking", "threadpool")]
+    finally:
+        moto_process.terminate()
+        moto_process.wait()
+
+    print(f"{'backend':<12} {'requests':>9} {'seconds':>9} {'req/s':>9}")
+    for result in results:
+        print(f"{result.mode:<12} {result.requests:>9} {result.seconds:>9.2f} {result.requests_per_second:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# pylint: disable=invalid-name
+"""
+Compare the cost of serializing a page of `GET /v1/files` with pydantic models and with `listing_json`.
+
+Each page size is serialized three ways, from the same list of S3 `Contents` items:
+
+- `pydantic`: a `FileMetadata` per file in a `GetFilesResponse`, dumped with `model_dump_json()`
+- `pydantic_core`: `listing_json` with its `pydantic_core.to_json` fallback
+- `orjson`: `listing_json` with `orjson`, skipped if it isn't installed
+
+Usage:
+
+    python scripts/benchmark-list-serialization.py --page-sizes 10 100 1000 --repeat 200
+"""
+
+import argparse
+import timeit
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Callable,
+    List,
+    NamedTuple,
+)
+
+from files_api import listing_json
+from files_api.listing_json import get_files_response_json
+from files_api.schemas import (
+    FileMetadata,
+    GetFilesResponse,
+)
+
+ORJSON = listing_json.orjson
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    page_sizes: List[int]
+    repeat: int
+
+
+class BenchmarkResult(NamedTuple):
+    """Timing of one serializer on one page size."""
+
+    serializer: str
+    page_size: int
+    seconds_per_page: float
+
+    @property
+    def microseconds_per_file(self) -> float:
+        return self.seconds_per_page * 1e6 / self.page_size
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000], help="Files per page.")
+    parser.add_argument("--repeat", type=int, default=200, help="Number of times each page is serialized.")
+    args = parser.parse_args()
+    return Args(page_sizes=args.page_sizes, repeat=args.repeat)
+
+
+def make_page(page_size: int) -> List[dict]:
+    """Build a page of items shaped like the `Contents` of a `list_objects_v2` response."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "Key": f"benchmark/dir-{i % 10}/file-{i}.txt",
+            "LastModified": start + timedelta(seconds=i, milliseconds=i % 1000),
+            "ETag": f'"{i:032x}"',
+            "Size": i * 1024,
+            "StorageClass": "STANDARD",
+        }
+        for i in range(page_size)
+    ]
+
+
+def serialize_with_pydantic(page: List[dict]) -> bytes:
+    files = [
+        FileMetadata(file_path=obj["Key"], last_modified=obj["LastModified"], size_bytes=obj["Size"]) for obj in page
+    ]
+    return GetFilesResponse(files=files, next_page_token="token").model_dump_json().encode()
+
+
+def serialize_with_pydantic_core(page: List[dict]) -> bytes:
+    listing_json.orjson = None  # type: ignore[assignment]
+    try:
+        return get_files_response_json(page, next_page_token="token")
+    finally:
+        listing_json.orjson = ORJSON
+
+
+def serialize_with_orjson(page: List[dict]) -> bytes:
+    return get_files_response_json(page, next_page_token="token")
+
+
+def run_benchmark(
+    serializer: str, serialize: Callable[[List[dict]], bytes], page_size: int, args: Args
+) -> BenchmarkResult:
+    """Time `args.repeat` serializations of one page, after checking the output matches pydantic's."""
+    page = make_page(page_size)
+    assert serialize(page) == serialize_with_pydantic(page), f"{serializer} output differs from pydantic"
+    seconds = timeit.timeit(lambda: serialize(page), number=args.repeat)
+    return BenchmarkResult(serializer=serializer, page_size=page_size, seconds_per_page=seconds / args.repeat)
+
+
+def main() -> None:
+    args = parse_args()
+
+    serializers = {"pydantic": serialize_with_pydantic, "pydantic_core": serialize_with_pydantic_core}
+    if ORJSON is not None:
+        serializers["orjson"] = serialize_with_orjson
+
+    results = [
+        run_benchmark(serializer, serialize, page_size, args)
+        for page_size in args.page_sizes
+        for serializer, serialize in serializers.items()
+    ]
+
+    pydantic_seconds = {
+        result.page_size: result.seconds_per_page for result in results if result.serializer == "pydantic"
+    }
+    print(f"{'serializer':<14} {'files':>7} {'ms/page':>9} {'us/file':>9} {'speedup':>9}")
+    for result in results:
+        speedup = pydantic_seconds[result.page_size] / result.seconds_per_page
+        print(
+            f"{result.serializer:<14} {result.page_size:>7} {result.seconds_per_page * 1000:>9.3f}"
+            f" {result.microseconds_per_file:>9.2f} {speedup:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# pylint: disable=invalid-name
+"""
+Compare response sizes and latency of the Files API with each content coding of `CompressionMiddleware`.
+
+Three payloads are requested through the app, against an in-memory moto S3:
+
+- `list_files`: `GET /v1/files?mode=full`, a directory of `--files` files listed in one JSON response
+- `list_files_ndjson`: `GET /v1/files?stream=ndjson`, the same directory streamed as NDJSON
+- `get_file`: `GET /v1/files/{file_path}` of a `--file-kib` KiB CSV file, streamed in chunks
+
+Each is requested `--repeat` times per coding: `identity` (no compression) and whichever of
+`gzip`, `br` and `zstd` are installed. The bytes on the wire are counted before decoding.
+
+Usage:
+
+    python scripts/benchmark-response-compression.py --files 1000 --file-kib 1024 --repeat 20
+"""
+
+import argparse
+import os
+import time
+from typing import (
+    Dict,
+    List,
+    NamedTuple,
+)
+
+import boto3
+from fastapi.testclient import TestClient
+from moto import mock_aws
+
+from files_api.compression_middleware import (
+    HTTP_ENCODINGS,
+    is_http_codec_available,
+)
+from files_api.main import create_app
+from files_api.settings import Settings
+
+BUCKET_NAME = "benchmark-bucket"
+CSV_FILE_PATH = "benchmark/data.csv"
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    files: int
+    file_kib: int
+    repeat: int
+
+
+class BenchmarkResult(NamedTuple):
+    """Size and timing of one payload sent with one content coding."""
+
+    payload: str
+    encoding: str
+    wire_bytes: int
+    seconds_per_request: float
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000, help="Files in the listed directory.")
+    parser.add_argument("--file-kib", type=int, default=1024, help="Size of the downloaded file in KiB.")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of requests per payload and coding.")
+    args = parser.parse_args()
+    return Args(files=args.files, file_kib=args.file_kib, repeat=args.repeat)
+
+
+def seed_bucket(args: Args) -> None:
+    """Create the bucket with a directory of files to list and a CSV file to download."""
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    for i in range(args.files):
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=f"benchmark/files/file-{i:06}.txt", Body=b"x")
+    rows = (f"{i},2024-01-01T00:00:{i % 60:02}Z,sensor-{i % 17},{i * 0.37:.2f}\n".encode() for i in range(10**9))
+    csv_content = bytearray(b"id,timestamp,sensor,value\n")
+    while len(csv_content) < args.file_kib * 1024:
+        csv_content += next(rows)
+    s3_client.put_object(Bucket=BUCKET_NAME, Key=CSV_FILE_PATH, Body=bytes(csv_content), ContentType="text/csv")
+
+
+def run_benchmark(client: TestClient, payload: str, url: str, encoding: str, args: Args) -> BenchmarkResult:
+    """Send `args.repeat` requests for one payload, reading the raw bytes of each response without decoding them."""
+    wire_bytes = 0
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+            wire_bytes = sum(len(chunk) for chunk in response.iter_raw())
+    seconds = time.perf_counter() - start
+    return BenchmarkResult(
+        payload=payload, encoding=encoding, wire_bytes=wire_bytes, seconds_per_request=seconds / args.repeat
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    encodings = ["identity"] + [encoding for encoding in HTTP_ENCODINGS if is_http_codec_available(encoding)]
+    payloads = {
+        "list_files": "/v1/files?directory=benchmark/files/&mode=full",
+        "list_files_ndjson": "/v1/files?directory=benchmark/files/&stream=ndjson",
+        "get_file": f"/v1/files/{CSV_FILE_PATH}",
+    }
+
+    with mock_aws():
+        seed_bucket(args)
+        with TestClient(create_app(Settings(s3_bucket_name=BUCKET_NAME))) as client:
+            results: List[BenchmarkResult] = [
+                run_benchmark(client, payload, url, encoding, args)
+                for payload, url in payloads.items()
+                for encoding in encodings
+            ]
+
+    identity_bytes: Dict[str, int] = {
+        result.payload: result.wire_bytes for result in results if result.encoding == "identity"
+    }
+    print(f"{'payload':<18} {'encoding':<9} {'bytes':>10} {'ratio':>7} {'ms/request':>11}")
+    for result in results:
+        ratio = identity_bytes[result.payload] / max(result.wire_bytes, 1)
+        print(
+            f"{result.payload:<18} {result.encoding:<9} {result.wire_bytes:>10}"
+            f" {ratio:>6.1f}x {result.seconds_per_request * 1000:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Read and write zip and tar archives, e.g. to upload or download a whole directory tree in one request."""
+
+import io
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    IO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+)
+
+ArchiveFormat = Literal["zip", "tar"]
+
+ARCHIVE_MEDIA_TYPES = {"zip": "application/zip", "tar": "application/x-tar"}
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """A regular file inside an archive, whose content is only read when asked for."""
+
+    path: str
+    size: int
+    read: Callable[[], bytes]
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """A file to write into an archive, whose content is streamed in chunks."""
+
+    path: str
+    size: int
+    last_modified: datetime
+    chunks: Iterable[bytes]
+
+
+def iter_archive_members(file_obj: IO[bytes]) -> Iterator[ArchiveMember]:
+    """
+    Yield the regular files of a zip or tar archive (optionally gzip-, bz2- or xz-compressed) in archive order.
+
+    Tar archives are read as a stream, so each member's `read` must be called, if at all, before moving
+    on to the next member.
+
+    :param file_obj: A seekable binary file object, e.g. `UploadFile.file`.
+    :raises ValueError: If the file is neither a zip nor a tar archive.
+    """
+    if zipfile.is_zipfile(file_obj):
+        file_obj.seek(0)
+        with zipfile.ZipFile(file_obj) as zip_file:
+            for info in zip_file.infolist():
+                if not info.is_dir():
+                    yield ArchiveMember(
+                        path=info.filename,
+                        size=info.file_size,
+                        read=lambda info=info: zip_file.read(info),  # type: ignore[misc]
+                    )
+        return
+
+    file_obj.seek(0)
+    try:
+        tar_file = tarfile.open(fileobj=file_obj, mode="r|*")  # pylint: disable=consider-using-with
+    except tarfile.TarError as err:
+        raise ValueError("archive must be a zip or tar file") from err
+    with tar_file:
+        for info in tar_file:
+            if info.isfile():
+                yield ArchiveMember(
+                    path=info.name,
+                    size=info.size,
+                    read=lambda info=info: _read_tar_member(tar_file, info),  # type: ignore[misc]
+                )
+
+
+def normalize_archive_path(path: str) -> Optional[str]:
+    """
+    Turn the path of an archive member into a relative file path, or None if it is unsafe to use.
+
+    Leading `/` and `./` are dropped, and paths that contain `..` segments are rejected.
+    """
+    segments = [segment for segment in path.replace("\\", "/").split("/") if segment not in ("", ".")]
+    if not segments or ".." in segments:
+        return None
+    return "/".join(segments)
+
+
+def _read_tar_member(tar_file: tarfile.TarFile, info: tarfile.TarInfo) -> bytes:
+    member_file = tar_file.extractfile(info)
+    return member_file.read() if member_file else b""
+
+
+def iter_archive_stream(archive_format: ArchiveFormat, entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    Stream an archive of `entries` without holding more than one chunk of content in memory.
+
+    The archive is produced front to back, so it can be sent to a client as it is generated.
+    Each entry's `chunks` must add up to exactly `size` bytes.
+    """
+    if archive_format == "zip":
+        return _iter_zip_stream(entries)
+    return _iter_tar_stream(entries)
+
+
+def _iter_tar_stream(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    for entry in entries:
+        info = tarfile.TarInfo(name=entry.path)
+        info.size = entry.size
+        info.mtime = int(entry.last_modified.timestamp())
+        info.mode = 0o644
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+        yield from entry.chunks
+        # members are padded to whole 512-byte blocks
+        remainder = entry.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+    # the end of the archive is marked by two empty blocks
+    yield tarfile.NUL * tarfile.BLOCKSIZE * 2
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable file that collects what is written to it until it is drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last call."""
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _iter_zip_stream(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    # files are stored rather than deflated: most large files are already compressed, and it keeps the CPU free
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zip_file:
+        for entry in entries:
+            info = zipfile.ZipInfo(filename=entry.path, date_time=_zip_date_time(entry.last_modified))
+            info.file_size = entry.size
+            # entries of 4 GiB or more need zip64 extensions, which must be decided before writing them
+            with zip_file.open(info, mode="w", force_zip64=entry.size >= zipfile.ZIP64_LIMIT) as member_file:
+                for chunk in entry.chunks:
+                    member_file.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    # the central directory is written when the zip file is closed
+    yield sink.drain()
+
+
+def _zip_date_time(value: datetime) -> tuple:
+    # zip timestamps can't represent dates before 1980
+    return max(value.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
@@ -1,7 +1,28 @@
+"""
+AWS Lambda entrypoint of the Files API.
+
+Code at the top level of this module runs once per execution environment, in Lambda's init phase, which
+is also what SnapStart snapshots. So the S3 client is created and its credentials resolved here, rather
+than by the first request. Heavy dependencies that few routes need, i.e. the OpenAI SDK and httpx,
+are imported by those routes on first use instead, see `files_api.generate_files`.
+
+Lambda freezes the execution environment as soon as a response is sent, and the next request may be
+served by another one, so background jobs are disabled: a recursive delete, copy or move started here
+would stall, and its job could rarely be polled. Such requests are refused instead. The metadata index,
+which is filled by background crawls of the bucket, is refused with them: setting `METADATA_INDEX_ENABLED`
+fails the init phase rather than serving searches from an index that is never crawled.
+
+`tests/unit_tests/test__import_time.py` holds the import of this module to a time budget.
+"""
+
 from mangum import Mangum
 
 from files_api.main import create_app
+from files_api.settings import Settings
 
-APP = create_app()
+APP = create_app(Settings(background_jobs_enabled=False))
+APP.state.s3_clients.prewarm()
 
-handler = Mangum(APP)
+# the app's lifespan is meant for a long-running server: Mangum would run it around every invocation,
+# closing the S3 client warmed up above each time
+handler = Mangum(APP, lifespan="off")
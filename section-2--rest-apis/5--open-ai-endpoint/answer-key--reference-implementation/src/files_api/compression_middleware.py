@@ -0,0 +1,222 @@
+"""
+ASGI middleware that compresses responses for clients that accept it, without buffering streamed bodies.
+
+The coding is negotiated from the request's `Accept-Encoding` among zstd, brotli and gzip, whichever
+are installed. Each chunk of the body is compressed and flushed as it passes through, so streamed
+responses, e.g. NDJSON listings and file downloads, keep streaming with memory bounded by one chunk.
+Only the first `minimum_size` bytes are held back, to tell whether a small body is worth compressing.
+
+Only media types on the allow-list of `files_api.s3.codecs.is_compressible`, i.e. text, JSON, XML
+and the like, are compressed. Anything else, e.g. images, archives or `application/octet-stream`,
+is passed through untouched, and so are responses that it would be wrong to compress:
+
+- the body is already encoded, e.g. a file stored compressed in S3
+- the response is partial content, whose byte ranges refer to the uncompressed representation
+- the response sets `Cache-Control: no-transform`, or is to a HEAD request, which has no body to compress
+
+This is a pure ASGI middleware rather than a `BaseHTTPMiddleware`, so it sees every body chunk as it's sent.
+
+`br` needs the optional `brotli` package and `zstd` the optional `zstandard` package.
+"""
+
+import zlib
+from typing import (
+    Callable,
+    Optional,
+    Sequence,
+)
+
+from starlette.datastructures import (
+    Headers,
+    MutableHeaders,
+)
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from files_api.content_encoding import choose_encoding
+from files_api.s3.codecs import (
+    GZIP_LEVEL,
+    GZIP_WBITS,
+    ZSTD_LEVEL,
+    is_compressible,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+# in order of preference when a client accepts several equally: zstd and brotli compress
+# text better than gzip at a similar speed, but only recent clients support them
+HTTP_ENCODINGS = ("zstd", "br", "gzip")
+
+DEFAULT_MINIMUM_SIZE_BYTES = 1024
+
+# brotli's highest qualities are far too slow for on-the-fly compression
+BROTLI_QUALITY = 4
+
+
+def is_http_codec_available(encoding: str) -> bool:
+    """Whether responses can be compressed with `encoding` here."""
+    return (
+        encoding == "gzip"
+        or (encoding == "br" and brotli is not None)
+        or (encoding == "zstd" and zstandard is not None)
+    )
+
+
+class StreamCompressor:
+    """
+    Compress a body chunk by chunk, flushing after each so that the client can decode what it has received so far.
+
+    :raises ValueError: If the codec is unknown or its package isn't installed.
+    """
+
+    def __init__(self, encoding: str):
+        self._compress: Callable[[bytes], bytes]
+        self._finish: Callable[[], bytes]
+        if encoding == "gzip":
+            gzip_compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+            self._compress = lambda chunk: gzip_compressor.compress(chunk) + gzip_compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = gzip_compressor.flush
+        elif encoding == "br" and brotli is not None:
+            brotli_compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = lambda chunk: brotli_compressor.process(chunk) + brotli_compressor.flush()
+            self._finish = brotli_compressor.finish
+        elif encoding == "zstd" and zstandard is not None:
+            zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._compress = lambda chunk: zstd_compressor.compress(chunk) + zstd_compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+            self._finish = zstd_compressor.flush
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compress the next chunk of the body, returning all of its compressed output."""
+        return self._compress(chunk) if chunk else b""
+
+    def finish(self) -> bytes:
+        """End the compressed stream, returning its trailer."""
+        return self._finish()
+
+
+class CompressionMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Compress HTTP responses with the best coding that both the client and this server support.
+
+    :param app: The ASGI app whose responses to compress.
+    :param minimum_size: Bodies smaller than this many bytes are sent uncompressed.
+    :param encodings: Codings to offer, in order of preference. Those whose package isn't installed are skipped.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE_BYTES,
+        encodings: Sequence[str] = HTTP_ENCODINGS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = tuple(encoding for encoding in encodings if is_http_codec_available(encoding))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""), self.encodings)
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSender(send, encoding, self.minimum_size))
+
+
+class CompressingSender:  # pylint: disable=too-few-public-methods
+    """
+    The `send` callable of one response, which compresses the messages of its body before sending them on.
+
+    The start message, with the headers, is held back until enough of the body has been seen to decide
+    whether to compress it, since compressing changes the headers.
+    """
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start_message: Optional[Message] = None
+        self._pending_body = bytearray()
+        self._passthrough = False
+        self._compressor: Optional[StreamCompressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start_message = message
+            self._passthrough = not self._should_compress(message["status"], Headers(raw=message["headers"]))
+            if self._passthrough:
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self._compressor:
+            compressed_body = self._compressor.compress(body)
+            if not more_body:
+                compressed_body += self._compressor.finish()
+            if compressed_body or not more_body:
+                await self._send({"type": "http.response.body", "body": compressed_body, "more_body": more_body})
+            return
+
+        self._pending_body += body
+        if more_body and len(self._pending_body) < self._minimum_size:
+            return
+        await self._start(bytes(self._pending_body), more_body)
+        self._pending_body.clear()
+
+    def _should_compress(self, status_code: int, headers: Headers) -> bool:
+        if status_code < 200 or status_code in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        if not is_compressible(headers.get("content-type")):
+            return False
+        content_length = headers.get("content-length")
+        return not (content_length and content_length.isdigit() and int(content_length) < self._minimum_size)
+
+    async def _start(self, body: bytes, more_body: bool) -> None:
+        """Send the held back start message and the body seen so far, compressed if the body is big enough."""
+        assert self._start_message is not None
+        if not more_body and len(body) < self._minimum_size:
+            self._passthrough = True
+            await self._send(self._start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        compressor = StreamCompressor(self._encoding)
+        compressed_body = compressor.compress(body)
+        headers = MutableHeaders(scope=self._start_message)
+        headers["Content-Encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        # the compressed representation is a different sequence of bytes, so its ETag can only be weak
+        if (etag := headers.get("ETag")) and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if more_body:
+            self._compressor = compressor
+            if "content-length" in headers:
+                del headers["Content-Length"]
+        else:
+            compressed_body += compressor.finish()
+            headers["Content-Length"] = str(len(compressed_body))
+        await self._send(self._start_message)
+        await self._send({"type": "http.response.body", "body": compressed_body, "more_body": more_body})
@@ -0,0 +1,82 @@
+"""
+Helpers for answering conditional requests so that clients can revalidate cached files cheaply.
+
+Docs: https://developer.mozilla.org/en-US/docs/Web/HTTP/Conditional_requests
+Spec: https://www.rfc-editor.org/rfc/rfc9110#name-conditional-requests
+"""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+from email.utils import parsedate_to_datetime
+from typing import (
+    Mapping,
+    Optional,
+    TypedDict,
+)
+
+from botocore.exceptions import ClientError
+from fastapi import (
+    Response,
+    status,
+)
+
+HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+# headers that a 304 response should repeat so that caches can refresh their stored copy
+NOT_MODIFIED_HEADERS = ("ETag", "Last-Modified")
+
+
+class S3Preconditions(TypedDict, total=False):
+    """Keyword arguments accepted by `fetch_s3_object` and `fetch_s3_object_metadata` to make a read conditional."""
+
+    if_none_match: str
+    if_modified_since: datetime
+
+
+def get_s3_preconditions(request_headers: Mapping[str, str]) -> S3Preconditions:
+    """
+    Translate the `If-None-Match` and `If-Modified-Since` request headers into S3 preconditions.
+
+    S3 evaluates the preconditions itself, so the object's content is never read when the client's
+    copy is still fresh. Per RFC 9110, `If-Modified-Since` is ignored when `If-None-Match` is present,
+    and so is an `If-Modified-Since` value that is not a valid HTTP date.
+    """
+    if_none_match = request_headers.get("If-None-Match")
+    if if_none_match:
+        # `If-None-Match` compares ETags weakly, and compressed responses are sent with weak ETags,
+        # see `files_api.compression_middleware`, whereas S3 only knows the strong ones
+        return {"if_none_match": ", ".join(etag.strip().removeprefix("W/") for etag in if_none_match.split(","))}
+
+    if_modified_since = parse_http_date(request_headers.get("If-Modified-Since"))
+    if if_modified_since:
+        return {"if_modified_since": if_modified_since}
+
+    return {}
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an HTTP date such as "Thu, 01 Jan 2022 00:00:00 GMT", returning None if it is missing or invalid."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    # the obsolete asctime format and a "-0000" zone parse without a time zone, but HTTP dates are always in UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified_error(err: ClientError) -> bool:
+    """Return True if a boto3 error was raised because the client's cached copy of the object is still fresh."""
+    return err.response["Error"]["Code"] == "304"
+
+
+def not_modified_response(err: ClientError) -> Response:
+    """Build the body-less `304 Not Modified` response for an S3 "304" error."""
+    s3_response_headers = err.response["ResponseMetadata"].get("HTTPHeaders", {})
+    headers = {
+        name: s3_response_headers[name.lower()] for name in NOT_MODIFIED_HEADERS if name.lower() in s3_response_headers
+    }
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,126 @@
+"""
+Helpers for negotiating the content coding of responses, and for serving files stored compressed in S3.
+
+Responses are compressed on the fly by `files_api.compression_middleware`. Files can also be stored
+compressed, see `files_api.s3.codecs`. Clients whose `Accept-Encoding` allows the stored codec get the
+compressed bytes as they are, with a `Content-Encoding` header, which saves decompressing them here and
+sends fewer bytes over the network. Other clients get the decompressed content. Its length is the size
+recorded in the object's metadata when it was uploaded; objects without one are sent with chunked transfer
+encoding. Its bytes differ from the stored ones, so it gets a weak version of the object's ETag.
+
+Ranges of the compressed bytes mean nothing to a client, and ranges of the decompressed content can't be
+fetched without decompressing everything before them, so compressed files are always sent whole.
+
+Docs: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Accept-Encoding
+Spec: https://www.rfc-editor.org/rfc/rfc9110#name-accept-encoding
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from fastapi import status
+from fastapi.responses import StreamingResponse
+
+from files_api.conditional_requests import HTTP_DATE_FORMAT
+from files_api.s3.codecs import (
+    STORAGE_ENCODINGS,
+    get_uncompressed_size,
+    iter_decompressed,
+)
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """
+    Parse an `Accept-Encoding` header into its content codings and their quality values.
+
+    E.g. `gzip;q=0.8, br, *;q=0` is parsed into `{"gzip": 0.8, "br": 1.0, "*": 0.0}`.
+    A malformed quality value counts as 0, i.e. as refusing the coding.
+    """
+    codings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.lower()] = quality
+    return codings
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """Whether an `Accept-Encoding` header allows a response to be sent with `encoding`."""
+    codings = parse_accept_encoding(accept_encoding)
+    return codings.get(encoding, codings.get("*", 0.0)) > 0
+
+
+def choose_encoding(accept_encoding: str, available_encodings: Sequence[str]) -> Optional[str]:
+    """
+    Pick the content coding to send a response with, or None to send it as is.
+
+    The coding with the highest quality value in `accept_encoding` wins. Ties go to the coding that
+    comes first in `available_encodings`, i.e. the server's preference.
+    """
+    codings = parse_accept_encoding(accept_encoding)
+    chosen_encoding, chosen_quality = None, 0.0
+    for encoding in available_encodings:
+        quality = codings.get(encoding, codings.get("*", 0.0))
+        if quality > chosen_quality:
+            chosen_encoding, chosen_quality = encoding, quality
+    return chosen_encoding
+
+
+def is_stored_compressed(s3_response: Mapping[str, Any]) -> bool:
+    """Whether a `head_object` or `get_object` response is for an object stored compressed by this API."""
+    return s3_response.get("ContentEncoding") in STORAGE_ENCODINGS
+
+
+def get_compressed_file_headers(s3_response: Mapping[str, Any], accept_encoding: str) -> Dict[str, str]:
+    """
+    Build the headers of a GET or HEAD response for a file stored compressed.
+
+    `Content-Encoding` is only set when the compressed bytes are passed through. Otherwise `Content-Length`
+    is only set if the object records its size before compression, and the `ETag` is weak.
+    """
+    headers = {
+        "Accept-Ranges": "none",
+        "ETag": s3_response["ETag"],
+        "Last-Modified": s3_response["LastModified"].strftime(HTTP_DATE_FORMAT),
+        # the same URL is sent compressed or not depending on the client, which caches must tell apart
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_encoding(accept_encoding, s3_response["ContentEncoding"]):
+        headers["Content-Encoding"] = s3_response["ContentEncoding"]
+        headers["Content-Length"] = str(s3_response["ContentLength"])
+        return headers
+    # decoded, the file is a different sequence of bytes than the stored one, which S3's strong ETag stands for
+    headers["ETag"] = f"W/{s3_response['ETag']}"
+    if (uncompressed_size := get_uncompressed_size(s3_response)) is not None:
+        headers["Content-Length"] = str(uncompressed_size)
+    return headers
+
+
+def compressed_file_response(
+    get_object_response: Mapping[str, Any], accept_encoding: str, chunk_size: int
+) -> StreamingResponse:
+    """Stream a whole file stored compressed, decompressing it on the fly if the client doesn't accept its codec."""
+    headers = get_compressed_file_headers(get_object_response, accept_encoding)
+    chunks = get_object_response["Body"].iter_chunks(chunk_size)
+    if "Content-Encoding" not in headers:
+        chunks = iter_decompressed(chunks, get_object_response["ContentEncoding"])
+    return StreamingResponse(
+        content=chunks,
+        status_code=status.HTTP_200_OK,
+        media_type=get_object_response["ContentType"],
+        headers=headers,
+    )
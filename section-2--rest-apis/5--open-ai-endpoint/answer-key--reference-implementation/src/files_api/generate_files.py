@@ -1,22 +1,37 @@
 from typing import (
+    TYPE_CHECKING,
     Literal,
     Tuple,
     Union,
 )
 
-from openai import AsyncOpenAI
-from openai.types.chat import ChatCompletion
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat import ChatCompletion
 
 SYSTEM_PROMPT = "You are an autocompletion tool that produces text files given constraints."
 
 
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    Create an OpenAI client.
+
+    The OpenAI SDK is imported on first use rather than with this module: importing it takes longer
+    than the rest of the app put together, which would slow down every Lambda cold start, including
+    those of requests that never generate a file.
+    """
+    from openai import AsyncOpenAI  # pylint: disable=import-outside-toplevel
+
+    return AsyncOpenAI()
+
+
 async def get_text_chat_completion(prompt: str) -> str:
     """Generate a text chat completion from a given prompt."""
     # get the OpenAI client
-    client = AsyncOpenAI()
+    client = get_openai_client()
 
     # get the completion
-    response: ChatCompletion = await client.chat.completions.create(
+    response: "ChatCompletion" = await client.chat.completions.create(
         model="gpt-3.5-turbo",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -32,7 +47,7 @@ async def get_text_chat_completion(prompt: str) -> str:
 async def generate_image(prompt: str) -> Union[str, None]:
     """Generate an image from a given prompt."""
     # get the OpenAI client
-    client = AsyncOpenAI()
+    client = get_openai_client()
 
     # get image response from OpenAI
     image_response = await client.images.generate(
@@ -46,6 +61,20 @@ async def generate_image(prompt: str) -> Union[str, None]:
     return image_response.data[0].url or None
 
 
+async def download_image(image_url: str) -> bytes:
+    """
+    Download an image generated by `generate_image`.
+
+    httpx is imported on first use, like the OpenAI SDK in `get_openai_client`, to keep it out of
+    cold starts that don't generate images.
+    """
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    async with httpx.AsyncClient() as client:
+        image_response = await client.get(image_url)  # pylint: disable=missing-timeout
+    return image_response.content
+
+
 async def generate_text_to_speech(
     prompt: str,
     response_format: Literal["mp3", "opus", "aac", "flac", "wav", "pcm"] = "mp3",
@@ -56,7 +85,7 @@ async def generate_text_to_speech(
     Returns the audio content as bytes and the MIME type as a string.
     """
     # get the OpenAI client
-    client = AsyncOpenAI()
+    client = get_openai_client()
 
     # get audio response from OpenAI
     audio_response = await client.audio.speech.with_raw_response.create(
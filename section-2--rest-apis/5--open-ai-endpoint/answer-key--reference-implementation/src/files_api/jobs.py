@@ -0,0 +1,125 @@
+"""In-process registry of long-running background jobs, e.g. deleting every file in a directory."""
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import (
+    dataclass,
+    field,
+    replace,
+)
+from datetime import (
+    datetime,
+    timezone,
+)
+from enum import Enum
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+# errors beyond this many are only counted, so that a job over millions of keys can't exhaust memory
+MAX_JOB_ERRORS = 100
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a background job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:  # pylint: disable=too-many-instance-attributes
+    """State of one background job, updated by the job while it runs."""
+
+    job_id: str
+    kind: str
+    status: JobStatus = JobStatus.PENDING
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class JobContext:
+    """Handle passed to a running job to report its progress."""
+
+    def __init__(self, job: Job, lock: threading.Lock):
+        self._job = job
+        self._lock = lock
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Add `amount` to one of the job's progress counters."""
+        with self._lock:
+            self._job.progress[counter] = self._job.progress.get(counter, 0) + amount
+
+    def add_errors(self, errors: List[str]) -> None:
+        """Record non-fatal errors, e.g. individual files that could not be deleted."""
+        with self._lock:
+            self._job.errors.extend(errors[slice(max(MAX_JOB_ERRORS - len(self._job.errors), 0))])
+
+
+class JobRegistry:
+    """
+    Run jobs on a small thread pool and keep their state so that clients can poll it.
+
+    Jobs live in the memory of the process that started them, so they are only visible to requests
+    served by the same process, and are lost when it exits.
+
+    :param max_workers: Maximum number of jobs running at once; further jobs wait in the queue.
+    :param max_finished_jobs: Number of finished jobs remembered; the oldest are forgotten beyond that.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished_jobs: int = 1000):
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="files-api-job")
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func: Callable[[JobContext], None]) -> Job:
+        """Queue `func` to run in the background and return a snapshot of its job."""
+        job = Job(job_id=str(uuid.uuid4()), kind=kind)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job, func)
+        return self._snapshot(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a snapshot of a job, or None if there is no such job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return self._snapshot(job) if job else None
+
+    def shutdown(self) -> None:
+        """Stop starting queued jobs. Running jobs finish in the background."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, func: Callable[[JobContext], None]) -> None:
+        with self._lock:
+            job.status = JobStatus.RUNNING
+        error = None
+        try:
+            func(JobContext(job, self._lock))
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            error = str(err)
+        with self._lock:
+            job.error = error
+            job.status = JobStatus.FAILED if error or job.errors else JobStatus.SUCCEEDED
+            job.finished_at = datetime.now(timezone.utc)
+
+    def _snapshot(self, job: Job) -> Job:
+        with self._lock:
+            return replace(job, progress=dict(job.progress), errors=list(job.errors))
+
+    def _forget_old_jobs(self) -> None:
+        finished_job_ids = [job_id for job_id, job in self._jobs.items() if job.finished_at]
+        for job_id in finished_job_ids[slice(max(len(finished_job_ids) - self.max_finished_jobs, 0))]:
+            del self._jobs[job_id]
@@ -1,20 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
 from textwrap import dedent
 
 import pydantic
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 
+from files_api.compression_middleware import CompressionMiddleware
 from files_api.errors import (
     handle_broad_exceptions,
     handle_pydantic_validation_errors,
 )
+from files_api.jobs import JobRegistry
+from files_api.presigned_url_routes import PRESIGNED_URLS_ROUTER
 from files_api.routes import (
     FILES_ROUTER,
     GENERATED_FILES_ROUTER,
+    JOBS_ROUTER,
+    OBSERVABILITY_ROUTER,
+)
+from files_api.s3.aio import AsyncS3Backend
+from files_api.s3.clients import S3ClientRegistry
+from files_api.s3.content_cache import ObjectContentCache
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
+from files_api.search_routes import (
+    SEARCH_ROUTER,
+    start_reconcile_metadata_index_job,
 )
 from files_api.settings import Settings
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the periodic crawl of the metadata index, and release app-scoped resources when the server shuts down."""
+    reconcile_task = (
+        asyncio.create_task(reconcile_metadata_index_periodically(app)) if app.state.metadata_index else None
+    )
+    yield
+    if reconcile_task:
+        reconcile_task.cancel()
+    if app.state.jobs:
+        app.state.jobs.shutdown()
+    app.state.s3_clients.close()
+    if app.state.content_cache:
+        app.state.content_cache.close()
+    if app.state.metadata_index:
+        app.state.metadata_index.close()
+
+
+async def reconcile_metadata_index_periodically(app: FastAPI) -> None:
+    """Crawl the bucket into the metadata index on startup, then every `metadata_index_reconcile_interval_seconds`."""
+    settings: Settings = app.state.settings
+    jobs: JobRegistry = app.state.jobs
+    job_id = None
+    while True:
+        # a crawl that outlasts the interval isn't joined by a second one
+        previous_job = jobs.get(job_id) if job_id else None
+        if not previous_job or previous_job.finished_at:
+            job_id = start_reconcile_metadata_index_job(app).job_id
+        await asyncio.sleep(settings.metadata_index_reconcile_interval_seconds)
+
+
 def create_app(settings: Settings | None = None) -> FastAPI:
     """Create a FastAPI application."""
     settings = settings or Settings()
@@ -39,17 +86,59 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         ),
         docs_url="/",  # its easier to find the docs when they live on the base url
         generate_unique_id_function=custom_generate_unique_id,
+        lifespan=lifespan,
     )
     app.state.settings = settings
+    app.state.s3_clients = S3ClientRegistry(
+        max_pool_connections=settings.s3_max_pool_connections,
+        connect_timeout=settings.s3_connect_timeout_seconds,
+        read_timeout=settings.s3_read_timeout_seconds,
+        retry_mode=settings.s3_retry_mode,
+        max_attempts=settings.s3_max_attempts,
+        tcp_keepalive=settings.s3_tcp_keepalive,
+    )
+    app.state.s3_backend = AsyncS3Backend(
+        clients=app.state.s3_clients,
+        mode=settings.s3_backend,
+        max_concurrency=settings.s3_max_concurrency,
+    )
+    app.state.jobs = JobRegistry(max_workers=settings.jobs_max_workers) if settings.background_jobs_enabled else None
+    app.state.metadata_cache = (
+        ObjectMetadataCache(
+            max_entries=settings.metadata_cache_max_entries,
+            ttl_seconds=settings.metadata_cache_ttl_seconds,
+        )
+        if settings.metadata_cache_enabled
+        else None
+    )
+    app.state.metadata_index = (
+        ObjectMetadataIndex(path=settings.metadata_index_path) if settings.metadata_index_enabled else None
+    )
+    app.state.content_cache = (
+        ObjectContentCache(
+            max_object_bytes=settings.content_cache_max_object_bytes,
+            max_memory_bytes=settings.content_cache_max_memory_bytes,
+            spill_dir=settings.content_cache_spill_dir,
+            max_spill_bytes=settings.content_cache_max_spill_bytes,
+        )
+        if settings.content_cache_enabled
+        else None
+    )
 
     app.include_router(FILES_ROUTER)
     app.include_router(GENERATED_FILES_ROUTER)
+    app.include_router(PRESIGNED_URLS_ROUTER)
+    app.include_router(SEARCH_ROUTER)
+    app.include_router(JOBS_ROUTER)
+    app.include_router(OBSERVABILITY_ROUTER)
 
     app.add_exception_handler(
         exc_class_or_status_code=pydantic.ValidationError,
         handler=handle_pydantic_validation_errors,
     )
     app.middleware("http")(handle_broad_exceptions)
+    if settings.response_compression_enabled:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_minimum_size_bytes)
 
     return app
 
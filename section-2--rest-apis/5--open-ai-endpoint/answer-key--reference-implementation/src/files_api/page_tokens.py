@@ -0,0 +1,135 @@
+"""
+Opaque, signed page tokens for listings of files.
+
+S3's own continuation tokens only work with the exact request that returned them, so the client has to
+repeat the prefix, delimiter and page size along with each one. These tokens carry all of that instead,
+plus the key after which the next page starts, so any page can be fetched with a single `list_objects_v2`
+call from the token alone, by any instance of the API that signs tokens with the same key, without state
+kept on the server. The same page of the same listing always gets the same token, so page URLs can be
+cached and shared.
+
+Tokens are signed with an HMAC so that clients can't edit them, but only if the key is a secret, see
+`Settings.page_token_secret`. Without one, the key is derived from the bucket name and anyone can sign a
+token, so every decoded field is checked like any other client input. Tokens aren't encrypted either:
+the prefix and key in a token can be read by whoever holds it.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass
+from typing import (
+    Iterable,
+    Optional,
+)
+
+PAGE_TOKEN_VERSION = 1
+
+# truncated HMAC-SHA256; 128 bits are plenty to make forging a token impractical while keeping URLs short
+SIGNATURE_BYTES = 16
+
+# sorts after any other character of a UTF-8 key, see `resume_after`
+MAX_KEY_CHARACTER = "\U0010ffff"
+
+
+class InvalidPageTokenError(ValueError):
+    """Raised when a page token is malformed, wasn't signed with our key, or is from another version."""
+
+
+@dataclass(frozen=True)
+class PageToken:
+    """Everything needed to fetch the next page of a listing."""
+
+    prefix: str
+    delimiter: Optional[str]
+    page_size: int
+    start_after: str
+
+
+def encode_page_token(page_token: PageToken, secret: bytes) -> str:
+    """Serialize and sign a page token into a URL-safe string."""
+    payload = json.dumps(
+        [PAGE_TOKEN_VERSION, page_token.prefix, page_token.delimiter, page_token.page_size, page_token.start_after],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload, secret))}"
+
+
+def decode_page_token(token: str, secret: bytes) -> PageToken:
+    """
+    Check the signature of a page token and return its content.
+
+    :raises InvalidPageTokenError: If the token is malformed, its signature doesn't match or it's from another version.
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload, signature = _b64decode(encoded_payload), _b64decode(encoded_signature)
+        if not hmac.compare_digest(signature, _sign(payload, secret)):
+            raise InvalidPageTokenError("Invalid page token")
+        # a signature proves nothing when the key isn't secret, so the payload is parsed as untrusted input
+        fields = json.loads(payload)
+    except ValueError as err:
+        raise InvalidPageTokenError("Invalid page token") from err
+
+    if not isinstance(fields, list) or not fields:
+        raise InvalidPageTokenError("Invalid page token")
+    if fields[0] != PAGE_TOKEN_VERSION:
+        raise InvalidPageTokenError("Page token is from another version of the API, start the listing over")
+    if not _has_page_token_fields(fields):
+        raise InvalidPageTokenError("Invalid page token")
+    _, prefix, delimiter, page_size, start_after = fields
+    return PageToken(prefix=prefix, delimiter=delimiter, page_size=page_size, start_after=start_after)
+
+
+def derive_page_token_key(bucket_name: str) -> bytes:
+    """
+    Derive a key to sign page tokens with from the name of the listed bucket.
+
+    Every instance of the API that serves the bucket derives the same key, so their tokens work on each other.
+    The key isn't secret, so such tokens can be forged: nothing in them may be trusted beyond what a client
+    could ask for without a token.
+    """
+    return hashlib.sha256(f"files-api-page-token:{bucket_name}".encode()).digest()
+
+
+def resume_after(object_keys: Iterable[str], common_prefixes: Iterable[str]) -> str:
+    """
+    Return the `StartAfter` key for the page after one whose objects and common prefixes are given.
+
+    When the page ends with a common prefix, every key below it has been rolled up into it already,
+    so the next page must start after all of them rather than right after the prefix itself.
+    """
+    last_object_key = max(object_keys, default="")
+    last_common_prefix = max(common_prefixes, default="")
+    if last_common_prefix > last_object_key:
+        return last_common_prefix + MAX_KEY_CHARACTER
+    return last_object_key
+
+
+def _has_page_token_fields(fields: list) -> bool:
+    """Whether a decoded payload holds the fields of a `PageToken` after its version, each of the right type."""
+    if len(fields) != 5:
+        return False
+    _, prefix, delimiter, page_size, start_after = fields
+    return (
+        isinstance(prefix, str)
+        and (delimiter is None or isinstance(delimiter, str))
+        and isinstance(page_size, int)
+        and not isinstance(page_size, bool)
+        and isinstance(start_after, str)
+    )
+
+
+def _sign(payload: bytes, secret: bytes) -> bytes:
+    return hmac.new(secret, payload, hashlib.sha256).digest()[slice(0, SIGNATURE_BYTES)]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode unpadded URL-safe base64, raising ValueError (`binascii.Error`) if it's malformed."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
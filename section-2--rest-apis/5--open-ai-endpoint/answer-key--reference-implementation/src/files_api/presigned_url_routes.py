@@ -0,0 +1,203 @@
+"""Routes that hand out presigned S3 URLs, so that clients upload and download file content without going through the API."""
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import Optional
+
+from botocore.exceptions import ClientError
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+
+from files_api.routes import get_s3_backend
+from files_api.s3.aio import AsyncS3Backend
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
+from files_api.s3.presigned_urls import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_presigned_multipart_upload,
+    generate_presigned_download_url,
+    generate_presigned_upload_url,
+)
+from files_api.s3.read_objects import object_exists_in_s3
+from files_api.schemas import (
+    CompleteMultipartUploadRequest,
+    CreateMultipartUploadRequest,
+    CreateMultipartUploadResponse,
+    PresignDownloadRequest,
+    PresignedPart,
+    PresignedUrlResponse,
+    PresignUploadRequest,
+    PutFileResponse,
+)
+from files_api.settings import Settings
+
+PRESIGNED_URLS_ROUTER = APIRouter(tags=["Presigned URLs"])
+
+
+@PRESIGNED_URLS_ROUTER.post(
+    "/v1/presigned-urls/download",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "File not found for the given `file_path`."}},
+)
+async def presign_download(
+    request: Request,
+    body: PresignDownloadRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> PresignedUrlResponse:
+    """
+    Get a URL to download a file straight from S3.
+
+    The file's content does not pass through this API, which suits large files. The URL supports
+    `Range` and conditional request headers, and anyone holding it can use it until it expires.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    if not await s3_backend.call(
+        object_exists_in_s3, settings.s3_bucket_name, object_key=body.file_path, metadata_cache=metadata_cache
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    url = await s3_backend.call(
+        generate_presigned_download_url,
+        settings.s3_bucket_name,
+        object_key=body.file_path,
+        expires_in=settings.presigned_url_expiration_seconds,
+    )
+    return PresignedUrlResponse(url=url, method="GET", headers={}, expires_at=presigned_url_expires_at(settings))
+
+
+@PRESIGNED_URLS_ROUTER.post("/v1/presigned-urls/upload")
+async def presign_upload(
+    request: Request,
+    body: PresignUploadRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> PresignedUrlResponse:
+    """
+    Get a URL to upload a file of up to 5 GiB straight to S3 with a single `PUT` request.
+
+    The upload does not go through this API, so it is not subject to its request size limit.
+    Larger files must use a multipart upload, see `POST /v1/multipart-uploads`.
+    """
+    settings: Settings = request.app.state.settings
+    url = await s3_backend.call(
+        generate_presigned_upload_url,
+        settings.s3_bucket_name,
+        object_key=body.file_path,
+        content_type=body.content_type,
+        expires_in=settings.presigned_url_expiration_seconds,
+    )
+    headers = {"Content-Type": body.content_type} if body.content_type else {}
+    return PresignedUrlResponse(url=url, method="PUT", headers=headers, expires_at=presigned_url_expires_at(settings))
+
+
+@PRESIGNED_URLS_ROUTER.post("/v1/multipart-uploads", status_code=status.HTTP_201_CREATED)
+async def create_multipart_upload(
+    request: Request,
+    body: CreateMultipartUploadRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> CreateMultipartUploadResponse:
+    """
+    Start uploading a large file straight to S3 in parts, getting a presigned URL for each part.
+
+    `PUT` each part to its URL, in parallel if you like, and keep the `ETag` header of each response.
+    Then call `POST /v1/multipart-uploads/:upload_id/complete` with the ETags, or
+    `DELETE /v1/multipart-uploads/:upload_id` to give up and discard the uploaded parts.
+    """
+    settings: Settings = request.app.state.settings
+    upload = await s3_backend.call(
+        create_presigned_multipart_upload,
+        settings.s3_bucket_name,
+        object_key=body.file_path,
+        size=body.size_bytes,
+        content_type=body.content_type,
+        min_part_size=settings.presigned_multipart_part_size_bytes,
+        expires_in=settings.presigned_url_expiration_seconds,
+    )
+    return CreateMultipartUploadResponse(
+        upload_id=upload.upload_id,
+        file_path=body.file_path,
+        part_size_bytes=upload.part_size,
+        parts=[PresignedPart(part_number=part.part_number, url=part.url) for part in upload.part_urls],
+        expires_at=presigned_url_expires_at(settings),
+    )
+
+
+@PRESIGNED_URLS_ROUTER.post(
+    "/v1/multipart-uploads/{upload_id}/complete",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "A part is missing, too small, or its ETag doesn't match."},
+        status.HTTP_404_NOT_FOUND: {"description": "No upload in progress with the given `upload_id`."},
+    },
+)
+async def complete_multipart_upload_route(
+    request: Request,
+    upload_id: str,
+    body: CompleteMultipartUploadRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> PutFileResponse:
+    """Assemble the uploaded parts into the file."""
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    try:
+        await s3_backend.call(
+            complete_multipart_upload,
+            settings.s3_bucket_name,
+            object_key=body.file_path,
+            upload_id=upload_id,
+            parts=[(part.part_number, part.etag) for part in body.parts],
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+        )
+    except ClientError as err:
+        raise multipart_upload_error(err) from err
+
+    return PutFileResponse(file_path=body.file_path, message=f"File uploaded at path: /{body.file_path}")
+
+
+@PRESIGNED_URLS_ROUTER.delete(
+    "/v1/multipart-uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_404_NOT_FOUND: {"description": "No upload in progress with the given `upload_id`."}},
+)
+async def abort_multipart_upload_route(
+    request: Request,
+    upload_id: str,
+    file_path: str,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Response:
+    """Abort a multipart upload and discard the parts uploaded so far."""
+    settings: Settings = request.app.state.settings
+    try:
+        await s3_backend.call(
+            abort_multipart_upload, settings.s3_bucket_name, object_key=file_path, upload_id=upload_id
+        )
+    except ClientError as err:
+        raise multipart_upload_error(err) from err
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def presigned_url_expires_at(settings: Settings) -> datetime:
+    """Return when presigned URLs generated now stop working."""
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.presigned_url_expiration_seconds)
+
+
+def multipart_upload_error(err: ClientError) -> Exception:
+    """Map S3's multipart upload errors that are the client's fault to HTTP errors."""
+    code = err.response["Error"]["Code"]
+    if code == "NoSuchUpload":
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    if code in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall"):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=err.response["Error"].get("Message", code)
+        )
+    return err
@@ -0,0 +1,124 @@
+"""
+Helpers for serving HTTP range requests.
+
+Docs: https://developer.mozilla.org/en-US/docs/Web/HTTP/Range_requests
+Spec: https://www.rfc-editor.org/rfc/rfc9110#name-range-requests
+"""
+
+import re
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+# more ranges than this in one request is more likely abuse than a real client, so the header is ignored
+MAX_BYTE_RANGES_PER_REQUEST = 16
+
+BYTE_RANGE_SPEC_PATTERN = re.compile(r"^(?P<first>\d*)-(?P<last>\d*)$")
+
+
+@dataclass(frozen=True)
+class ByteRangeSpec:
+    """One range from a `Range: bytes=...` header: `first-last`, `first-` or `-suffix_length`."""
+
+    first: Optional[int]
+    last: Optional[int]
+
+    @property
+    def header_value(self) -> str:
+        """Return this range alone as a `Range` header value, e.g. for the `Range` parameter of S3 GetObject."""
+        first = "" if self.first is None else str(self.first)
+        last = "" if self.last is None else str(self.last)
+        return f"bytes={first}-{last}"
+
+    def resolve(self, size: int) -> Optional[Tuple[int, int]]:
+        """
+        Return the inclusive `(start, end)` byte offsets this range selects from content of `size` bytes.
+
+        :return: None if the range is not satisfiable, e.g. it starts past the end of the content.
+        """
+        if self.first is None:
+            suffix_length = self.last or 0
+            if suffix_length == 0 or size == 0:
+                return None
+            return max(size - suffix_length, 0), size - 1
+
+        if self.first >= size:
+            return None
+        end = size - 1 if self.last is None else min(self.last, size - 1)
+        return self.first, end
+
+
+def parse_range_header(range_header: str) -> List[ByteRangeSpec]:
+    """
+    Parse the value of a `Range` request header.
+
+    Per RFC 9110, a server may ignore a `Range` header it does not understand and send the full content
+    instead, so malformed headers, units other than `bytes`, and excessive numbers of ranges yield no ranges.
+
+    :param range_header: The raw header value, e.g. "bytes=0-499, -500".
+    :return: The requested ranges in the order they were given; empty if the header should be ignored.
+    """
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set:
+        return []
+
+    specs: List[ByteRangeSpec] = []
+    for raw_spec in range_set.split(","):
+        match = BYTE_RANGE_SPEC_PATTERN.match(raw_spec.strip())
+        if not match or (not match["first"] and not match["last"]):
+            return []
+        first = int(match["first"]) if match["first"] else None
+        last = int(match["last"]) if match["last"] else None
+        if first is not None and last is not None and last < first:
+            return []
+        specs.append(ByteRangeSpec(first=first, last=last))
+
+    if len(specs) > MAX_BYTE_RANGES_PER_REQUEST:
+        return []
+    return specs
+
+
+def multipart_byteranges_part_header(boundary: str, content_type: str, start: int, end: int, size: int) -> bytes:
+    """Return the delimiter and headers that precede one part of a `multipart/byteranges` body."""
+    part_header = f"--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n"
+    return part_header.encode("latin-1")
+
+
+def multipart_byteranges_content_length(
+    boundary: str, content_type: str, byte_ranges: Iterable[Tuple[int, int]], size: int
+) -> int:
+    """Return the exact length of the body produced by `iter_multipart_byteranges` for the same arguments."""
+    content_length = len(f"--{boundary}--\r\n")
+    for start, end in byte_ranges:
+        part_header = multipart_byteranges_part_header(boundary, content_type, start, end, size)
+        content_length += len(part_header) + (end - start + 1) + len(b"\r\n")
+    return content_length
+
+
+def iter_multipart_byteranges(  # pylint: disable=too-many-arguments
+    boundary: str,
+    content_type: str,
+    byte_ranges: Iterable[Tuple[int, int]],
+    size: int,
+    fetch_byte_range: Callable[[int, int], Iterable[bytes]],
+) -> Iterator[bytes]:
+    """
+    Stream a `multipart/byteranges` body, fetching the content of each range only once it is reached.
+
+    :param boundary: The multipart boundary, also sent in the response's `Content-Type` header.
+    :param content_type: The MIME type of the underlying content.
+    :param byte_ranges: Inclusive `(start, end)` offsets of the parts to send.
+    :param size: Total size of the underlying content in bytes.
+    :param fetch_byte_range: Called with `(start, end)` to get the chunks of content for one part.
+    """
+    for start, end in byte_ranges:
+        yield multipart_byteranges_part_header(boundary, content_type, start, end, size)
+        yield from fetch_byte_range(start, end)
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode("latin-1")
@@ -1,37 +1,144 @@
+# pylint: disable=too-many-lines
 import mimetypes
-from typing import Annotated
+import secrets
+from dataclasses import replace
+from typing import (
+    Annotated,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
 
-import httpx
+from botocore.exceptions import ClientError
 from fastapi import (
     APIRouter,
     Depends,
+    FastAPI,
+    File,
+    Form,
     HTTPException,
     Request,
     Response,
     UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import (
+    JSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 
+from files_api.archives import (
+    ARCHIVE_MEDIA_TYPES,
+    ArchiveEntry,
+    ArchiveFormat,
+    iter_archive_members,
+    iter_archive_stream,
+    normalize_archive_path,
+)
+from files_api.conditional_requests import (
+    HTTP_DATE_FORMAT,
+    S3Preconditions,
+    get_s3_preconditions,
+    is_not_modified_error,
+    not_modified_response,
+)
+from files_api.content_encoding import (
+    compressed_file_response,
+    get_compressed_file_headers,
+    is_stored_compressed,
+)
 from files_api.generate_files import (
+    download_image,
     generate_image,
     generate_text_to_speech,
     get_text_chat_completion,
 )
-from files_api.s3.delete_objects import delete_s3_object
+from files_api.jobs import (
+    Job,
+    JobContext,
+    JobRegistry,
+)
+from files_api.listing_json import (
+    files_to_ndjson,
+    get_files_response_json,
+    json_bytes_response,
+)
+from files_api.page_tokens import (
+    InvalidPageTokenError,
+    PageToken,
+    decode_page_token,
+    derive_page_token_key,
+    encode_page_token,
+    resume_after,
+)
+from files_api.range_requests import (
+    ByteRangeSpec,
+    iter_multipart_byteranges,
+    multipart_byteranges_content_length,
+    parse_range_header,
+)
+from files_api.s3.aio import AsyncS3Backend
+from files_api.s3.codecs import is_compressible
+from files_api.s3.content_cache import ObjectContentCache
+from files_api.s3.copy_objects import (
+    CopyObjectsResult,
+    CopyOptions,
+    copy_s3_object,
+    copy_s3_objects_by_prefix,
+    move_s3_object,
+)
+from files_api.s3.delete_objects import (
+    DeleteObjectsResult,
+    delete_s3_object,
+    delete_s3_objects,
+    delete_s3_objects_by_prefix,
+)
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
+from files_api.s3.parallel_listing import (
+    count_s3_objects_in_parallel,
+    list_s3_objects_in_parallel,
+)
+from files_api.s3.presigned_urls import generate_presigned_download_url
 from files_api.s3.read_objects import (
+    fetch_s3_directory_listing,
     fetch_s3_object,
-    fetch_s3_objects_metadata,
-    fetch_s3_objects_using_page_token,
+    fetch_s3_object_metadata,
+    is_object_not_found_error,
+    iter_s3_object_pages,
+    iter_s3_objects_with_content,
     object_exists_in_s3,
 )
-from files_api.s3.write_objects import upload_s3_object
+from files_api.s3.write_objects import (
+    S3ObjectToUpload,
+    upload_s3_object,
+    upload_s3_object_from_file,
+    upload_s3_object_if_changed,
+    upload_s3_objects,
+)
 from files_api.schemas import (
-    FileMetadata,
+    DEFAULT_GET_FILES_MAX_PAGE_SIZE,
+    DEFAULT_GET_FILES_MIN_PAGE_SIZE,
+    PAGE_TOKEN_EXCLUSIVE_QUERY_PARAMS,
+    BulkDeleteFileError,
+    BulkDeleteFilesRequest,
+    BulkDeleteFilesResponse,
+    BulkUploadFileResult,
+    BulkUploadFilesResponse,
+    ContentCacheStatsSchema,
+    CopyFileRequest,
+    CopyFileResponse,
     GeneratedFileType,
     GenerateFilesQueryParams,
+    GetCacheStatsResponse,
     GetFilesQueryParams,
     GetFilesResponse,
+    GetJobResponse,
+    MetadataCacheStatsSchema,
     PutFileResponse,
     PutGeneratedFileResponse,
 )
@@ -39,6 +146,34 @@ from files_api.settings import Settings
 
 FILES_ROUTER = APIRouter(tags=["Files"])
 GENERATED_FILES_ROUTER = APIRouter(tags=["Generated Files"])
+JOBS_ROUTER = APIRouter(tags=["Jobs"])
+OBSERVABILITY_ROUTER = APIRouter(tags=["Observability"])
+
+
+def get_s3_backend(request: Request) -> AsyncS3Backend:
+    """Return the backend used to call S3 without blocking the event loop."""
+    return request.app.state.s3_backend
+
+
+def get_files_query_params(request: Request, query_params: GetFilesQueryParams = Depends()) -> GetFilesQueryParams:
+    """
+    Parse the query parameters of `GET /v1/files`, and reject those carried by `page_token` if it's given too.
+
+    This can't be checked by the model, because FastAPI fills in the default of every parameter left out.
+    """
+    given_query_params = PAGE_TOKEN_EXCLUSIVE_QUERY_PARAMS.intersection(request.query_params.keys())
+    if query_params.page_token and given_query_params:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "value_error",
+                    "loc": ("query", "page_token"),
+                    "msg": f"page_token is mutually exclusive with {', '.join(sorted(given_query_params))}",
+                    "input": query_params.page_token,
+                }
+            ]
+        )
+    return query_params
 
 
 @FILES_ROUTER.put(
@@ -47,19 +182,58 @@ GENERATED_FILES_ROUTER = APIRouter(tags=["Generated Files"])
         status.HTTP_200_OK: {"model": PutFileResponse},
         status.HTTP_201_CREATED: {"model": PutFileResponse},
     },
+    # `sha256` is only sent when uploads are deduplicated
+    response_model_exclude_none=True,
 )
 async def upload_file(
     request: Request,
     file_path: str,
     file_content: UploadFile,
     response: Response,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
 ) -> PutFileResponse:
-    """Upload a file."""
+    """
+    Upload a file.
+
+    With `UPLOAD_DEDUP_ENABLED`, the file isn't sent to S3 again if the file at `file_path` already has
+    the same content, and its SHA-256 digest is returned.
+
+    With `STORAGE_COMPRESSION`, text-like files, e.g. JSON or CSV, are stored compressed; downloads
+    are unaffected other than byte ranges not being supported for them.
+    """
     settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    upload_options = {
+        "multipart_threshold": settings.s3_multipart_threshold_bytes,
+        "multipart_chunksize": settings.s3_multipart_chunksize_bytes,
+        "max_concurrency": settings.s3_multipart_max_concurrency,
+        "content_encoding": (settings.storage_compression if is_compressible(file_content.content_type) else None),
+    }
 
-    file_bytes = await file_content.read()
+    if settings.upload_dedup_enabled:
+        result = await s3_backend.call(
+            upload_s3_object_if_changed,
+            settings.s3_bucket_name,
+            object_key=file_path,
+            file_obj=file_content.file,
+            content_type=file_content.content_type,
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+            **upload_options,
+        )
+        if result.skipped:
+            message = f"Existing file unchanged at path: /{file_path}"
+        elif result.existed:
+            message = f"Existing file updated at path: /{file_path}"
+        else:
+            message = f"New file uploaded at path: /{file_path}"
+        response.status_code = status.HTTP_200_OK if result.existed else status.HTTP_201_CREATED
+        return PutFileResponse(file_path=f"{file_path}", message=message, sha256=result.sha256)
 
-    object_already_exists_at_path = object_exists_in_s3(settings.s3_bucket_name, object_key=file_path)
+    object_already_exists_at_path = await s3_backend.call(
+        object_exists_in_s3, settings.s3_bucket_name, object_key=file_path, metadata_cache=metadata_cache
+    )
     if object_already_exists_at_path:
         message = f"Existing file updated at path: /{file_path}"
         response.status_code = status.HTTP_200_OK
@@ -67,45 +241,383 @@ async def upload_file(
         message = f"New file uploaded at path: /{file_path}"
         response.status_code = status.HTTP_201_CREATED
 
-    upload_s3_object(
+    await s3_backend.call(
+        upload_s3_object_from_file,
         bucket_name=settings.s3_bucket_name,
         object_key=file_path,
-        file_content=file_bytes,
+        file_obj=file_content.file,
         content_type=file_content.content_type,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+        **upload_options,
     )
 
     return PutFileResponse(file_path=f"{file_path}", message=message)
 
 
-@FILES_ROUTER.get("/v1/files")
+@FILES_ROUTER.post(
+    "/v1/files/bulk-upload",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Neither files nor an archive were sent, or the archive is not a zip or tar file.",
+        },
+    },
+)
+async def bulk_upload_files(  # pylint: disable=too-many-arguments
+    request: Request,
+    files: Optional[List[UploadFile]] = File(
+        None,
+        description="Files to upload. The filename of each part is the path of the file, relative to `directory`.",
+    ),
+    archive: Optional[UploadFile] = File(
+        None,
+        description="A zip or tar archive whose files are uploaded, keeping their paths relative to `directory`.",
+    ),
+    directory: str = Form("", description="The directory to upload the files into."),
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> BulkUploadFilesResponse:
+    """
+    Upload many small files in one request, as separate parts of a multipart form or packed in an archive.
+
+    Files are uploaded to S3 in parallel, and existing files at the same paths are overwritten.
+    A file that fails to upload is reported in the results rather than failing the whole request.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    if not files and not archive:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files or archive to upload")
+
+    directory = directory if not directory or directory.endswith("/") else f"{directory}/"
+    rejected_results: List[BulkUploadFileResult] = []
+
+    def check_file(path: str, size: Optional[int]) -> Optional[str]:
+        """Return the key to upload a file to, or None after recording why it can't be uploaded."""
+        file_path = normalize_archive_path(path)
+        if not file_path:
+            rejected_results.append(BulkUploadFileResult(file_path=path, uploaded=False, error="Invalid file path"))
+            return None
+        if size is not None and size > settings.bulk_upload_max_file_bytes:
+            error = f"File is larger than {settings.bulk_upload_max_file_bytes} bytes; upload it on its own instead"
+            rejected_results.append(BulkUploadFileResult(file_path=path, uploaded=False, error=error))
+            return None
+        return f"{directory}{file_path}"
+
+    def iter_objects_to_upload() -> Iterator[S3ObjectToUpload]:
+        for upload in files or []:
+            if object_key := check_file(upload.filename or "", upload.size):
+                content_type = upload.content_type or mimetypes.guess_type(object_key)[0]
+                yield S3ObjectToUpload(object_key=object_key, body=upload.file, content_type=content_type)
+        if archive:
+            for member in iter_archive_members(archive.file):
+                if object_key := check_file(member.path, member.size):
+                    content_type = mimetypes.guess_type(object_key)[0]
+                    yield S3ObjectToUpload(object_key=object_key, body=member.read(), content_type=content_type)
+
+    try:
+        upload_results = await s3_backend.call(
+            upload_s3_objects,
+            settings.s3_bucket_name,
+            objects=iter_objects_to_upload(),
+            max_concurrency=settings.s3_upload_max_concurrency,
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+
+    results = rejected_results + [
+        BulkUploadFileResult(file_path=result.object_key, uploaded=result.succeeded, error=result.error_message)
+        for result in upload_results
+    ]
+    uploaded_count = sum(result.uploaded for result in results)
+    return BulkUploadFilesResponse(
+        uploaded_count=uploaded_count,
+        failed_count=len(results) - uploaded_count,
+        results=results,
+    )
+
+
+COPY_FILE_RESPONSES = {
+    status.HTTP_400_BAD_REQUEST: {
+        "description": (
+            "The destination is the source, or with `recursive=true`, inside the source directory, "
+            "or background jobs are disabled."
+        ),
+    },
+    status.HTTP_404_NOT_FOUND: {
+        "description": "File not found for the given `source_path`.",
+    },
+    status.HTTP_202_ACCEPTED: {
+        "model": GetJobResponse,
+        "description": (
+            "With `recursive=true`, the directory is processed by a background job. "
+            "Poll the URL in the `Location` header for its progress."
+        ),
+    },
+}
+
+
+@FILES_ROUTER.post("/v1/files/copy", response_model=CopyFileResponse, responses=COPY_FILE_RESPONSES)
+async def copy_file(
+    request: Request,
+    body: CopyFileRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Union[CopyFileResponse, Response]:
+    """
+    Copy a file, or with `recursive=true`, every file in a directory, to a new path.
+
+    The content is copied inside S3 and never passes through the API, so copying a large file
+    takes about as long as S3 needs to duplicate it.
+    """
+    return await copy_or_move_file(request, body, s3_backend, delete_source=False)
+
+
+@FILES_ROUTER.post("/v1/files/move", response_model=CopyFileResponse, responses=COPY_FILE_RESPONSES)
+async def move_file(
+    request: Request,
+    body: CopyFileRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Union[CopyFileResponse, Response]:
+    """
+    Move a file, or with `recursive=true`, every file in a directory, to a new path.
+
+    Files are copied inside S3, then deleted from their old path. The move is not atomic: for a
+    short while the file exists at both paths.
+    """
+    return await copy_or_move_file(request, body, s3_backend, delete_source=True)
+
+
+async def copy_or_move_file(
+    request: Request,
+    body: CopyFileRequest,
+    s3_backend: AsyncS3Backend,
+    *,
+    delete_source: bool,
+) -> Union[CopyFileResponse, Response]:
+    """Copy or move a single file inline, or start a background job for a directory."""
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    if body.recursive:
+        return start_copy_directory_job(request, body, s3_backend, delete_source=delete_source)
+
+    if body.source_path == body.destination_path:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Source and destination are the same")
+
+    try:
+        await s3_backend.call(
+            move_s3_object if delete_source else copy_s3_object,
+            settings.s3_bucket_name,
+            source_key=body.source_path,
+            destination_key=body.destination_path,
+            options=get_copy_options(settings),
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+        )
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from err
+        raise
+
+    action = "moved" if delete_source else "copied"
+    return CopyFileResponse(
+        source_path=body.source_path,
+        destination_path=body.destination_path,
+        message=f"File {action} from /{body.source_path} to /{body.destination_path}",
+    )
+
+
+def start_copy_directory_job(
+    request: Request,
+    body: CopyFileRequest,
+    s3_backend: AsyncS3Backend,
+    *,
+    delete_source: bool,
+) -> Response:
+    """
+    Copy or move every file under `body.source_path` in a background job and return `202 Accepted` right away.
+
+    The job copies each `list_objects_v2` page of files in parallel and, when moving, then deletes
+    the copied sources of the page with batched `delete_objects` calls.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    jobs = get_job_registry(request.app)
+
+    # "dir" must not match "directory.txt"
+    source_prefix = body.source_path if body.source_path.endswith("/") else f"{body.source_path}/"
+    destination_prefix = body.destination_path if body.destination_path.endswith("/") else f"{body.destination_path}/"
+    if destination_prefix.startswith(source_prefix):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Destination must not be inside the source directory"
+        )
+    s3_client = s3_backend.clients.get_client()
+
+    def copy_directory(context: JobContext) -> None:
+        def report_progress(page_result: CopyObjectsResult) -> None:
+            context.increment("copied_count", page_result.copied_count)
+            context.increment("error_count", len(page_result.errors))
+            context.add_errors([f"{error.object_key}: {error.code} {error.message}" for error in page_result.errors])
+
+        # report zeroes, rather than no counters at all, until the first page completes
+        context.increment("copied_count", 0)
+        context.increment("error_count", 0)
+        copy_s3_objects_by_prefix(
+            settings.s3_bucket_name,
+            source_prefix=source_prefix,
+            destination_prefix=destination_prefix,
+            s3_client=s3_client,
+            delete_source=delete_source,
+            max_concurrency=settings.s3_copy_max_concurrency,
+            options=get_copy_options(settings),
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+            on_page_copied=report_progress,
+        )
+
+    job = jobs.submit(kind="move-directory" if delete_source else "copy-directory", func=copy_directory)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job_to_response(job).model_dump(mode="json"),
+        headers={"Location": f"/v1/jobs/{job.job_id}"},
+    )
+
+
+def get_copy_options(settings: Settings) -> CopyOptions:
+    """Build the multipart copy options from the settings."""
+    return CopyOptions(
+        multipart_threshold=settings.s3_copy_multipart_threshold_bytes,
+        multipart_chunksize=settings.s3_copy_multipart_chunksize_bytes,
+        max_concurrency=settings.s3_copy_max_concurrency,
+    )
+
+
+@FILES_ROUTER.get(
+    "/v1/files",
+    response_model=GetFilesResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {"example": '{"file_path": "a.txt", "last_modified": "...", ...}\n'}},
+            "description": "A page of files, or with `stream=ndjson`, the metadata of every file, one per line.",
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": (
+                "With `mode=full`, the directory has too many files to list in one response. "
+                "Or the `page_token` is invalid, e.g. it was signed with another `PAGE_TOKEN_SECRET`."
+            ),
+        },
+    },
+)
 async def list_files(
     request: Request,
-    query_params: GetFilesQueryParams = Depends(),
-) -> GetFilesResponse:
-    """List files with pagination."""
+    query_params: GetFilesQueryParams = Depends(get_files_query_params),
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Response:
+    """
+    List files with pagination.
+
+    Pass the `next_page_token` of a page as `page_token` to get the next one. The token carries the
+    directory, delimiter and page size of the listing, so the same token always gets the same page.
+
+    With `stream=ndjson`, every file in `directory` is streamed in one response instead, as S3 returns
+    the pages of its listing, which exports a large directory without a round trip per page.
+
+    With `delimiter=/`, only the files directly in `directory` are listed, along with its subdirectories,
+    like a file browser would show them, which avoids scanning every file of a deep tree.
+
+    With `mode=full` or `mode=count`, every file in `directory` is listed in one request instead,
+    with its subdirectories listed in parallel, which is much faster than paging through a large directory.
+    """
     settings: Settings = request.app.state.settings
-    if query_params.page_token:
-        files, next_page_token = fetch_s3_objects_using_page_token(
-            bucket_name=settings.s3_bucket_name,
-            continuation_token=query_params.page_token,
-            max_keys=query_params.page_size,
+    directories: List[str] = []
+    if query_params.stream:
+        return stream_files_as_ndjson(settings, s3_backend, directory=query_params.directory)
+
+    if query_params.mode == "count":
+        object_count = await s3_backend.call(
+            count_s3_objects_in_parallel,
+            settings.s3_bucket_name,
+            prefix=query_params.directory,
+            max_concurrency=settings.s3_list_max_concurrency,
         )
-    else:
-        files, next_page_token = fetch_s3_objects_metadata(
-            bucket_name=settings.s3_bucket_name,
+        return json_bytes_response(
+            get_files_response_json([], file_count=object_count.count, total_size_bytes=object_count.total_size)
+        )
+
+    if query_params.mode == "full":
+        max_files = settings.list_files_full_listing_max_files
+        files = await s3_backend.call(
+            list_s3_objects_in_parallel,
+            settings.s3_bucket_name,
             prefix=query_params.directory,
-            max_keys=query_params.page_size,
+            max_objects=max_files + 1,
+            max_concurrency=settings.s3_list_max_concurrency,
         )
+        if len(files) > max_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The directory has more than {max_files} files; page through them or count them instead",
+            )
+        next_page_token = None
+    else:
+        page = get_page_to_list(settings, query_params)
+        listing = await s3_backend.call(
+            fetch_s3_directory_listing,
+            settings.s3_bucket_name,
+            prefix=page.prefix,
+            delimiter=page.delimiter,
+            max_keys=page.page_size,
+            start_after=page.start_after,
+        )
+        files, directories, next_page_token = listing.objects, listing.directories, None
+        if listing.next_page_token:
+            start_after = resume_after((obj["Key"] for obj in files), directories)
+            next_page_token = encode_page_token(replace(page, start_after=start_after), get_page_token_key(settings))
+
+    # a page can hold thousands of files, so it's serialized without a `FileMetadata` model per file
+    return json_bytes_response(
+        get_files_response_json(files, directories=directories, next_page_token=next_page_token)
+    )
 
-    file_metadata_objs = [
-        FileMetadata(
-            file_path=f"{item['Key']}",
-            last_modified=item["LastModified"],
-            size_bytes=item["Size"],
+
+def get_page_to_list(settings: Settings, query_params: GetFilesQueryParams) -> PageToken:
+    """Return the listing and page to fetch: the one in `page_token`, or else the first page of the given directory."""
+    if not query_params.page_token:
+        return PageToken(
+            prefix=query_params.directory,
+            delimiter=query_params.delimiter,
+            page_size=query_params.page_size,
+            start_after="",
         )
-        for item in files
-    ]
-    return GetFilesResponse(files=file_metadata_objs, next_page_token=next_page_token if next_page_token else None)
+    try:
+        page = decode_page_token(query_params.page_token, get_page_token_key(settings))
+    except InvalidPageTokenError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+    # a token signed with the key derived from the bucket name may be forged, e.g. with a larger page size
+    if not DEFAULT_GET_FILES_MIN_PAGE_SIZE <= page.page_size <= DEFAULT_GET_FILES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page token")
+    return page
+
+
+def get_page_token_key(settings: Settings) -> bytes:
+    """Return the key that signs page tokens: the configured secret, or else one derived from the bucket name."""
+    if settings.page_token_secret:
+        return settings.page_token_secret.get_secret_value().encode()
+    return derive_page_token_key(settings.s3_bucket_name)
+
+
+def stream_files_as_ndjson(settings: Settings, s3_backend: AsyncS3Backend, directory: str) -> StreamingResponse:
+    """Stream the metadata of every file in `directory` as newline-delimited JSON, one S3 page per chunk."""
+    pages = iter_s3_object_pages(settings.s3_bucket_name, prefix=directory, s3_client=s3_backend.clients.get_client())
+
+    def iter_chunks() -> Iterator[bytes]:
+        for page in pages:
+            if page:
+                yield files_to_ndjson(page)
+
+    return StreamingResponse(iter_chunks(), media_type="application/x-ndjson")
 
 
 @FILES_ROUTER.head(
@@ -131,26 +643,60 @@ async def list_files(
                     "example": "Thu, 01 Jan 2022 00:00:00 GMT",
                     "schema": {"type": "string", "format": "date-time"},
                 },
+                "ETag": {
+                    "description": "An identifier for this version of the file, for use in `If-None-Match`.",
+                    "example": '"d41d8cd98f00b204e9800998ecf8427e"',
+                    "schema": {"type": "string"},
+                },
             }
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The file has not changed since the version identified by `If-None-Match` or `If-Modified-Since`.",
+        },
     },
 )
-async def get_file_metadata(request: Request, file_path: str, response: Response) -> Response:
+async def get_file_metadata(
+    request: Request,
+    file_path: str,
+    response: Response,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Response:
     """
     Retrieve file metadata.
 
+    Supports revalidating a cached copy with the `If-None-Match` and `If-Modified-Since` headers.
+
     Note: by convention, HEAD requests MUST NOT return a body in the response.
     """
     settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    try:
+        head_object_response = await s3_backend.call(
+            fetch_s3_object_metadata,
+            settings.s3_bucket_name,
+            object_key=file_path,
+            metadata_cache=metadata_cache,
+            **get_s3_preconditions(request.headers),
+        )
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from err
+        if is_not_modified_error(err):
+            return not_modified_response(err)
+        raise
 
-    get_object_response = fetch_s3_object(settings.s3_bucket_name, object_key=file_path)
-    response.headers["Content-Type"] = get_object_response["ContentType"]
-    response.headers["Content-Length"] = str(get_object_response["ContentLength"])
-    response.headers["Last-Modified"] = get_object_response["LastModified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+    response.headers["Content-Type"] = head_object_response["ContentType"]
+    if is_stored_compressed(head_object_response):
+        # the same headers as a GET
+        response.headers.update(
+            get_compressed_file_headers(head_object_response, request.headers.get("Accept-Encoding", ""))
+        )
+    else:
+        response.headers["Content-Length"] = str(head_object_response["ContentLength"])
+        response.headers["Accept-Ranges"] = "bytes"
+        response.headers["ETag"] = head_object_response["ETag"]
+        response.headers["Last-Modified"] = head_object_response["LastModified"].strftime(HTTP_DATE_FORMAT)
     response.status_code = status.HTTP_200_OK
     return response
 
@@ -162,64 +708,401 @@ async def get_file_metadata(request: Request, file_path: str, response: Response
             "description": "File not found for the given `file_path`.",
         },
         status.HTTP_200_OK: {
-            "description": "The file content.",
+            "description": "The file content, or with `archive`, an archive of the files in the directory.",
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+                "application/zip": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+                "application/x-tar": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+            },
+        },
+        status.HTTP_206_PARTIAL_CONTENT: {
+            "description": (
+                "The byte range of the file requested in the `Range` header. "
+                "Requests for several ranges are answered with a `multipart/byteranges` body."
+            ),
             "content": {
                 "application/octet-stream": {
                     "schema": {"type": "string", "format": "binary"},
                 },
             },
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The file has not changed since the version identified by `If-None-Match` or `If-Modified-Since`.",
+        },
+        status.HTTP_416_RANGE_NOT_SATISFIABLE: {
+            "description": "None of the ranges in the `Range` header overlap the file's content.",
+        },
+        status.HTTP_307_TEMPORARY_REDIRECT: {
+            "description": "With `redirect=true`, a presigned S3 URL to download the file from, in the `Location` header.",
+        },
     },
 )
 async def get_file(
     request: Request,
     file_path: str,
-) -> StreamingResponse:
-    """Retrieve a file."""
+    archive: Optional[ArchiveFormat] = None,
+    redirect: bool = False,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> Response:
+    """
+    Retrieve a file, or with `archive=zip` or `archive=tar`, every file in a directory as one archive.
+
+    Supports [range requests](https://developer.mozilla.org/en-US/docs/Web/HTTP/Range_requests),
+    e.g. `Range: bytes=0-1023` to resume a download or seek within a media file, and
+    [conditional requests](https://developer.mozilla.org/en-US/docs/Web/HTTP/Conditional_requests)
+    with `If-None-Match` or `If-Modified-Since` to revalidate a cached copy without downloading it again.
+    Neither applies to archives.
+
+    With `redirect=true`, the response redirects to a presigned S3 URL instead, so that the client
+    downloads the file straight from S3, which also honors `Range` and conditional headers.
+    """
     settings: Settings = request.app.state.settings
+    if archive:
+        return get_directory_archive(settings, s3_backend, directory=file_path, archive_format=archive)
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    if redirect:
+        if not await s3_backend.call(
+            object_exists_in_s3, settings.s3_bucket_name, object_key=file_path, metadata_cache=metadata_cache
+        ):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        url = await s3_backend.call(
+            generate_presigned_download_url,
+            settings.s3_bucket_name,
+            object_key=file_path,
+            expires_in=settings.presigned_url_expiration_seconds,
+        )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    content_cache: Optional[ObjectContentCache] = request.app.state.content_cache
+
+    preconditions = get_s3_preconditions(request.headers)
+    range_specs = parse_range_header(request.headers.get("Range", ""))
+    if len(range_specs) > 1:
+        multipart_response = await get_file_byte_ranges(
+            settings, s3_backend, file_path, range_specs, preconditions, metadata_cache=metadata_cache
+        )
+        if multipart_response:
+            return multipart_response
+        range_specs = []
+
+    try:
+        get_object_response = await s3_backend.call(
+            fetch_s3_object,
+            settings.s3_bucket_name,
+            object_key=file_path,
+            byte_range=range_specs[0].header_value if range_specs else None,
+            metadata_cache=metadata_cache,
+            content_cache=content_cache,
+            **preconditions,
+        )
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from err
+        if is_not_modified_error(err):
+            return not_modified_response(err)
+        if err.response["Error"]["Code"] == "InvalidRange":
+            raise range_not_satisfiable(size=int(err.response["Error"]["ActualObjectSize"])) from err
+        raise
+
+    if is_stored_compressed(get_object_response):
+        if range_specs:
+            # the range was applied to the compressed bytes, so the whole file is sent instead
+            get_object_response["Body"].close()
+            get_object_response = await s3_backend.call(
+                fetch_s3_object,
+                settings.s3_bucket_name,
+                object_key=file_path,
+                metadata_cache=metadata_cache,
+                content_cache=content_cache,
+            )
+        return compressed_file_response(
+            get_object_response, request.headers.get("Accept-Encoding", ""), settings.s3_download_chunk_size_bytes
+        )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(get_object_response["ContentLength"]),
+        "ETag": get_object_response["ETag"],
+        "Last-Modified": get_object_response["LastModified"].strftime(HTTP_DATE_FORMAT),
+    }
+    if "ContentRange" in get_object_response:
+        headers["Content-Range"] = get_object_response["ContentRange"]
 
-    get_object_response = fetch_s3_object(settings.s3_bucket_name, object_key=file_path)
     return StreamingResponse(
-        content=get_object_response["Body"],
+        content=get_object_response["Body"].iter_chunks(settings.s3_download_chunk_size_bytes),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if "Content-Range" in headers else status.HTTP_200_OK,
         media_type=get_object_response["ContentType"],
+        headers=headers,
+    )
+
+
+async def get_file_byte_ranges(  # pylint: disable=too-many-arguments
+    settings: Settings,
+    s3_backend: AsyncS3Backend,
+    file_path: str,
+    range_specs: List[ByteRangeSpec],
+    preconditions: S3Preconditions,
+    *,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+) -> Optional[Response]:
+    """
+    Answer a request for several byte ranges of a file with a `multipart/byteranges` body.
+
+    S3 only serves one range per GetObject call, so each part is fetched with its own ranged
+    GET once the response body reaches it.
+
+    :return: The response, or None if the file is stored compressed, in which case it must be sent whole.
+    """
+    try:
+        head_object_response = await s3_backend.call(
+            fetch_s3_object_metadata,
+            settings.s3_bucket_name,
+            object_key=file_path,
+            metadata_cache=metadata_cache,
+            **preconditions,
+        )
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from err
+        if is_not_modified_error(err):
+            return not_modified_response(err)
+        raise
+
+    if is_stored_compressed(head_object_response):
+        return None
+
+    size = head_object_response["ContentLength"]
+    content_type = head_object_response["ContentType"]
+    byte_ranges = [byte_range for byte_range in (spec.resolve(size) for spec in range_specs) if byte_range]
+    if not byte_ranges:
+        raise range_not_satisfiable(size=size)
+
+    s3_client = s3_backend.clients.get_client()
+
+    def fetch_byte_range(start: int, end: int) -> Iterable[bytes]:
+        get_object_response = fetch_s3_object(
+            settings.s3_bucket_name,
+            object_key=file_path,
+            byte_range=ByteRangeSpec(first=start, last=end).header_value,
+            s3_client=s3_client,
+        )
+        return get_object_response["Body"].iter_chunks(settings.s3_download_chunk_size_bytes)
+
+    boundary = secrets.token_hex(16)
+    content_length = multipart_byteranges_content_length(boundary, content_type, byte_ranges, size)
+    return StreamingResponse(
+        # starlette iterates synchronous generators in a worker thread, so the ranged GETs don't block the event loop
+        content=iter_multipart_byteranges(boundary, content_type, byte_ranges, size, fetch_byte_range),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers={
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(content_length),
+            "ETag": head_object_response["ETag"],
+            "Last-Modified": head_object_response["LastModified"].strftime(HTTP_DATE_FORMAT),
+        },
+    )
+
+
+def get_directory_archive(
+    settings: Settings, s3_backend: AsyncS3Backend, directory: str, archive_format: ArchiveFormat
+) -> Response:
+    """
+    Stream every file under `directory` as a zip or tar archive, assembled while it is sent.
+
+    Paths inside the archive are relative to `directory`. Folder markers, i.e. empty objects whose key
+    ends in `/`, are left out, and so are keys that can't be made into a safe relative path, e.g. those
+    with `..` segments. The archive's size is not known up front, so it is sent with chunked transfer encoding.
+    """
+    prefix = directory if not directory or directory.endswith("/") else f"{directory}/"
+    s3_objects = iter_s3_objects_with_content(
+        settings.s3_bucket_name,
+        prefix=prefix,
+        s3_client=s3_backend.clients.get_client(),
+        prefetch_count=settings.archive_prefetch_count,
+        prefetch_max_object_bytes=settings.archive_prefetch_max_object_bytes,
+        chunk_size=settings.s3_download_chunk_size_bytes,
+    )
+    entries = (
+        ArchiveEntry(
+            path=path,
+            size=obj.size,
+            last_modified=obj.last_modified,
+            chunks=obj.chunks,
+        )
+        for obj in s3_objects
+        if not obj.object_key.endswith("/") and (path := normalize_archive_path(obj.object_key.removeprefix(prefix)))
+    )
+    archive_name = prefix.rstrip("/").rsplit("/", 1)[-1] or settings.s3_bucket_name
+    return StreamingResponse(
+        # starlette iterates synchronous generators in a worker thread, so the S3 calls don't block the event loop
+        content=iter_archive_stream(archive_format, entries),
+        media_type=ARCHIVE_MEDIA_TYPES[archive_format],
+        headers={"Content-Disposition": f'attachment; filename="{archive_name}.{archive_format}"'},
+    )
+
+
+def range_not_satisfiable(size: int) -> HTTPException:
+    """Return the error for a `Range` header that selects no bytes of a file of `size` bytes."""
+    return HTTPException(
+        status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
     )
 
 
 @FILES_ROUTER.delete(
     "/v1/files/{file_path:path}",
     responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "With `recursive=true`, background jobs are disabled.",
+        },
         status.HTTP_404_NOT_FOUND: {
             "description": "File not found for the given `file_path`.",
         },
         status.HTTP_204_NO_CONTENT: {
             "description": "File deleted successfully.",
         },
+        status.HTTP_202_ACCEPTED: {
+            "model": GetJobResponse,
+            "description": (
+                "With `recursive=true`, the directory is deleted by a background job. "
+                "Poll the URL in the `Location` header for its progress."
+            ),
+        },
     },
 )
 async def delete_file(
     request: Request,
     file_path: str,
     response: Response,
+    recursive: bool = False,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
 ) -> Response:
     """
-    Delete a file.
+    Delete a file, or with `recursive=true`, every file in a directory.
 
-    NOTE: DELETE requests MUST NOT return a body in the response.
+    NOTE: DELETE requests MUST NOT return a body in the response, except for the
+    `202 Accepted` response describing the background job of a recursive delete.
     """
     settings: Settings = request.app.state.settings
-    if not object_exists_in_s3(settings.s3_bucket_name, object_key=file_path):
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    if recursive:
+        return start_delete_directory_job(request, directory=file_path, s3_backend=s3_backend)
+
+    if not await s3_backend.call(
+        object_exists_in_s3, settings.s3_bucket_name, object_key=file_path, metadata_cache=metadata_cache
+    ):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    delete_s3_object(settings.s3_bucket_name, object_key=file_path)
+    await s3_backend.call(
+        delete_s3_object,
+        settings.s3_bucket_name,
+        object_key=file_path,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+    )
 
     response.status_code = status.HTTP_204_NO_CONTENT
     return response
 
 
+def start_delete_directory_job(request: Request, directory: str, s3_backend: AsyncS3Backend) -> Response:
+    """
+    Delete every file under `directory` in a background job and return `202 Accepted` right away.
+
+    The job pipelines `list_objects_v2` pages into batched `delete_objects` calls, so deleting a
+    directory of 100k files takes about 100 listing round trips, overlapped with the deletes.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+    jobs = get_job_registry(request.app)
+
+    # "dir" must not match "directory.txt"
+    prefix = directory if directory.endswith("/") else f"{directory}/"
+    s3_client = s3_backend.clients.get_client()
+
+    def delete_directory(context: JobContext) -> None:
+        def report_progress(batch_result: DeleteObjectsResult) -> None:
+            context.increment("deleted_count", batch_result.deleted_count)
+            context.increment("error_count", len(batch_result.errors))
+            context.add_errors([f"{error.object_key}: {error.code} {error.message}" for error in batch_result.errors])
+
+        # report zeroes, rather than no counters at all, until the first batch completes
+        context.increment("deleted_count", 0)
+        context.increment("error_count", 0)
+        delete_s3_objects_by_prefix(
+            settings.s3_bucket_name,
+            prefix=prefix,
+            s3_client=s3_client,
+            max_concurrency=settings.s3_delete_max_concurrency,
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+            on_batch_deleted=report_progress,
+        )
+
+    job = jobs.submit(kind="delete-directory", func=delete_directory)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job_to_response(job).model_dump(mode="json"),
+        headers={"Location": f"/v1/jobs/{job.job_id}"},
+    )
+
+
+@FILES_ROUTER.post("/v1/files/bulk-delete")
+async def bulk_delete_files(
+    request: Request,
+    body: BulkDeleteFilesRequest,
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
+) -> BulkDeleteFilesResponse:
+    """
+    Delete many files at once, either by listing their paths or by giving the directory that contains them.
+
+    Files are deleted in batches of up to 1000 per S3 request, several batches at a time. Failures are
+    reported per file rather than failing the whole request.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
+
+    if body.file_paths is not None:
+        result = await s3_backend.call(
+            delete_s3_objects,
+            settings.s3_bucket_name,
+            object_keys=body.file_paths,
+            max_concurrency=settings.s3_delete_max_concurrency,
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+        )
+    else:
+        directory = body.directory or ""
+        # "dir" must not match "directory.txt", as with a recursive delete
+        result = await s3_backend.call(
+            delete_s3_objects_by_prefix,
+            settings.s3_bucket_name,
+            prefix=directory if directory.endswith("/") else f"{directory}/",
+            max_concurrency=settings.s3_delete_max_concurrency,
+            metadata_cache=metadata_cache,
+            metadata_index=metadata_index,
+        )
+
+    return BulkDeleteFilesResponse(
+        deleted_count=result.deleted_count,
+        errors=[
+            BulkDeleteFileError(file_path=error.object_key, code=error.code, message=error.message)
+            for error in result.errors
+        ],
+    )
+
+
 @GENERATED_FILES_ROUTER.post(
     "/v1/files/generated/{file_path:path}",
     status_code=status.HTTP_201_CREATED,
@@ -241,7 +1124,10 @@ async def delete_file(
     },
 )
 async def generate_file_using_openai(
-    request: Request, response: Response, query_params: Annotated[GenerateFilesQueryParams, Depends()]
+    request: Request,
+    response: Response,
+    query_params: Annotated[GenerateFilesQueryParams, Depends()],
+    s3_backend: AsyncS3Backend = Depends(get_s3_backend),
 ) -> PutGeneratedFileResponse:
     """
     Generate a File using AI.
@@ -255,6 +1141,8 @@ async def generate_file_using_openai(
     an extension matching one of the supported file types in the list above.
     """
     settings: Settings = request.app.state.settings
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    metadata_index: Optional[ObjectMetadataIndex] = request.app.state.metadata_index
     s3_bucket_name = settings.s3_bucket_name
 
     content_type = None
@@ -268,9 +1156,7 @@ async def generate_file_using_openai(
     # generate/download an image
     elif query_params.file_type == GeneratedFileType.IMAGE:
         image_url = await generate_image(prompt=query_params.prompt)
-        async with httpx.AsyncClient() as client:
-            image_response = await client.get(image_url)  # pylint: disable=missing-timeout
-        file_content_bytes = image_response.content
+        file_content_bytes = await download_image(image_url)
 
     # generate audio
     else:
@@ -283,11 +1169,14 @@ async def generate_file_using_openai(
     content_type: str | None = content_type or mimetypes.guess_type(query_params.file_path)[0]  # type: ignore
 
     # Upload the generated file to S3
-    upload_s3_object(
+    await s3_backend.call(
+        upload_s3_object,
         bucket_name=s3_bucket_name,
         object_key=query_params.file_path,
         file_content=file_content_bytes,
         content_type=content_type,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
     )
 
     # return response
@@ -296,3 +1185,54 @@ async def generate_file_using_openai(
         file_path=query_params.file_path,
         message=f"New {query_params.file_type.value} file generated and uploaded at path: {query_params.file_path}",
     )
+
+
+@JOBS_ROUTER.get(
+    "/v1/jobs/{job_id}",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No job with the given `job_id`, or it finished long enough ago to be forgotten.",
+        },
+    },
+)
+async def get_job(request: Request, job_id: str) -> GetJobResponse:
+    """Get the status and progress of a background job, e.g. a recursive delete."""
+    jobs: Optional[JobRegistry] = request.app.state.jobs
+    job = jobs.get(job_id) if jobs else None
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job_to_response(job)
+
+
+def get_job_registry(app: FastAPI) -> JobRegistry:
+    """Return the app's job registry, or fail the request with a 400 if background jobs are disabled."""
+    jobs: Optional[JobRegistry] = app.state.jobs
+    if not jobs:
+        # e.g. on AWS Lambda, where a job would be frozen along with the process once the response is sent
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Background jobs are disabled")
+    return jobs
+
+
+def job_to_response(job: Job) -> GetJobResponse:
+    """Convert a snapshot of a job to its response model."""
+    return GetJobResponse(
+        job_id=job.job_id,
+        kind=job.kind,
+        status=job.status.value,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        progress=job.progress,
+        errors=job.errors,
+        error=job.error,
+    )
+
+
+@OBSERVABILITY_ROUTER.get("/v1/cache-stats")
+async def get_cache_stats(request: Request) -> GetCacheStatsResponse:
+    """Report hit/miss counters of the in-process caches, e.g. to tune their size and TTL."""
+    metadata_cache: Optional[ObjectMetadataCache] = request.app.state.metadata_cache
+    content_cache: Optional[ObjectContentCache] = request.app.state.content_cache
+    return GetCacheStatsResponse(
+        metadata_cache=MetadataCacheStatsSchema(**vars(metadata_cache.stats)) if metadata_cache else None,
+        content_cache=ContentCacheStatsSchema(**vars(content_cache.stats)) if content_cache else None,
+    )
@@ -0,0 +1,49 @@
+"""Call the blocking `files_api.s3` helpers from async code without stalling the event loop."""
+
+import functools
+from typing import (
+    Callable,
+    Literal,
+    ParamSpec,
+    TypeVar,
+)
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+
+from files_api.s3.clients import S3ClientRegistry
+
+S3BackendMode = Literal["threadpool", "blocking"]
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class AsyncS3Backend:
+    """
+    Run any `files_api.s3` helper, e.g. `fetch_s3_object`, as an awaitable.
+
+    boto3 is synchronous, so calling it directly from an `async def` route blocks the event loop
+    for the full S3 round trip and serializes every concurrent request on the worker. In
+    `threadpool` mode calls are offloaded to worker threads, bounded by `max_concurrency`, while
+    `blocking` mode calls them inline which is only useful for debugging and benchmarking.
+
+    The shared client from `clients` is passed as `s3_client` unless the caller provides one, so the
+    helpers keep their usual signatures, e.g. `await backend.call(fetch_s3_object, bucket, object_key=key)`.
+
+    :param clients: Registry that provides the pooled S3 client.
+    :param mode: Whether to offload calls to a thread pool or run them on the event loop.
+    :param max_concurrency: Maximum number of S3 calls running in worker threads at once.
+    """
+
+    def __init__(self, clients: S3ClientRegistry, mode: S3BackendMode = "threadpool", max_concurrency: int = 40):
+        self.clients = clients
+        self.mode = mode
+        self._limiter = CapacityLimiter(max_concurrency)
+
+    async def call(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Call `func` with the shared S3 client without blocking the event loop."""
+        kwargs.setdefault("s3_client", self.clients.get_client())
+        if self.mode == "blocking":
+            return func(*args, **kwargs)
+        return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=self._limiter)
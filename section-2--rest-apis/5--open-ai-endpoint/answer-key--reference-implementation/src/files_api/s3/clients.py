@@ -0,0 +1,99 @@
+"""App-scoped registry of pooled boto3 S3 clients shared by every request."""
+
+import threading
+from typing import (
+    Dict,
+    Literal,
+    Optional,
+)
+
+import boto3
+from botocore.config import Config
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+RetryMode = Literal["legacy", "standard", "adaptive"]
+
+
+class S3ClientRegistry:
+    """
+    Lazily create boto3 S3 clients once and reuse them for the lifetime of the app.
+
+    Creating a client is expensive: botocore resolves credentials, loads the service model
+    and endpoint rules, and opens a brand new urllib3 connection pool. boto3 clients are
+    thread-safe, so a single client per region can serve every request and keep its
+    TLS connections warm between them.
+
+    :param max_pool_connections: Maximum number of connections kept open in each client's pool.
+    :param connect_timeout: Seconds to wait while establishing a connection.
+    :param read_timeout: Seconds to wait for a response once a connection is established.
+    :param retry_mode: botocore retry mode, see https://boto3.amazonaws.com/v1/documentation/api/latest/guide/retries.html
+    :param max_attempts: Maximum number of attempts per request, including the initial attempt.
+    :param tcp_keepalive: Whether to enable TCP keep-alive on pooled connections.
+    :param session: Optional boto3 session to create clients from. If not provided, a new session will be created.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        max_pool_connections: int = 10,
+        connect_timeout: float = 60,
+        read_timeout: float = 60,
+        retry_mode: RetryMode = "standard",
+        max_attempts: int = 3,
+        tcp_keepalive: bool = True,
+        session: Optional[boto3.Session] = None,
+    ):
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={"mode": retry_mode, "total_max_attempts": max_attempts},
+            tcp_keepalive=tcp_keepalive,
+            # presigned URLs are signed with SigV2 in some regions unless SigV4 is asked for explicitly
+            signature_version="s3v4",
+        )
+        self._session = session or boto3.Session()
+        self._clients: Dict[Optional[str], "S3Client"] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, region_name: Optional[str] = None) -> "S3Client":
+        """
+        Return the shared S3 client for a region, creating it on first use.
+
+        :param region_name: AWS region of the client. If not provided, the session's default region is used.
+        """
+        client = self._clients.get(region_name)
+        if client is not None:
+            return client
+
+        # boto3 sessions are not thread-safe, so client creation is serialized
+        with self._lock:
+            if region_name not in self._clients:
+                self._clients[region_name] = self._session.client("s3", region_name=region_name, config=self.config)
+            return self._clients[region_name]
+
+    def prewarm(self, region_name: Optional[str] = None) -> None:
+        """
+        Create the client for a region and resolve credentials now rather than during the first request.
+
+        Nothing is sent to S3, so no connection is opened: the pool still connects on first use. That makes
+        this safe to call before a process is snapshotted, e.g. in the init phase of a Lambda function.
+
+        :param region_name: AWS region of the client. If not provided, the session's default region is used.
+        """
+        self.get_client(region_name)
+        credentials = self._session.get_credentials()
+        if credentials is not None:
+            # refreshable credentials, e.g. those of a Lambda function's role, are only fetched when first used
+            credentials.get_frozen_credentials()
+
+    def close(self) -> None:
+        """Close the connection pools of every client created by this registry."""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
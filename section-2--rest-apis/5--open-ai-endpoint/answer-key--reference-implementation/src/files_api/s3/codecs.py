@@ -0,0 +1,178 @@
+"""
+Compression codecs for storing compressible files compressed in S3.
+
+Text formats such as JSON, CSV and logs often shrink by 5-10x, which saves as much in storage and in bytes
+moved to and from S3. Files are compressed as they're streamed to S3 and the codec is recorded as the object's
+standard `ContentEncoding`, so compressed objects tell themselves apart and presigned downloads served by S3
+itself are decoded by browsers and HTTP clients.
+
+`zstd` needs the optional `zstandard` package; `gzip` only needs the standard library.
+"""
+
+import io
+import zlib
+from typing import (
+    IO,
+    Any,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Optional,
+    Protocol,
+    get_args,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+StorageEncoding = Literal["gzip", "zstd"]
+STORAGE_ENCODINGS = frozenset(get_args(StorageEncoding))
+
+DEFAULT_COMPRESSION_CHUNK_SIZE_BYTES = 256 * 1024
+
+# user metadata in which compressed objects record their size before compression, i.e. `x-amz-meta-uncompressed-size`
+UNCOMPRESSED_SIZE_METADATA_KEY = "uncompressed-size"
+
+# zlib's `wbits` for a gzip header and trailer around the deflate stream
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# fast levels: these compress most of what the slower ones do, at a fraction of the CPU time
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_CONTENT_TYPES = frozenset(
+    {
+        "application/javascript",
+        "application/json",
+        "application/ld+json",
+        "application/sql",
+        "application/toml",
+        "application/x-ndjson",
+        "application/x-yaml",
+        "application/xml",
+        "application/yaml",
+        "image/svg+xml",
+    }
+)
+
+
+class Compressor(Protocol):  # pylint: disable=too-few-public-methods
+    """Incremental compressor, e.g. a `zlib.compressobj`."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, returning whatever compressed output is ready."""
+
+    def flush(self) -> bytes:
+        """Finish the stream, returning the rest of the compressed output."""
+
+
+class Decompressor(Protocol):  # pylint: disable=too-few-public-methods
+    """Incremental decompressor, e.g. a `zlib.decompressobj`."""
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a chunk, returning whatever decompressed output is ready."""
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether files of a MIME type are worth compressing, e.g. text and JSON but not images or zip files."""
+    if not content_type:
+        return False
+    media_type = content_type.split(";")[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_CONTENT_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def get_uncompressed_size(s3_response: Mapping[str, Any]) -> Optional[int]:
+    """Return the size before compression recorded on an object stored compressed, or None if it's missing."""
+    uncompressed_size = s3_response.get("Metadata", {}).get(UNCOMPRESSED_SIZE_METADATA_KEY, "")
+    return int(uncompressed_size) if uncompressed_size.isdigit() else None
+
+
+def is_codec_available(encoding: str) -> bool:
+    """Whether objects stored with `encoding` can be compressed and decompressed here."""
+    return encoding == "gzip" or (encoding == "zstd" and zstandard is not None)
+
+
+def make_compressor(encoding: StorageEncoding) -> Compressor:
+    """
+    Return a new incremental compressor for `encoding`.
+
+    :raises ValueError: If the codec is unknown or its package isn't installed.
+    """
+    if encoding == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Unsupported storage encoding: {encoding}")
+
+
+def make_decompressor(encoding: str) -> Decompressor:
+    """
+    Return a new incremental decompressor for `encoding`.
+
+    :raises ValueError: If the codec is unknown or its package isn't installed.
+    """
+    if encoding == "gzip":
+        return zlib.decompressobj(GZIP_WBITS)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported storage encoding: {encoding}")
+
+
+class CompressingReader(io.RawIOBase):
+    """
+    Read-only, non-seekable file object whose content is another file object compressed as it's read.
+
+    Handing one to `upload_fileobj` compresses an upload chunk by chunk while it's sent to S3, so neither the
+    file nor its compressed form has to be held in memory in full.
+    """
+
+    def __init__(
+        self,
+        file_obj: IO[bytes],
+        encoding: StorageEncoding,
+        chunk_size: int = DEFAULT_COMPRESSION_CHUNK_SIZE_BYTES,
+    ):
+        super().__init__()
+        self._file_obj = file_obj
+        self._compressor = make_compressor(encoding)
+        self._chunk_size = chunk_size
+        self._pending = memoryview(b"")
+        self._finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        while not self._pending and not self._finished:
+            chunk = self._file_obj.read(self._chunk_size)
+            if chunk:
+                self._pending = memoryview(self._compressor.compress(chunk))
+            else:
+                self._pending = memoryview(self._compressor.flush())
+                self._finished = True
+        size = min(len(buffer), len(self._pending))
+        buffer[slice(0, size)] = self._pending[slice(0, size)]
+        self._pending = self._pending[slice(size, None)]
+        return size
+
+
+def iter_decompressed(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Decompress a stream of compressed chunks chunk by chunk, skipping chunks that decompress to nothing."""
+    decompressor = make_decompressor(encoding)
+    for chunk in chunks:
+        if data := decompressor.decompress(chunk):
+            yield data
+    if flush := getattr(decompressor, "flush", None):
+        if data := flush():
+            yield data
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Decompress a whole object at once."""
+    return b"".join(iter_decompressed([data], encoding))
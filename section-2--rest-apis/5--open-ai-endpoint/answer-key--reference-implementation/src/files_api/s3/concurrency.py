@@ -0,0 +1,48 @@
+"""Run many independent S3 calls in parallel without reading their inputs into memory all at once."""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    Set,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_with_bounded_concurrency(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_concurrency: int,
+    thread_name_prefix: str = "s3",
+) -> Iterator[R]:
+    """
+    Call `func` on every item in worker threads, yielding the results in the order they complete.
+
+    At most `max_concurrency` calls are in flight at once, and the next item is only pulled from
+    `items` when a worker is free, so a lazy iterable, e.g. pages of a listing, is never read far
+    ahead of the calls consuming it.
+
+    :param func: Function to call on each item. Exceptions it raises propagate to the caller.
+    :param items: Inputs of the calls; consumed lazily.
+    :param max_concurrency: Maximum number of calls in flight at once.
+    :param thread_name_prefix: Prefix of the worker threads' names, to tell them apart in stack dumps.
+    """
+    in_flight: Set[Future[R]] = set()
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=thread_name_prefix) as executor:
+        for item in items:
+            if len(in_flight) >= max_concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            in_flight.add(executor.submit(func, item))
+        for future in wait(in_flight).done:
+            yield future.result()
@@ -0,0 +1,181 @@
+"""In-process cache of the content of small, frequently read S3 objects."""
+
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+CachedContent = Union[bytes, mmap.mmap]
+ContentCacheKey = Tuple[str, str, str]
+
+
+@dataclass
+class ContentCacheStats:
+    """Counters describing how effective the cache has been since it was created."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    memory_bytes: int = 0
+    spill_bytes: int = 0
+
+
+class CachedObjectBody:
+    """Stand-in for the boto3 `StreamingBody` of a `get_object` response whose content is already cached."""
+
+    def __init__(self, content: CachedContent):
+        self._content = content
+
+    def read(self) -> bytes:
+        """Return the whole content."""
+        return bytes(self._content)
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        """Yield the content in chunks of `chunk_size` bytes."""
+        for start in range(0, len(self._content), chunk_size):
+            yield self._content[slice(start, start + chunk_size)]
+
+
+class ObjectContentCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Thread-safe cache of object content, bounded by the total number of bytes it holds.
+
+    Entries are keyed by bucket, key and ETag, so overwriting an object never serves stale content:
+    the new version has a different ETag and the old entry simply ages out of the LRU.
+
+    Content is kept in memory up to `max_memory_bytes`. If `spill_dir` is given, entries evicted from
+    memory are written to files in it, up to `max_spill_bytes`, and served from there with `mmap` so
+    that the page cache rather than the Python heap holds them. Each spilled entry is mapped once and
+    every hit shares that mapping.
+
+    :param max_object_bytes: Objects larger than this are never cached.
+    :param max_memory_bytes: Maximum total size of the content held in memory.
+    :param spill_dir: Optional directory for content evicted from memory.
+    :param max_spill_bytes: Maximum total size of the content written to `spill_dir`.
+    """
+
+    def __init__(
+        self,
+        max_object_bytes: int = 1024**2,
+        max_memory_bytes: int = 64 * 1024**2,
+        spill_dir: Optional[str] = None,
+        max_spill_bytes: int = 1024**3,
+    ):
+        self.max_object_bytes = max_object_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_spill_bytes = max_spill_bytes
+        # a private subdirectory, so that several workers can share `spill_dir` without clobbering each other
+        self._spill_dir = tempfile.mkdtemp(prefix="files-api-content-cache-", dir=spill_dir) if spill_dir else None
+        self._memory: "OrderedDict[ContentCacheKey, bytes]" = OrderedDict()
+        self._spilled: "OrderedDict[ContentCacheKey, mmap.mmap]" = OrderedDict()
+        self._stats = ContentCacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_name: str, object_key: str, etag: str) -> Optional[CachedContent]:
+        """Return the cached content of one version of an object, or None if it is not cached."""
+        cache_key = (bucket_name, object_key, etag)
+        with self._lock:
+            if cache_key in self._memory:
+                self._memory.move_to_end(cache_key)
+                self._stats.hits += 1
+                return self._memory[cache_key]
+            if cache_key in self._spilled:
+                self._spilled.move_to_end(cache_key)
+                self._stats.hits += 1
+                return self._spilled[cache_key]
+            self._stats.misses += 1
+            return None
+
+    def put(self, bucket_name: str, object_key: str, etag: str, content: bytes) -> None:
+        """Cache one version of an object, evicting the least recently used content to stay within budget."""
+        if len(content) > min(self.max_object_bytes, self.max_memory_bytes):
+            return
+        cache_key = (bucket_name, object_key, etag)
+        with self._lock:
+            self._discard(cache_key)
+            self._memory[cache_key] = content
+            self._stats.memory_bytes += len(content)
+            while self._stats.memory_bytes > self.max_memory_bytes:
+                evicted_key, evicted_content = self._memory.popitem(last=False)
+                self._stats.memory_bytes -= len(evicted_content)
+                self._spill(evicted_key, evicted_content)
+
+    def clear(self) -> None:
+        """Forget every cached object."""
+        with self._lock:
+            for cache_key in list(self._spilled):
+                self._discard(cache_key)
+            self._memory.clear()
+            self._stats.memory_bytes = 0
+
+    def close(self) -> None:
+        """Forget every cached object, unmap the spilled ones and remove the spill directory."""
+        with self._lock:
+            spilled_content = list(self._spilled.values())
+        self.clear()
+        for mapped_content in spilled_content:
+            mapped_content.close()
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    @property
+    def stats(self) -> ContentCacheStats:
+        """Return a snapshot of the cache's counters."""
+        with self._lock:
+            return ContentCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._memory) + len(self._spilled),
+                memory_bytes=self._stats.memory_bytes,
+                spill_bytes=self._stats.spill_bytes,
+            )
+
+    def _spill(self, cache_key: ContentCacheKey, content: bytes) -> None:
+        """Move content evicted from memory to disk, or drop it if there is no room there."""
+        # an empty file cannot be mmap-ed, and is cheaper to fetch again than to track
+        if not self._spill_dir or not content or len(content) > self.max_spill_bytes:
+            self._stats.evictions += 1
+            return
+        while self._stats.spill_bytes + len(content) > self.max_spill_bytes:
+            self._discard(next(iter(self._spilled)))
+            self._stats.evictions += 1
+        try:
+            with open(self._spill_path(cache_key), "w+b") as file:
+                file.write(content)
+                file.flush()
+                # the mapping stays valid after the file is closed, or even deleted by a later eviction
+                mapped_content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            # e.g. the disk is full; the content can always be fetched from S3 again
+            self._stats.evictions += 1
+            return
+        self._spilled[cache_key] = mapped_content
+        self._stats.spill_bytes += len(content)
+
+    def _discard(self, cache_key: ContentCacheKey) -> None:
+        """Remove one entry from memory or disk, if present."""
+        if cache_key in self._memory:
+            self._stats.memory_bytes -= len(self._memory.pop(cache_key))
+        if cache_key in self._spilled:
+            # not closed here: a response may still be streaming it, and it's unmapped when the last one is done
+            self._stats.spill_bytes -= len(self._spilled.pop(cache_key))
+            try:
+                os.remove(self._spill_path(cache_key))
+            except FileNotFoundError:
+                pass
+
+    def _spill_path(self, cache_key: ContentCacheKey) -> str:
+        file_name = hashlib.sha256("\0".join(cache_key).encode("utf-8")).hexdigest()
+        return os.path.join(self._spill_dir or "", file_name)
@@ -0,0 +1,253 @@
+"""Functions for copying and moving objects within an S3 bucket without downloading them."""
+
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Callable,
+    List,
+    Optional,
+)
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+)
+
+from files_api.s3.concurrency import map_with_bounded_concurrency
+from files_api.s3.delete_objects import (
+    delete_s3_object,
+    delete_s3_objects,
+)
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+# a single CopyObject call can copy objects of up to 5 GiB; larger objects need a multipart copy
+MAX_COPY_OBJECT_BYTES = 5 * 1024**3
+DEFAULT_COPY_MULTIPART_THRESHOLD_BYTES = 1024**3
+DEFAULT_COPY_MULTIPART_CHUNKSIZE_BYTES = 256 * 1024**2
+DEFAULT_COPY_MAX_CONCURRENCY = 8
+
+
+@dataclass(frozen=True)
+class CopyOptions:
+    """When and how objects are copied in parts with `upload_part_copy` rather than with one `copy_object`."""
+
+    multipart_threshold: int = DEFAULT_COPY_MULTIPART_THRESHOLD_BYTES
+    multipart_chunksize: int = DEFAULT_COPY_MULTIPART_CHUNKSIZE_BYTES
+    max_concurrency: int = DEFAULT_COPY_MAX_CONCURRENCY
+
+
+@dataclass(frozen=True)
+class ObjectCopyError:
+    """An object that S3 failed to copy, or, when moving, to delete after copying."""
+
+    object_key: str
+    code: str
+    message: str
+
+
+@dataclass
+class CopyObjectsResult:
+    """Outcome of copying or moving every object under a prefix."""
+
+    copied_count: int = 0
+    errors: List[ObjectCopyError] = field(default_factory=list)
+
+    def add(self, other: "CopyObjectsResult") -> None:
+        """Merge the outcome of another page of objects into this one."""
+        self.copied_count += other.copied_count
+        self.errors.extend(other.errors)
+
+
+def copy_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    source_size: Optional[int] = None,
+    options: CopyOptions = CopyOptions(),
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+) -> None:
+    """
+    Copy an object within the S3 bucket; the content never leaves S3.
+
+    Objects smaller than `options.multipart_threshold` are copied with a single `copy_object` call.
+    Larger objects are copied with a multipart upload whose parts are copied in parallel with
+    `upload_part_copy`, which is also the only way to copy objects larger than 5 GiB. Either way
+    the content type and user metadata of the source object are kept.
+
+    Raises a `ClientError` for which `is_object_not_found_error` is True if the source does not exist.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param source_key: Key of the object to copy.
+    :param destination_key: Key of the copy. An existing object at this key is overwritten.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param source_size: Size of the source object if already known, e.g. from a listing, which saves a `head_object`.
+    :param options: Thresholds and concurrency of multipart copies.
+    :param metadata_cache: Optional metadata cache in which to invalidate the overwritten object.
+    :param metadata_index: Optional metadata index in which to record the copy.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    if source_size is None:
+        source_size = s3_client.head_object(Bucket=bucket_name, Key=source_key)["ContentLength"]
+
+    copy_source = {"Bucket": bucket_name, "Key": source_key}
+    multipart_threshold = min(options.multipart_threshold, MAX_COPY_OBJECT_BYTES)
+    if source_size < multipart_threshold:
+        s3_client.copy_object(CopySource=copy_source, Bucket=bucket_name, Key=destination_key)
+    else:
+        # the transfer manager copies the content type and metadata over to the multipart upload
+        s3_client.copy(
+            CopySource=copy_source,
+            Bucket=bucket_name,
+            Key=destination_key,
+            Config=TransferConfig(
+                multipart_threshold=multipart_threshold,
+                multipart_chunksize=min(options.multipart_chunksize, MAX_COPY_OBJECT_BYTES),
+                max_concurrency=options.max_concurrency,
+            ),
+        )
+
+    if metadata_cache:
+        metadata_cache.invalidate(bucket_name, destination_key)
+    if metadata_index:
+        metadata_index.copy(bucket_name, source_key, destination_key)
+
+
+def move_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    options: CopyOptions = CopyOptions(),
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+) -> None:
+    """
+    Move an object within the S3 bucket by copying it and then deleting the source.
+
+    S3 has no rename, so the move is not atomic: until the source is deleted, both keys exist.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param source_key: Key of the object to move.
+    :param destination_key: New key of the object. An existing object at this key is overwritten.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param options: Thresholds and concurrency of multipart copies.
+    :param metadata_cache: Optional metadata cache in which to invalidate both keys.
+    :param metadata_index: Optional metadata index in which to record the move.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    copy_s3_object(
+        bucket_name,
+        source_key,
+        destination_key,
+        s3_client=s3_client,
+        options=options,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+    )
+    delete_s3_object(
+        bucket_name, source_key, s3_client=s3_client, metadata_cache=metadata_cache, metadata_index=metadata_index
+    )
+
+
+def copy_s3_objects_by_prefix(  # pylint: disable=too-many-arguments,too-many-locals
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    delete_source: bool = False,
+    max_concurrency: int = DEFAULT_COPY_MAX_CONCURRENCY,
+    options: CopyOptions = CopyOptions(),
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+    on_page_copied: Optional[Callable[[CopyObjectsResult], None]] = None,
+) -> CopyObjectsResult:
+    """
+    Copy, or move, every object under `source_prefix` to the same relative key under `destination_prefix`.
+
+    Objects are processed one `list_objects_v2` page (up to 1000 keys) at a time: the page's objects are
+    copied with up to `max_concurrency` copies in flight, then, when moving, the sources that were
+    copied successfully are removed with batched `delete_objects` calls. A source whose copy failed
+    is never deleted.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param source_prefix: Prefix of the keys to copy.
+    :param destination_prefix: Prefix that replaces `source_prefix` in the copies' keys. It must not
+        start with `source_prefix`, or the copies would be listed and copied again.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param delete_source: Delete each source object once it was copied, i.e. move the objects.
+    :param max_concurrency: Maximum number of objects copied at once.
+    :param options: Thresholds and concurrency of the multipart copy of each large object.
+    :param metadata_cache: Optional metadata cache in which to invalidate the affected objects.
+    :param metadata_index: Optional metadata index in which to record the copies and moves.
+    :param on_page_copied: Optional callback called with the outcome of each page, e.g. to report progress.
+
+    :return: The number of copied objects and the objects that could not be copied or deleted.
+    """
+    if destination_prefix.startswith(source_prefix):
+        raise ValueError("the destination must not be inside the source")
+
+    s3_client = s3_client or boto3.client("s3")
+
+    def copy(obj: dict) -> Optional[ObjectCopyError]:
+        source_key = obj["Key"]
+        try:
+            copy_s3_object(
+                bucket_name,
+                source_key,
+                destination_prefix + source_key.removeprefix(source_prefix),
+                s3_client=s3_client,
+                source_size=obj["Size"],
+                options=options,
+                metadata_cache=metadata_cache,
+                metadata_index=metadata_index,
+            )
+        except ClientError as err:
+            return ObjectCopyError(object_key=source_key, code=err.response["Error"]["Code"], message=str(err))
+        except BotoCoreError as err:
+            return ObjectCopyError(object_key=source_key, code=type(err).__name__, message=str(err))
+        return None
+
+    result = CopyObjectsResult()
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=source_prefix):
+        objects = page.get("Contents", [])
+        errors = [
+            error
+            for error in map_with_bounded_concurrency(copy, objects, max_concurrency, thread_name_prefix="s3-copy")
+            if error
+        ]
+        page_result = CopyObjectsResult(copied_count=len(objects) - len(errors), errors=errors)
+
+        if delete_source:
+            failed_keys = {error.object_key for error in errors}
+            delete_result = delete_s3_objects(
+                bucket_name,
+                (obj["Key"] for obj in objects if obj["Key"] not in failed_keys),
+                s3_client=s3_client,
+                metadata_cache=metadata_cache,
+                metadata_index=metadata_index,
+            )
+            page_result.errors.extend(
+                ObjectCopyError(object_key=error.object_key, code=error.code, message=error.message)
+                for error in delete_result.errors
+            )
+
+        result.add(page_result)
+        if on_page_copied:
+            on_page_copied(page_result)
+    return result
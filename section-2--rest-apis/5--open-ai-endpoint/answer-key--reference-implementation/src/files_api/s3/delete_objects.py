@@ -1,22 +1,235 @@
 """Functions for deleting objects from an S3 bucket--the "D" in CRUD."""
 
-from typing import Optional
+from dataclasses import (
+    dataclass,
+    field,
+)
+from itertools import islice
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
 
 import boto3
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+)
+
+from files_api.s3.concurrency import map_with_bounded_concurrency
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
 
 try:
     from mypy_boto3_s3 import S3Client
 except ImportError:
     ...
 
+# S3 DeleteObjects accepts at most this many keys per call
+DELETE_OBJECTS_MAX_KEYS = 1000
+DEFAULT_DELETE_MAX_CONCURRENCY = 8
+
+
+@dataclass(frozen=True)
+class ObjectDeleteError:
+    """An object that S3 failed to delete."""
+
+    object_key: str
+    code: str
+    message: str
+
 
-def delete_s3_object(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> None:
+@dataclass
+class DeleteObjectsResult:
+    """Outcome of a bulk delete."""
+
+    deleted_count: int = 0
+    errors: List[ObjectDeleteError] = field(default_factory=list)
+
+    def add(self, other: "DeleteObjectsResult") -> None:
+        """Merge the outcome of another batch into this one."""
+        self.deleted_count += other.deleted_count
+        self.errors.extend(other.errors)
+
+
+def delete_s3_object(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+) -> None:
     """
     Delete an object from the S3 bucket.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to delete.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the deleted object.
+    :param metadata_index: Optional metadata index from which to remove the deleted object.
     """
     s3_client = s3_client or boto3.client("s3")
     s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+    if metadata_cache:
+        metadata_cache.invalidate(bucket_name, object_key)
+    if metadata_index:
+        metadata_index.delete(bucket_name, object_key)
+
+
+def delete_s3_objects(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_keys: Iterable[str],
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_concurrency: int = DEFAULT_DELETE_MAX_CONCURRENCY,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+    on_batch_deleted: Optional[Callable[[DeleteObjectsResult], None]] = None,
+) -> DeleteObjectsResult:
+    """
+    Delete many objects from the S3 bucket with as few round trips as possible.
+
+    Keys are sent in batches of up to 1000 per `delete_objects` call, and up to `max_concurrency`
+    batches are in flight at once. Keys that do not exist count as deleted, like with `delete_s3_object`.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_keys: Keys of the objects to delete; consumed lazily, one batch at a time.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_concurrency: Maximum number of `delete_objects` calls in flight at once.
+    :param metadata_cache: Optional metadata cache in which to invalidate the deleted objects.
+    :param metadata_index: Optional metadata index from which to remove the deleted objects.
+    :param on_batch_deleted: Optional callback called with the outcome of each batch as soon as it completes,
+        e.g. to report progress.
+
+    :return: The number of deleted objects and the objects that could not be deleted.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    return _delete_batches_concurrently(
+        bucket_name,
+        batches=_batched(object_keys, DELETE_OBJECTS_MAX_KEYS),
+        s3_client=s3_client,
+        max_concurrency=max_concurrency,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+        on_batch_deleted=on_batch_deleted,
+    )
+
+
+def delete_s3_objects_by_prefix(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_concurrency: int = DEFAULT_DELETE_MAX_CONCURRENCY,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+    on_batch_deleted: Optional[Callable[[DeleteObjectsResult], None]] = None,
+) -> DeleteObjectsResult:
+    """
+    Delete every object whose key starts with `prefix`.
+
+    Each page of up to 1000 keys from `list_objects_v2` becomes one `delete_objects` batch, and listing
+    the next page overlaps with deleting the previous ones.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to delete. An empty prefix deletes every object in the bucket.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_concurrency: Maximum number of `delete_objects` calls in flight at once.
+    :param metadata_cache: Optional metadata cache in which to invalidate the deleted objects.
+    :param metadata_index: Optional metadata index from which to remove the deleted objects.
+    :param on_batch_deleted: Optional callback called with the outcome of each batch as soon as it completes,
+        e.g. to report progress.
+
+    :return: The number of deleted objects and the objects that could not be deleted.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    return _delete_batches_concurrently(
+        bucket_name,
+        batches=_iter_object_key_pages(bucket_name, prefix, s3_client=s3_client),
+        s3_client=s3_client,
+        max_concurrency=max_concurrency,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+        on_batch_deleted=on_batch_deleted,
+    )
+
+
+def _delete_batches_concurrently(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    *,
+    batches: Iterable[List[str]],
+    s3_client: "S3Client",
+    max_concurrency: int,
+    metadata_cache: Optional[ObjectMetadataCache],
+    metadata_index: Optional[ObjectMetadataIndex],
+    on_batch_deleted: Optional[Callable[[DeleteObjectsResult], None]],
+) -> DeleteObjectsResult:
+    """Delete each batch with one `delete_objects` call, pulling a new batch only when a worker is free."""
+    result = DeleteObjectsResult()
+    batch_results = map_with_bounded_concurrency(
+        lambda batch: _delete_batch(bucket_name, batch, s3_client, metadata_cache, metadata_index),
+        batches,
+        max_concurrency=max_concurrency,
+        thread_name_prefix="s3-delete",
+    )
+    for batch_result in batch_results:
+        result.add(batch_result)
+        if on_batch_deleted:
+            on_batch_deleted(batch_result)
+    return result
+
+
+def _delete_batch(
+    bucket_name: str,
+    object_keys: List[str],
+    s3_client: "S3Client",
+    metadata_cache: Optional[ObjectMetadataCache],
+    metadata_index: Optional[ObjectMetadataIndex],
+) -> DeleteObjectsResult:
+    """Delete up to 1000 objects with a single call, reporting failures per key instead of raising."""
+    try:
+        # quiet mode only lists the keys that failed, which keeps the response small
+        response = s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": object_key} for object_key in object_keys], "Quiet": True},
+        )
+    except ClientError as err:
+        errors = [
+            ObjectDeleteError(object_key=key, code=err.response["Error"]["Code"], message=str(err))
+            for key in object_keys
+        ]
+        return DeleteObjectsResult(errors=errors)
+    except BotoCoreError as err:
+        errors = [ObjectDeleteError(object_key=key, code=type(err).__name__, message=str(err)) for key in object_keys]
+        return DeleteObjectsResult(errors=errors)
+
+    if metadata_cache:
+        for object_key in object_keys:
+            metadata_cache.invalidate(bucket_name, object_key)
+
+    errors = [
+        ObjectDeleteError(object_key=error["Key"], code=error["Code"], message=error.get("Message", ""))
+        for error in response.get("Errors", [])
+    ]
+    if metadata_index:
+        failed_object_keys = {error.object_key for error in errors}
+        metadata_index.delete_many(bucket_name, (key for key in object_keys if key not in failed_object_keys))
+    return DeleteObjectsResult(deleted_count=len(object_keys) - len(errors), errors=errors)
+
+
+def _iter_object_key_pages(bucket_name: str, prefix: str, s3_client: "S3Client") -> Iterator[List[str]]:
+    """Yield the keys under `prefix` one `list_objects_v2` page at a time."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, PaginationConfig={"PageSize": 1000}):
+        object_keys = [obj["Key"] for obj in page.get("Contents", [])]
+        if object_keys:
+            yield object_keys
+
+
+def _batched(items: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -0,0 +1,177 @@
+"""In-process cache of S3 object metadata so that hot keys don't cost a HeadObject call on every request."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+)
+
+from botocore.exceptions import ClientError
+
+from files_api.s3.codecs import (
+    UNCOMPRESSED_SIZE_METADATA_KEY,
+    get_uncompressed_size,
+)
+
+try:
+    from mypy_boto3_s3.type_defs import HeadObjectOutputTypeDef
+except ImportError:
+    ...
+
+
+@dataclass(frozen=True)
+class CachedObjectMetadata:
+    """The subset of an S3 object's metadata that the API serves."""
+
+    content_length: int
+    content_type: str
+    etag: str
+    last_modified: datetime
+    content_encoding: Optional[str] = None
+    """The codec the object is stored compressed with, see `files_api.s3.codecs`, if any."""
+    uncompressed_size: Optional[int] = None
+    """The size of an object stored compressed before it was compressed, if recorded."""
+
+    def to_head_object_response(self) -> "HeadObjectOutputTypeDef":
+        """Return the metadata in the same shape as a boto3 `head_object` response."""
+        return {  # type: ignore[typeddict-item]
+            "ContentLength": self.content_length,
+            "ContentType": self.content_type,
+            "ETag": self.etag,
+            "LastModified": self.last_modified,
+            **({"ContentEncoding": self.content_encoding} if self.content_encoding else {}),
+            **(
+                {"Metadata": {UNCOMPRESSED_SIZE_METADATA_KEY: str(self.uncompressed_size)}}
+                if self.uncompressed_size is not None
+                else {}
+            ),
+        }
+
+    def is_not_modified(
+        self, if_none_match: Optional[str] = None, if_modified_since: Optional[datetime] = None
+    ) -> bool:
+        """Evaluate `If-None-Match`/`If-Modified-Since` preconditions the same way S3 does."""
+        if if_none_match:
+            etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+            return "*" in etags or self.etag in etags
+        if if_modified_since:
+            # HTTP dates have a resolution of one second
+            return self.last_modified.replace(microsecond=0) <= if_modified_since
+        return False
+
+    def not_modified_error(self, operation_name: str) -> ClientError:
+        """Build the same error that S3 raises when a conditional request finds the object unchanged."""
+        return ClientError(
+            error_response={
+                "Error": {"Code": "304", "Message": "Not Modified"},
+                "ResponseMetadata": {
+                    "HTTPStatusCode": 304,
+                    "HTTPHeaders": {
+                        "etag": self.etag,
+                        "last-modified": self.last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                    },
+                },
+            },
+            operation_name=operation_name,
+        )
+
+    @classmethod
+    def from_s3_response(cls, response) -> "CachedObjectMetadata":
+        """Extract the cached fields from a `head_object` or (non-ranged) `get_object` response."""
+        return cls(
+            content_length=response["ContentLength"],
+            content_type=response["ContentType"],
+            etag=response["ETag"],
+            last_modified=response["LastModified"],
+            content_encoding=response.get("ContentEncoding"),
+            uncompressed_size=get_uncompressed_size(response) if response.get("ContentEncoding") else None,
+        )
+
+
+@dataclass
+class MetadataCacheStats:
+    """Counters describing how effective the cache has been since it was created."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+
+
+class ObjectMetadataCache:
+    """
+    Thread-safe, size-bounded LRU cache of object metadata whose entries expire after a TTL.
+
+    Writes and deletes made through `files_api.s3` invalidate the affected key, so a process always
+    sees its own changes. Changes made by other processes become visible within `ttl_seconds`.
+
+    :param max_entries: Maximum number of objects to cache; the least recently used entry is evicted beyond that.
+    :param ttl_seconds: Seconds that an entry is trusted after it was fetched from S3.
+    :param clock: Monotonic clock used to expire entries; overridable for tests.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, CachedObjectMetadata]]" = OrderedDict()
+        self._stats = MetadataCacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedObjectMetadata]:
+        """Return the cached metadata of an object, or None if it is not cached or has expired."""
+        cache_key = (bucket_name, object_key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[cache_key]
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self._stats.hits += 1
+            return entry[1]
+
+    def put(self, bucket_name: str, object_key: str, metadata: CachedObjectMetadata) -> None:
+        """Cache the metadata of an object that was just read from S3."""
+        cache_key = (bucket_name, object_key)
+        with self._lock:
+            self._entries[cache_key] = (self._clock() + self.ttl_seconds, metadata)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, bucket_name: str, object_key: str) -> None:
+        """Forget an object, e.g. because it was just overwritten or deleted."""
+        with self._lock:
+            if self._entries.pop((bucket_name, object_key), None) is not None:
+                self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        """Forget every cached object."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> MetadataCacheStats:
+        """Return a snapshot of the cache's counters."""
+        with self._lock:
+            return MetadataCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                invalidations=self._stats.invalidations,
+                entries=len(self._entries),
+            )
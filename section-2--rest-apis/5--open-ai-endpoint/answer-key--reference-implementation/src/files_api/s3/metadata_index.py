@@ -0,0 +1,586 @@
+"""
+Local SQLite index of S3 object metadata, for searching, filtering and sorting files without listing the bucket.
+
+The index also keeps a rollup of the number, total size and last-modified range of the objects under
+every "directory", i.e. every prefix of a key that ends with `/`, so the stats of a directory are a
+single row lookup however many objects it holds. The rollup is maintained by triggers on the table of
+objects, so every write to the index, whether from the hooks of `files_api.s3` or from a crawl, updates it.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import (
+    datetime,
+    timezone,
+)
+from itertools import islice
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Union,
+)
+
+import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.concurrency import map_with_bounded_concurrency
+from files_api.s3.parallel_listing import (
+    DEFAULT_LIST_MAX_CONCURRENCY,
+    iter_s3_objects_in_parallel,
+)
+from files_api.s3.read_objects import (
+    DEFAULT_MAX_KEYS,
+    fetch_s3_object_metadata,
+    is_object_not_found_error,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        HeadObjectOutputTypeDef,
+        ObjectTypeDef,
+    )
+except ImportError:
+    ...
+
+SortBy = Literal["key", "size", "last_modified"]
+
+# bumped when a change to the schema requires rebuilding derived tables of existing database files
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_modified REAL NOT NULL,
+    etag TEXT,
+    content_type TEXT,
+    indexed_at REAL NOT NULL,
+    PRIMARY KEY (bucket, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_by_size ON objects (bucket, size, key);
+CREATE INDEX IF NOT EXISTS objects_by_last_modified ON objects (bucket, last_modified, key);
+CREATE INDEX IF NOT EXISTS objects_by_content_type ON objects (bucket, content_type, key);
+
+-- `range_is_stale` is set when the oldest or newest object of a prefix is deleted or changed,
+-- and the range is then recomputed by the next read of the prefix's stats rather than on every write
+CREATE TABLE IF NOT EXISTS prefix_stats (
+    bucket TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    object_count INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    min_last_modified REAL NOT NULL,
+    max_last_modified REAL NOT NULL,
+    range_is_stale INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, prefix)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS objects_inserted AFTER INSERT ON objects BEGIN
+    INSERT INTO prefix_stats (bucket, prefix, object_count, total_size, min_last_modified, max_last_modified)
+    SELECT NEW.bucket, value, 1, NEW.size, NEW.last_modified, NEW.last_modified
+    FROM json_each(ancestor_prefixes(NEW.key)) WHERE true
+    ON CONFLICT (bucket, prefix) DO UPDATE SET
+        object_count = object_count + 1,
+        total_size = total_size + excluded.total_size,
+        min_last_modified = min(min_last_modified, excluded.min_last_modified),
+        max_last_modified = max(max_last_modified, excluded.max_last_modified);
+END;
+
+-- a crawl upserts every object it lists, most of them unchanged, which mustn't touch the stats of all their prefixes;
+-- dropped first so that database files created before the WHEN clause existed get it too
+DROP TRIGGER IF EXISTS objects_updated;
+CREATE TRIGGER objects_updated AFTER UPDATE OF size, last_modified ON objects
+WHEN OLD.size IS NOT NEW.size OR OLD.last_modified IS NOT NEW.last_modified BEGIN
+    UPDATE prefix_stats SET
+        total_size = total_size - OLD.size + NEW.size,
+        min_last_modified = min(min_last_modified, NEW.last_modified),
+        max_last_modified = max(max_last_modified, NEW.last_modified),
+        range_is_stale = range_is_stale
+            OR (OLD.last_modified <= min_last_modified AND NEW.last_modified > OLD.last_modified)
+            OR (OLD.last_modified >= max_last_modified AND NEW.last_modified < OLD.last_modified)
+    WHERE bucket = NEW.bucket AND prefix IN (SELECT value FROM json_each(ancestor_prefixes(NEW.key)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS objects_deleted AFTER DELETE ON objects BEGIN
+    UPDATE prefix_stats SET
+        object_count = object_count - 1,
+        total_size = total_size - OLD.size,
+        range_is_stale = range_is_stale
+            OR OLD.last_modified <= min_last_modified
+            OR OLD.last_modified >= max_last_modified
+    WHERE bucket = OLD.bucket AND prefix IN (SELECT value FROM json_each(ancestor_prefixes(OLD.key)));
+    DELETE FROM prefix_stats
+    WHERE bucket = OLD.bucket AND object_count = 0
+        AND prefix IN (SELECT value FROM json_each(ancestor_prefixes(OLD.key)));
+END;
+"""
+
+_REBUILD_PREFIX_STATS = """
+INSERT INTO prefix_stats (bucket, prefix, object_count, total_size, min_last_modified, max_last_modified)
+SELECT objects.bucket, prefixes.value, COUNT(*), SUM(objects.size), MIN(objects.last_modified), MAX(objects.last_modified)
+FROM objects, json_each(ancestor_prefixes(objects.key)) AS prefixes
+GROUP BY objects.bucket, prefixes.value
+"""
+
+_UPSERT = """
+INSERT INTO objects (bucket, key, size, last_modified, etag, content_type, indexed_at)
+VALUES (:bucket, :key, :size, :last_modified, :etag, :content_type, :indexed_at)
+ON CONFLICT (bucket, key) DO UPDATE SET
+    size = excluded.size,
+    last_modified = excluded.last_modified,
+    etag = excluded.etag,
+    content_type = excluded.content_type,
+    indexed_at = excluded.indexed_at
+"""
+
+_COLUMN_NAMES = ["key", "size", "last_modified", "etag", "content_type"]
+_COLUMNS = ", ".join(_COLUMN_NAMES)
+# a range on the primary key rather than LIKE, which SQLite can't always serve from the index
+_PREFIX_CONDITION = "key >= ? AND key < ?"
+
+
+@dataclass(frozen=True)
+class IndexedObject:
+    """Metadata of one object, as stored in the index."""
+
+    key: str
+    size: int
+    last_modified: datetime
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+    """None for objects found by a crawl whose content type was not fetched."""
+
+    @classmethod
+    def from_s3_object(cls, obj: "ObjectTypeDef", content_type: Optional[str] = None) -> "IndexedObject":
+        """Build the entry of an object returned by `list_objects_v2`, which doesn't include its content type."""
+        return cls(
+            key=obj["Key"],
+            size=obj["Size"],
+            last_modified=obj["LastModified"],
+            etag=obj.get("ETag"),
+            content_type=content_type,
+        )
+
+    @classmethod
+    def from_head_object_response(cls, object_key: str, response: "HeadObjectOutputTypeDef") -> "IndexedObject":
+        """Build the entry of an object from its `head_object` response."""
+        return cls(
+            key=object_key,
+            size=response["ContentLength"],
+            last_modified=response["LastModified"],
+            etag=response.get("ETag"),
+            content_type=response.get("ContentType"),
+        )
+
+    @classmethod
+    def just_written(
+        cls, object_key: str, body: Union[bytes, IO[bytes]], content_type: str
+    ) -> Optional["IndexedObject"]:
+        """Build the entry of an object about to be uploaded, or return None if the size of `body` can't be told."""
+        size = get_body_size(body)
+        if size is None:
+            return None
+        return cls(
+            key=object_key,
+            size=size,
+            last_modified=datetime.now(timezone.utc),
+            content_type=content_type,
+        )
+
+
+@dataclass(frozen=True)
+class IndexQuery:  # pylint: disable=too-many-instance-attributes
+    """Filters, sort order and page of a search of the index. Filters left as None match every object."""
+
+    prefix: str = ""
+    key_contains: Optional[str] = None
+    content_type: Optional[str] = None
+    """Exact content type, e.g. `text/csv`, or a type followed by `/*`, e.g. `image/*`."""
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    modified_after: Optional[datetime] = None
+    modified_before: Optional[datetime] = None
+    sort_by: SortBy = "key"
+    descending: bool = False
+    limit: int = 100
+    page_token: Optional[str] = None
+    """`next_page_token` of the previous page of the same query."""
+
+
+@dataclass(frozen=True)
+class PrefixStats:
+    """Number, total size and last-modified range of the objects under a prefix."""
+
+    prefix: str
+    object_count: int
+    total_size: int
+    first_modified: Optional[datetime]
+    """Last-modified time of the object modified longest ago, None if there are no objects."""
+    last_modified: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class IndexPage:
+    """One page of search results."""
+
+    objects: List[IndexedObject]
+    next_page_token: Optional[str]
+
+
+class ObjectMetadataIndex:
+    """
+    Thread-safe SQLite table of object metadata, indexed for filtering and sorting by key, size, date and type.
+
+    The index is kept current by passing it to the functions of `files_api.s3` that write and delete
+    objects, and is reconciled with the bucket by `reconcile_metadata_index`, which also picks up
+    changes made by other processes. Between crawls, it may miss those changes.
+
+    Pages are fetched with keyset pagination, so each page costs one index range scan however deep it is.
+
+    :param path: Path of the SQLite database file, or `:memory:` for an index that lives as long as the process.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.create_function("ancestor_prefixes", 1, _ancestor_prefixes, deterministic=True)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection.executescript(_SCHEMA)
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                self._rebuild_prefix_stats()
+                self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def put(self, bucket_name: str, obj: IndexedObject) -> None:
+        """Add or replace the entry of an object that was just written."""
+        self.put_many(bucket_name, [obj])
+
+    def put_many(
+        self, bucket_name: str, objects: Iterable[IndexedObject], *, unless_indexed_after: Optional[float] = None
+    ) -> None:
+        """
+        Add or replace the entries of many objects in one transaction.
+
+        :param unless_indexed_after: Optional `time.time()` timestamp; entries indexed later than that are kept,
+            so that a crawl doesn't overwrite writes made while it ran with what it listed before them.
+        """
+        indexed_at = time.time()
+        statement = _UPSERT if unless_indexed_after is None else f"{_UPSERT} WHERE objects.indexed_at <= :unless_after"
+        rows = [{**_to_row(bucket_name, obj, indexed_at), "unless_after": unless_indexed_after} for obj in objects]
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(statement, rows)
+
+    def copy(self, bucket_name: str, source_key: str, destination_key: str) -> None:
+        """Index a server-side copy of an object, if the source is indexed."""
+        now = time.time()
+        with self._lock:
+            with self._connection:
+                # an upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the rollup's trigger
+                self._connection.execute(
+                    f"""
+                    INSERT INTO objects
+                    SELECT bucket, ?, size, ?, etag, content_type, ? FROM objects WHERE bucket = ? AND key = ?
+                    {_UPSERT[_UPSERT.index("ON CONFLICT"):]}
+                    """,
+                    (destination_key, now, now, bucket_name, source_key),
+                )
+
+    def delete(self, bucket_name: str, object_key: str) -> None:
+        """Remove the entry of an object that was just deleted or whose new metadata is unknown."""
+        self.delete_many(bucket_name, [object_key])
+
+    def delete_many(self, bucket_name: str, object_keys: Iterable[str]) -> None:
+        """Remove the entries of many objects in one transaction."""
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "DELETE FROM objects WHERE bucket = ? AND key = ?",
+                    ((bucket_name, object_key) for object_key in object_keys),
+                )
+
+    def delete_not_indexed_since(self, bucket_name: str, prefix: str, indexed_since: float) -> int:
+        """Remove the entries under `prefix` that weren't written since `indexed_since`, and return how many."""
+        with self._lock:
+            with self._connection:
+                cursor = self._connection.execute(
+                    f"DELETE FROM objects WHERE bucket = ? AND {_PREFIX_CONDITION} AND indexed_at < ?",
+                    (bucket_name, prefix, _prefix_upper_bound(prefix), indexed_since),
+                )
+        return cursor.rowcount
+
+    def get_many(self, bucket_name: str, object_keys: List[str]) -> Dict[str, IndexedObject]:
+        """Return the entries of the given objects that are in the index, by key."""
+        entries: Dict[str, IndexedObject] = {}
+        with self._lock:
+            # SQLite limits the number of parameters of a statement
+            for start in range(0, len(object_keys), 500):
+                keys = object_keys[slice(start, start + 500)]
+                rows = self._connection.execute(
+                    f"SELECT {_COLUMNS} FROM objects WHERE bucket = ? AND key IN ({', '.join('?' * len(keys))})",
+                    (bucket_name, *keys),
+                ).fetchall()
+                entries.update((row[0], _from_row(row)) for row in rows)
+        return entries
+
+    def search(self, bucket_name: str, query: IndexQuery) -> IndexPage:  # pylint: disable=too-many-locals
+        """
+        Return one page of the objects that match `query`, in its sort order, with ties broken by key.
+
+        :raises ValueError: If `query.page_token` is not a token returned by this method.
+        """
+        sort_column = query.sort_by
+        conditions = ["bucket = ?", _PREFIX_CONDITION]
+        params: list = [bucket_name, query.prefix, _prefix_upper_bound(query.prefix)]
+        if query.key_contains:
+            conditions.append("instr(key, ?) > 0")
+            params.append(query.key_contains)
+        if query.content_type and query.content_type.endswith("/*"):
+            conditions.append("content_type >= ? AND content_type < ?")
+            type_prefix = query.content_type.removesuffix("*")
+            params.extend([type_prefix, _prefix_upper_bound(type_prefix)])
+        elif query.content_type:
+            conditions.append("content_type = ?")
+            params.append(query.content_type)
+        for condition, value in [
+            ("size >= ?", query.min_size),
+            ("size <= ?", query.max_size),
+            ("last_modified >= ?", query.modified_after and query.modified_after.timestamp()),
+            ("last_modified < ?", query.modified_before and query.modified_before.timestamp()),
+        ]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if query.page_token:
+            last_sort_value, last_key = _decode_page_token(query.page_token)
+            conditions.append(f"({sort_column}, key) {'<' if query.descending else '>'} (?, ?)")
+            params.extend([last_sort_value, last_key])
+
+        order = "DESC" if query.descending else "ASC"
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM objects WHERE {' AND '.join(conditions)} "
+                f"ORDER BY {sort_column} {order}, key {order} LIMIT ?",
+                (*params, query.limit + 1),
+            ).fetchall()
+
+        objects = [_from_row(row) for row in islice(rows, query.limit)]
+        next_page_token = None
+        if len(rows) > query.limit:
+            last_row = rows[query.limit - 1]
+            next_page_token = _encode_page_token(last_row[_COLUMN_NAMES.index(sort_column)], last_row[0])
+        return IndexPage(objects=objects, next_page_token=next_page_token)
+
+    def get_prefix_stats(self, bucket_name: str, prefix: str) -> PrefixStats:
+        """
+        Return the number, total size and last-modified range of the indexed objects under a prefix.
+
+        This reads one row of the rollup, unless the oldest or newest object under `prefix` was deleted or
+        changed since the range was last computed, in which case the range is recomputed from the index once.
+
+        :param prefix: The empty prefix, for the whole bucket, or a prefix that ends with `/`, e.g. `path/to/`.
+        :raises ValueError: If `prefix` doesn't end with `/`, since the rollup only has directories.
+        """
+        if prefix and not prefix.endswith("/"):
+            raise ValueError("The stats of a prefix are only kept for directories, i.e. prefixes that end with '/'")
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT object_count, total_size, min_last_modified, max_last_modified, range_is_stale
+                FROM prefix_stats WHERE bucket = ? AND prefix = ?
+                """,
+                (bucket_name, prefix),
+            ).fetchone()
+            if row is None:
+                return PrefixStats(
+                    prefix=prefix, object_count=0, total_size=0, first_modified=None, last_modified=None
+                )
+            object_count, total_size, min_last_modified, max_last_modified, range_is_stale = row
+            if range_is_stale:
+                with self._connection:
+                    min_last_modified, max_last_modified = self._connection.execute(
+                        f"SELECT MIN(last_modified), MAX(last_modified) FROM objects "
+                        f"WHERE bucket = ? AND {_PREFIX_CONDITION}",
+                        (bucket_name, prefix, _prefix_upper_bound(prefix)),
+                    ).fetchone()
+                    self._connection.execute(
+                        """
+                        UPDATE prefix_stats SET min_last_modified = ?, max_last_modified = ?, range_is_stale = 0
+                        WHERE bucket = ? AND prefix = ?
+                        """,
+                        (min_last_modified, max_last_modified, bucket_name, prefix),
+                    )
+        return PrefixStats(
+            prefix=prefix,
+            object_count=object_count,
+            total_size=total_size,
+            first_modified=datetime.fromtimestamp(min_last_modified, tz=timezone.utc),
+            last_modified=datetime.fromtimestamp(max_last_modified, tz=timezone.utc),
+        )
+
+    def rebuild_prefix_stats(self) -> None:
+        """Recompute the rollup of every prefix from the indexed objects, e.g. if it's thought to have drifted."""
+        with self._lock:
+            self._rebuild_prefix_stats()
+
+    def _rebuild_prefix_stats(self) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM prefix_stats")
+            self._connection.execute(_REBUILD_PREFIX_STATS)
+
+    def close(self) -> None:
+        """Close the database. Entries of an in-memory index are lost."""
+        with self._lock:
+            self._connection.close()
+
+
+@dataclass(frozen=True)
+class ReconcileResult:
+    """Outcome of reconciling the index with a bucket."""
+
+    indexed_count: int
+    removed_count: int
+
+
+def reconcile_metadata_index(  # pylint: disable=too-many-arguments,too-many-locals
+    bucket_name: str,
+    metadata_index: ObjectMetadataIndex,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    fetch_content_types: bool = True,
+    max_concurrency: int = DEFAULT_LIST_MAX_CONCURRENCY,
+    on_page_indexed: Optional[Callable[[int], None]] = None,
+) -> ReconcileResult:
+    """
+    Crawl every object under `prefix` and make the index match it.
+
+    Objects are listed with `iter_s3_objects_in_parallel` and indexed a page at a time. Entries of
+    objects that no longer exist are removed at the end. Entries written by the hooks while the crawl
+    runs are newer than what it listed, so they are left alone.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param metadata_index: The index to reconcile.
+    :param prefix: Prefix of the keys to crawl. An empty prefix crawls the whole bucket.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param fetch_content_types: Call `head_object` for the objects that are new or changed since they were
+        indexed, since listings don't include content types. Otherwise their content type is left unknown.
+    :param max_concurrency: Maximum number of `list_objects_v2` and `head_object` calls in flight at once.
+    :param on_page_indexed: Optional callback called with the number of objects of each page once it's indexed,
+        e.g. to report progress.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    started_at = time.time()
+    indexed_count = 0
+    objects = iter_s3_objects_in_parallel(bucket_name, prefix, s3_client=s3_client, max_concurrency=max_concurrency)
+    while page := list(islice(objects, DEFAULT_MAX_KEYS)):
+        known_objects = metadata_index.get_many(bucket_name, [obj["Key"] for obj in page])
+        indexed_objects: List[IndexedObject] = []
+        changed_object_keys: List[str] = []
+        for obj in page:
+            known_object = known_objects.get(obj["Key"])
+            if known_object and known_object.etag == obj.get("ETag") and known_object.content_type:
+                indexed_objects.append(IndexedObject.from_s3_object(obj, content_type=known_object.content_type))
+            elif fetch_content_types:
+                changed_object_keys.append(obj["Key"])
+            else:
+                indexed_objects.append(IndexedObject.from_s3_object(obj))
+
+        def head(object_key: str) -> Optional[IndexedObject]:
+            try:
+                response = fetch_s3_object_metadata(bucket_name, object_key, s3_client=s3_client)
+            except ClientError as err:
+                # deleted since it was listed
+                if is_object_not_found_error(err):
+                    return None
+                raise
+            return IndexedObject.from_head_object_response(object_key, response)
+
+        for indexed_object in map_with_bounded_concurrency(head, changed_object_keys, max_concurrency, "s3-index"):
+            if indexed_object:
+                indexed_objects.append(indexed_object)
+        metadata_index.put_many(bucket_name, indexed_objects, unless_indexed_after=started_at)
+        indexed_count += len(page)
+        if on_page_indexed:
+            on_page_indexed(len(page))
+
+    removed_count = metadata_index.delete_not_indexed_since(bucket_name, prefix, indexed_since=started_at)
+    return ReconcileResult(indexed_count=indexed_count, removed_count=removed_count)
+
+
+def get_body_size(body: Union[bytes, IO[bytes]]) -> Optional[int]:
+    """Return the number of bytes left to read in `body`, or None if it's a stream that can't be seeked."""
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    try:
+        position = body.tell()
+        end = body.seek(0, os.SEEK_END)
+        body.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+def _ancestor_prefixes(key: str) -> str:
+    """
+    Return the JSON array of the directories that contain `key`, for the rollup's triggers.
+
+    E.g. `["", "a/", "a/b/"]` for `a/b/c.txt`, where the empty prefix stands for the whole bucket.
+    """
+    prefixes = [""]
+    for directory_name in key.split("/")[slice(0, -1)]:
+        prefixes.append(f"{prefixes[-1]}{directory_name}/")
+    return json.dumps(prefixes)
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Return the smallest string greater than every string that starts with `prefix`."""
+    return f"{prefix}\U0010ffff"
+
+
+def _to_row(bucket_name: str, obj: IndexedObject, indexed_at: float) -> dict:
+    return {
+        "bucket": bucket_name,
+        "key": obj.key,
+        "size": obj.size,
+        "last_modified": obj.last_modified.timestamp(),
+        "etag": obj.etag,
+        "content_type": obj.content_type,
+        "indexed_at": indexed_at,
+    }
+
+
+def _from_row(row: tuple) -> IndexedObject:
+    key, size, last_modified, etag, content_type = row
+    return IndexedObject(
+        key=key,
+        size=size,
+        last_modified=datetime.fromtimestamp(last_modified, tz=timezone.utc),
+        etag=etag,
+        content_type=content_type,
+    )
+
+
+def _encode_page_token(last_sort_value: Union[str, int, float], last_key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([last_sort_value, last_key]).encode()).decode()
+
+
+def _decode_page_token(page_token: str) -> list:
+    try:
+        last_sort_value, last_key = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+    except (ValueError, TypeError) as err:
+        raise ValueError("Invalid page token") from err
+    return [last_sort_value, last_key]
@@ -0,0 +1,276 @@
+"""List every object under a prefix with many `list_objects_v2` calls in parallel, one per sub-prefix."""
+
+import heapq
+import queue
+import threading
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import boto3
+
+from files_api.s3.concurrency import map_with_bounded_concurrency
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import ObjectTypeDef
+except ImportError:
+    ...
+
+DEFAULT_LIST_MAX_CONCURRENCY = 8
+DEFAULT_MAX_SHARD_DEPTH = 2
+# pages of up to 1000 keys that each shard may list ahead of the caller, which bounds memory
+MAX_BUFFERED_PAGES_PER_SHARD = 4
+
+_END_OF_SHARD = object()
+
+
+@dataclass(frozen=True)
+class ListingShards:
+    """How the keys under a prefix are split between `list_objects_v2` calls that can run in parallel."""
+
+    prefixes: List[str]
+    """Sub-prefixes, in key order, whose keys are listed recursively, each by its own sequence of calls."""
+    objects: List["ObjectTypeDef"]
+    """Objects found while discovering the sub-prefixes, in key order; they are in none of `prefixes`."""
+
+
+@dataclass(frozen=True)
+class ObjectCount:
+    """Number and total size of the objects under a prefix."""
+
+    count: int
+    total_size: int
+
+
+def discover_listing_shards(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    min_shards: int = DEFAULT_LIST_MAX_CONCURRENCY,
+    max_depth: int = DEFAULT_MAX_SHARD_DEPTH,
+    delimiter: str = "/",
+    max_concurrency: int = DEFAULT_LIST_MAX_CONCURRENCY,
+) -> ListingShards:
+    """
+    Split the keys under `prefix` into disjoint sub-prefixes, one "directory" level at a time.
+
+    Each level is listed with `Delimiter`, which returns the level's sub-prefixes as `CommonPrefixes`
+    instead of every key below them. Levels are descended until there are at least `min_shards`
+    sub-prefixes or `max_depth` levels were listed. Keys without a further delimiter, i.e. the files
+    directly inside the listed levels, are returned as they are found. Descending costs one call per
+    sub-prefix: a sub-prefix with more than 1000 direct entries is kept whole instead, so a prefix of
+    many files and few sub-prefixes gains little from parallel listing.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to split.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param min_shards: Number of sub-prefixes after which no further level is listed.
+    :param max_depth: Maximum number of levels to list.
+    :param delimiter: Character that separates the levels of keys.
+    :param max_concurrency: Maximum number of levels listed at once.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    prefixes = [prefix]
+    objects: List["ObjectTypeDef"] = []
+    for _ in range(max_depth):
+        if len(prefixes) >= min_shards:
+            break
+
+        def descend(level_prefix: str) -> Tuple[List["ObjectTypeDef"], List[str]]:
+            level = _list_level(bucket_name, level_prefix, delimiter, s3_client)
+            # a level with over a page of entries is listed as a whole rather than read sequentially here
+            return level if level is not None else ([], [level_prefix])
+
+        levels = list(map_with_bounded_concurrency(descend, prefixes, max_concurrency, thread_name_prefix="s3-list"))
+        prefixes = sorted(sub_prefix for _, sub_prefixes in levels for sub_prefix in sub_prefixes)
+        objects.extend(obj for level_objects, _ in levels for obj in level_objects)
+    objects.sort(key=lambda obj: obj["Key"])
+    return ListingShards(prefixes=prefixes, objects=objects)
+
+
+def iter_s3_objects_in_parallel(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_concurrency: int = DEFAULT_LIST_MAX_CONCURRENCY,
+    max_shard_depth: int = DEFAULT_MAX_SHARD_DEPTH,
+    delimiter: str = "/",
+) -> Iterator["ObjectTypeDef"]:
+    """
+    Yield every object under `prefix` in key order, like paginating `list_objects_v2`, but faster for large prefixes.
+
+    The keys are split into sub-prefixes with `discover_listing_shards`, and up to `max_concurrency`
+    sub-prefixes are listed at once, each a few pages ahead of the caller. The keys under a sub-prefix
+    are contiguous in key order, so the shards are yielded one after the other, merged with the
+    objects found during discovery.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to list.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_concurrency: Maximum number of `list_objects_v2` calls in flight at once.
+    :param max_shard_depth: Maximum number of levels listed to discover the sub-prefixes.
+    :param delimiter: Character that separates the levels of keys.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    shards = discover_listing_shards(
+        bucket_name,
+        prefix,
+        s3_client=s3_client,
+        min_shards=max_concurrency,
+        max_depth=max_shard_depth,
+        delimiter=delimiter,
+        max_concurrency=max_concurrency,
+    )
+    yield from heapq.merge(
+        shards.objects,
+        _iter_shards_in_order(bucket_name, shards.prefixes, s3_client, max_concurrency),
+        key=lambda obj: obj["Key"],
+    )
+
+
+def list_s3_objects_in_parallel(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_objects: Optional[int] = None,
+    max_concurrency: int = DEFAULT_LIST_MAX_CONCURRENCY,
+) -> List["ObjectTypeDef"]:
+    """
+    Return the first `max_objects` objects under `prefix` in key order, or all of them, using `iter_s3_objects_in_parallel`.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to list.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_objects: Maximum number of objects to return. Listing stops once that many were found.
+    :param max_concurrency: Maximum number of `list_objects_v2` calls in flight at once.
+    """
+    objects = iter_s3_objects_in_parallel(bucket_name, prefix, s3_client=s3_client, max_concurrency=max_concurrency)
+    return list(islice(objects, max_objects))
+
+
+def count_s3_objects_in_parallel(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_concurrency: int = DEFAULT_LIST_MAX_CONCURRENCY,
+    max_shard_depth: int = DEFAULT_MAX_SHARD_DEPTH,
+    delimiter: str = "/",
+) -> ObjectCount:
+    """
+    Count the objects under `prefix` and add up their sizes, listing up to `max_concurrency` sub-prefixes at once.
+
+    Unlike `iter_s3_objects_in_parallel`, the shards are not read in key order, so none waits for another.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to count.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_concurrency: Maximum number of `list_objects_v2` calls in flight at once.
+    :param max_shard_depth: Maximum number of levels listed to discover the sub-prefixes.
+    :param delimiter: Character that separates the levels of keys.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    shards = discover_listing_shards(
+        bucket_name,
+        prefix,
+        s3_client=s3_client,
+        min_shards=max_concurrency,
+        max_depth=max_shard_depth,
+        delimiter=delimiter,
+        max_concurrency=max_concurrency,
+    )
+
+    def count_shard(shard_prefix: str) -> ObjectCount:
+        count = total_size = 0
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=shard_prefix):
+            for obj in page.get("Contents", []):
+                count += 1
+                total_size += obj["Size"]
+        return ObjectCount(count=count, total_size=total_size)
+
+    count = len(shards.objects)
+    total_size = sum(obj["Size"] for obj in shards.objects)
+    for shard_count in map_with_bounded_concurrency(count_shard, shards.prefixes, max_concurrency, "s3-list"):
+        count += shard_count.count
+        total_size += shard_count.total_size
+    return ObjectCount(count=count, total_size=total_size)
+
+
+def _list_level(
+    bucket_name: str, prefix: str, delimiter: str, s3_client: "S3Client"
+) -> Optional[Tuple[List["ObjectTypeDef"], List[str]]]:
+    """Return the objects directly under `prefix` and its sub-prefixes, or None if they don't fit in one page."""
+    response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter=delimiter)
+    if response.get("IsTruncated"):
+        return None
+    sub_prefixes = [common_prefix["Prefix"] for common_prefix in response.get("CommonPrefixes", [])]
+    return response.get("Contents", []), sub_prefixes
+
+
+def _iter_shards_in_order(
+    bucket_name: str, prefixes: List[str], s3_client: "S3Client", max_concurrency: int
+) -> Iterator["ObjectTypeDef"]:
+    """Yield the objects of each shard in turn, while the next shards are already being listed."""
+    stop = threading.Event()
+    pending_prefixes = iter(prefixes)
+    in_flight: Deque[Tuple["queue.Queue", Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-list") as executor:
+
+        def start_next_shard() -> None:
+            shard_prefix = next(pending_prefixes, None)
+            if shard_prefix is not None:
+                pages: "queue.Queue" = queue.Queue(maxsize=MAX_BUFFERED_PAGES_PER_SHARD)
+                future = executor.submit(_list_shard, bucket_name, shard_prefix, s3_client, pages, stop)
+                in_flight.append((pages, future))
+
+        try:
+            for _ in range(max_concurrency):
+                start_next_shard()
+            while in_flight:
+                pages, future = in_flight.popleft()
+                while (page := pages.get()) is not _END_OF_SHARD:
+                    yield from page
+                # re-raise the error that ended the shard early, if any
+                future.result()
+                start_next_shard()
+        finally:
+            # unblock the shards listing ahead if the caller stops early
+            stop.set()
+
+
+def _list_shard(
+    bucket_name: str, prefix: str, s3_client: "S3Client", pages: "queue.Queue", stop: threading.Event
+) -> None:
+    try:
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            if not _put_unless_stopped(pages, page.get("Contents", []), stop):
+                return
+    finally:
+        _put_unless_stopped(pages, _END_OF_SHARD, stop)
+
+
+def _put_unless_stopped(pages: "queue.Queue", item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
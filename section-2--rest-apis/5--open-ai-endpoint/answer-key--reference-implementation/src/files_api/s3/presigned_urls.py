@@ -0,0 +1,211 @@
+"""Presigned URLs that let clients transfer file content to and from S3 directly, bypassing the API."""
+
+import math
+from dataclasses import dataclass
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+import boto3
+
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import (
+    IndexedObject,
+    ObjectMetadataIndex,
+)
+from files_api.s3.write_objects import MIN_MULTIPART_CHUNKSIZE_BYTES
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+# S3 limits on multipart uploads
+MAX_MULTIPART_PARTS = 10_000
+MAX_MULTIPART_PART_SIZE_BYTES = 5 * 1024**3
+MAX_OBJECT_SIZE_BYTES = 5 * 1024**4
+
+DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS = 3600
+DEFAULT_PRESIGNED_PART_SIZE_BYTES = 64 * 1024**2
+
+
+@dataclass(frozen=True)
+class PresignedPartUrl:
+    """URL to which a client uploads one part of a multipart upload with a `PUT` request."""
+
+    part_number: int
+    url: str
+
+
+@dataclass(frozen=True)
+class PresignedMultipartUpload:
+    """A multipart upload started on behalf of a client, with one presigned URL per part."""
+
+    upload_id: str
+    part_size: int
+    part_urls: List[PresignedPartUrl]
+
+
+def generate_presigned_download_url(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+) -> str:
+    """
+    Return a URL from which anyone can `GET` the object until it expires.
+
+    Signing happens locally; no request is made to S3, and the URL is generated whether or not the object exists.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to download.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param expires_in: Seconds for which the URL is valid.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    return s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": object_key},
+        ExpiresIn=expires_in,
+    )
+
+
+def generate_presigned_upload_url(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    content_type: Optional[str] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+) -> str:
+    """
+    Return a URL to which anyone can `PUT` the content of the object, up to 5 GiB, until it expires.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to upload.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param content_type: Content type the upload must be sent with, in its `Content-Type` header.
+    :param expires_in: Seconds for which the URL is valid.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    params = {"Bucket": bucket_name, "Key": object_key}
+    if content_type:
+        params["ContentType"] = content_type
+    return s3_client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+
+
+def get_multipart_part_size(size: int, min_part_size: int = DEFAULT_PRESIGNED_PART_SIZE_BYTES) -> int:
+    """
+    Return the size of each part, except the last, of a multipart upload of `size` bytes.
+
+    Parts are at least `min_part_size`, and larger if needed to fit the upload in 10,000 parts.
+    """
+    part_size = max(min_part_size, MIN_MULTIPART_CHUNKSIZE_BYTES, math.ceil(size / MAX_MULTIPART_PARTS))
+    return min(part_size, MAX_MULTIPART_PART_SIZE_BYTES)
+
+
+def create_presigned_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    size: int,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    content_type: Optional[str] = None,
+    min_part_size: int = DEFAULT_PRESIGNED_PART_SIZE_BYTES,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+) -> PresignedMultipartUpload:
+    """
+    Start a multipart upload of `size` bytes and presign a `PUT` URL for each of its parts.
+
+    The client uploads the parts in parallel, keeps the `ETag` header of each response, and then
+    finishes the upload with `complete_multipart_upload`. Uploads that are never completed keep
+    their parts in S3 until aborted, so the bucket should have a lifecycle rule to abort them.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to upload.
+    :param size: Size of the object in bytes, up to 5 TiB.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param content_type: Content type of the object.
+    :param min_part_size: Preferred size of each part; larger parts are used for objects that would need over 10,000.
+    :param expires_in: Seconds for which the part URLs are valid.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    part_size = get_multipart_part_size(size, min_part_size)
+    part_count = max(math.ceil(size / part_size), 1)
+
+    create_kwargs = {"Bucket": bucket_name, "Key": object_key}
+    if content_type:
+        create_kwargs["ContentType"] = content_type
+    upload_id = s3_client.create_multipart_upload(**create_kwargs)["UploadId"]
+
+    part_urls = [
+        PresignedPartUrl(
+            part_number=part_number,
+            url=s3_client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket_name, "Key": object_key, "UploadId": upload_id, "PartNumber": part_number},
+                ExpiresIn=expires_in,
+            ),
+        )
+        for part_number in range(1, part_count + 1)
+    ]
+    return PresignedMultipartUpload(upload_id=upload_id, part_size=part_size, part_urls=part_urls)
+
+
+def complete_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    parts: List[Tuple[int, str]],
+    s3_client: Optional["S3Client"] = None,
+    *,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+) -> None:
+    """
+    Assemble the uploaded parts of a multipart upload into the object.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object being uploaded.
+    :param upload_id: ID of the multipart upload.
+    :param parts: The part number and `ETag` of every uploaded part.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the overwritten object.
+    :param metadata_index: Optional metadata index in which to record the uploaded object. Costs a `head_object`
+        call, since only S3 knows the size of the assembled object.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    s3_client.complete_multipart_upload(
+        Bucket=bucket_name,
+        Key=object_key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [{"PartNumber": part_number, "ETag": etag} for part_number, etag in sorted(parts)],
+        },
+    )
+    if metadata_cache:
+        metadata_cache.invalidate(bucket_name, object_key)
+    if metadata_index:
+        response = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        metadata_index.put(bucket_name, IndexedObject.from_head_object_response(object_key, response))
+
+
+def abort_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Abort a multipart upload and delete the parts uploaded so far.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object being uploaded.
+    :param upload_id: ID of the multipart upload.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
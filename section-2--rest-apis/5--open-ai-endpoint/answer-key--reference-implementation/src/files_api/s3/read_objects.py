@@ -1,13 +1,43 @@
 """Functions for reading objects from an S3 bucket--the "R" in CRUD."""
 
-from typing import Optional
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
 
 import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.codecs import (
+    STORAGE_ENCODINGS,
+    UNCOMPRESSED_SIZE_METADATA_KEY,
+    decompress,
+    iter_decompressed,
+)
+from files_api.s3.content_cache import (
+    CachedObjectBody,
+    ObjectContentCache,
+)
+from files_api.s3.metadata_cache import (
+    CachedObjectMetadata,
+    ObjectMetadataCache,
+)
 
 try:
     from mypy_boto3_s3 import S3Client
     from mypy_boto3_s3.type_defs import (
         GetObjectOutputTypeDef,
+        HeadObjectOutputTypeDef,
         ListObjectsV2OutputTypeDef,
         ObjectTypeDef,
     )
@@ -15,21 +45,62 @@ except ImportError:
     ...
 
 DEFAULT_MAX_KEYS = 1_000
+DEFAULT_PREFETCH_COUNT = 8
+DEFAULT_PREFETCH_MAX_OBJECT_BYTES = 1024**2
+DEFAULT_DOWNLOAD_CHUNK_SIZE_BYTES = 256 * 1024
+
+# GetObject reports a missing key as "NoSuchKey", HeadObject responses have no body so only the status code is known
+OBJECT_NOT_FOUND_ERROR_CODES = {"NoSuchKey", "404"}
+
+
+@dataclass(frozen=True)
+class S3ObjectWithContent:
+    """An object listed under a prefix, together with its content."""
+
+    object_key: str
+    size: int
+    last_modified: datetime
+    chunks: Iterable[bytes]
+
+
+@dataclass(frozen=True)
+class S3DirectoryListing:
+    """One page of the objects and subdirectories directly under a prefix."""
+
+    objects: List["ObjectTypeDef"]
+    directories: List[str]
+    next_page_token: Optional[str]
+
+
+def is_object_not_found_error(err: ClientError) -> bool:
+    """Return True if a boto3 error was raised because the requested object does not exist."""
+    return err.response["Error"]["Code"] in OBJECT_NOT_FOUND_ERROR_CODES
 
 
-def object_exists_in_s3(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> bool:
+def object_exists_in_s3(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+) -> bool:
     """
     Check if an object exists in the S3 bucket using head_object.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to check.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional cache consulted before, and filled after, calling head_object.
 
     :return: True if the object exists, False otherwise.
     """
+    if metadata_cache and metadata_cache.get(bucket_name, object_key):
+        return True
+
     s3_client = s3_client or boto3.client("s3")
     try:
-        s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        response = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        if metadata_cache:
+            metadata_cache.put(bucket_name, object_key, CachedObjectMetadata.from_s3_response(response))
         return True
     except s3_client.exceptions.ClientError as err:
         error_code = err.response["Error"]["Code"]
@@ -38,22 +109,110 @@ def object_exists_in_s3(bucket_name: str, object_key: str, s3_client: Optional["
         raise
 
 
-def fetch_s3_object(
+def fetch_s3_object(  # pylint: disable=too-many-arguments
     bucket_name: str,
     object_key: str,
+    byte_range: Optional[str] = None,
+    *,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    content_cache: Optional[ObjectContentCache] = None,
     s3_client: Optional["S3Client"] = None,
 ) -> "GetObjectOutputTypeDef":
     """
-    Fetch metadata of an object in the S3 bucket.
+    Fetch an object in the S3 bucket, including a stream of its content.
+
+    Raises a `ClientError` for which `is_object_not_found_error` is True if the object does not exist,
+    with the code "InvalidRange" if `byte_range` starts past the end of the object, or with the code
+    "304" if the object does not satisfy `if_none_match` or `if_modified_since`.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to fetch.
+    :param byte_range: Optional single HTTP byte range to fetch instead of the whole object, e.g. "bytes=0-499".
+    :param if_none_match: Only return the object if its ETag differs from this value.
+    :param if_modified_since: Only return the object if it was modified after this time.
+    :param metadata_cache: Optional cache used to answer the preconditions without calling S3, and
+        filled with the object's metadata after a successful call.
+    :param content_cache: Optional cache of the content of small objects. It is only consulted together with
+        `metadata_cache`, which provides the ETag of the current version of the object without calling S3.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :return: Metadata of the object and a stream of its content in the "Body" key.
+        If `byte_range` was given, "ContentRange" holds the range that was actually returned.
+    """
+    use_content_cache = bool(metadata_cache and content_cache and not byte_range)
+    if metadata_cache and (if_none_match or if_modified_since or use_content_cache):
+        cached_metadata = metadata_cache.get(bucket_name, object_key)
+        if cached_metadata and cached_metadata.is_not_modified(if_none_match, if_modified_since):
+            raise cached_metadata.not_modified_error(operation_name="GetObject")
+        cached_content = (
+            content_cache.get(bucket_name, object_key, etag=cached_metadata.etag)
+            if content_cache and cached_metadata and use_content_cache
+            else None
+        )
+        if cached_metadata and cached_content is not None:
+            return {  # type: ignore[return-value]
+                **cached_metadata.to_head_object_response(),
+                "Body": CachedObjectBody(cached_content),
+            }
+
+    s3_client = s3_client or boto3.client("s3")
+    optional_params = {"Range": byte_range, "IfNoneMatch": if_none_match, "IfModifiedSince": if_modified_since}
+    response = s3_client.get_object(
+        Bucket=bucket_name,
+        Key=object_key,
+        **{name: value for name, value in optional_params.items() if value},  # type: ignore[arg-type]
+    )
+    # a ranged response's ContentLength is the length of the range rather than of the object
+    if metadata_cache and not byte_range:
+        metadata_cache.put(bucket_name, object_key, CachedObjectMetadata.from_s3_response(response))
+    if content_cache and use_content_cache and response["ContentLength"] <= content_cache.max_object_bytes:
+        content = response["Body"].read()
+        content_cache.put(bucket_name, object_key, etag=response["ETag"], content=content)
+        response["Body"] = CachedObjectBody(content)  # type: ignore[typeddict-item]
+    return response
+
+
+def fetch_s3_object_metadata(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+) -> "HeadObjectOutputTypeDef":
+    """
+    Fetch metadata of an object in the S3 bucket without opening a stream to its content.
+
+    Raises a `ClientError` with the code "304" if the object does not satisfy `if_none_match` or `if_modified_since`.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to fetch.
+    :param if_none_match: Only return the metadata if the object's ETag differs from this value.
+    :param if_modified_since: Only return the metadata if the object was modified after this time.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional cache consulted before, and filled after, calling head_object.
+        Only "ContentLength", "ContentType", "ETag" and "LastModified" are returned on a cache hit.
 
     :return: Metadata of the object.
     """
+    cached_metadata = metadata_cache.get(bucket_name, object_key) if metadata_cache else None
+    if cached_metadata:
+        if cached_metadata.is_not_modified(if_none_match, if_modified_since):
+            raise cached_metadata.not_modified_error(operation_name="HeadObject")
+        return cached_metadata.to_head_object_response()
+
     s3_client = s3_client or boto3.client("s3")
-    response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    optional_params = {"IfNoneMatch": if_none_match, "IfModifiedSince": if_modified_since}
+    response = s3_client.head_object(
+        Bucket=bucket_name,
+        Key=object_key,
+        **{name: value for name, value in optional_params.items() if value},  # type: ignore[arg-type]
+    )
+    if metadata_cache:
+        metadata_cache.put(bucket_name, object_key, CachedObjectMetadata.from_s3_response(response))
     return response
 
 
@@ -111,3 +270,160 @@ def fetch_s3_objects_metadata(
     next_page_token: str | None = response.get("NextContinuationToken")
 
     return files, next_page_token
+
+
+def iter_s3_object_pages(
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_keys: int = DEFAULT_MAX_KEYS,
+) -> Iterator[List["ObjectTypeDef"]]:
+    """
+    Yield every object under `prefix`, one `list_objects_v2` page at a time, following the continuation tokens.
+
+    The next page is requested in a background thread as soon as the current one arrives, so listing it
+    overlaps with whatever the caller does with the current page, e.g. serializing and sending it.
+    At most two pages are held in memory.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param max_keys: Maximum number of keys per page.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def list_page(continuation_token: Optional[str]) -> "ListObjectsV2OutputTypeDef":
+        list_kwargs = {"Bucket": bucket_name, "Prefix": prefix, "MaxKeys": max_keys}
+        if continuation_token:
+            list_kwargs["ContinuationToken"] = continuation_token
+        return s3_client.list_objects_v2(**list_kwargs)  # type: ignore[arg-type]
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="s3-list") as executor:
+        next_page: Optional[Future] = executor.submit(list_page, None)
+        while next_page:
+            response = next_page.result()
+            continuation_token = response.get("NextContinuationToken")
+            next_page = executor.submit(list_page, continuation_token) if continuation_token else None
+            yield response.get("Contents", [])
+
+
+def fetch_s3_directory_listing(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+    *,
+    delimiter: Optional[str] = "/",
+    max_keys: int = DEFAULT_MAX_KEYS,
+    continuation_token: Optional[str] = None,
+    start_after: Optional[str] = None,
+) -> S3DirectoryListing:
+    """
+    Fetch one page of the objects directly under `prefix`, and of the "subdirectories" below it.
+
+    Keys that contain `delimiter` after `prefix` are not returned one by one: S3 rolls them up into
+    a single common prefix per subdirectory, so only one level of a deep tree is scanned.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the "directory" to list, e.g. `path/to/`.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param delimiter: Character that separates the levels of keys. With None, every object under `prefix`
+        is listed, and there are no subdirectories.
+    :param max_keys: Maximum number of objects and subdirectories, together, to return within this page.
+    :param continuation_token: Token for fetching the next page of results where the last page left off.
+        S3 requires the same `prefix` and `delimiter` as the request that returned it.
+    :param start_after: List only the keys that sort after this one, e.g. the last key of the previous page.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    list_kwargs = {"Bucket": bucket_name, "Prefix": prefix, "MaxKeys": max_keys}
+    if delimiter:
+        list_kwargs["Delimiter"] = delimiter
+    if continuation_token:
+        list_kwargs["ContinuationToken"] = continuation_token
+    if start_after:
+        list_kwargs["StartAfter"] = start_after
+    response: "ListObjectsV2OutputTypeDef" = s3_client.list_objects_v2(**list_kwargs)  # type: ignore[arg-type]
+    return S3DirectoryListing(
+        objects=response.get("Contents", []),
+        directories=[common_prefix["Prefix"] for common_prefix in response.get("CommonPrefixes", [])],
+        next_page_token=response.get("NextContinuationToken"),
+    )
+
+
+def iter_s3_objects_with_content(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    *,
+    prefetch_count: int = DEFAULT_PREFETCH_COUNT,
+    prefetch_max_object_bytes: int = DEFAULT_PREFETCH_MAX_OBJECT_BYTES,
+    chunk_size: int = DEFAULT_DOWNLOAD_CHUNK_SIZE_BYTES,
+) -> Iterator[S3ObjectWithContent]:
+    """
+    Yield every object under `prefix`, in key order, with its content.
+
+    While the caller consumes one object, the GETs of the next `prefetch_count` objects are already
+    in flight in worker threads, so a prefix of many small files is not read one round trip at a time.
+    Objects of up to `prefetch_max_object_bytes` are read in full ahead of time; larger objects are
+    streamed in `chunk_size` chunks when reached. Memory therefore stays around
+    `prefetch_count * prefetch_max_object_bytes` regardless of how much is read.
+
+    Objects deleted between being listed and being fetched are skipped. Objects stored compressed,
+    see `files_api.s3.codecs`, are decompressed.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the keys to read. An empty prefix reads every object in the bucket.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param prefetch_count: Number of objects fetched ahead of the one being consumed.
+    :param prefetch_max_object_bytes: Objects up to this size are read in full while prefetching.
+    :param chunk_size: Size of the chunks that larger objects are streamed in.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def fetch(object_key: str) -> Optional[S3ObjectWithContent]:
+        try:
+            response = fetch_s3_object(bucket_name, object_key, s3_client=s3_client)
+        except ClientError as err:
+            if is_object_not_found_error(err):
+                return None
+            raise
+        body = response["Body"]
+        size = response["ContentLength"]
+        chunks: Iterable[bytes] = [body.read()] if size <= prefetch_max_object_bytes else body.iter_chunks(chunk_size)
+        if (encoding := response.get("ContentEncoding")) in STORAGE_ENCODINGS:
+            # consumers get the decompressed content, whose size has to be known before it's read
+            uncompressed_size = response.get("Metadata", {}).get(UNCOMPRESSED_SIZE_METADATA_KEY)
+            if uncompressed_size is None:
+                content = decompress(b"".join(chunks), encoding)
+                chunks, size = [content], len(content)
+            else:
+                chunks, size = iter_decompressed(chunks, encoding), int(uncompressed_size)
+        return S3ObjectWithContent(
+            object_key=object_key,
+            size=size,
+            last_modified=response["LastModified"],
+            chunks=chunks,
+        )
+
+    paginator = s3_client.get_paginator("list_objects_v2")
+    object_keys = (
+        obj["Key"]
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+        for obj in page.get("Contents", [])
+    )
+
+    prefetched: Deque[Future[Optional[S3ObjectWithContent]]] = deque()
+    with ThreadPoolExecutor(max_workers=prefetch_count, thread_name_prefix="s3-prefetch") as executor:
+        try:
+            for object_key in object_keys:
+                prefetched.append(executor.submit(fetch, object_key))
+                if len(prefetched) > prefetch_count:
+                    if obj := prefetched.popleft().result():
+                        yield obj
+            while prefetched:
+                if obj := prefetched.popleft().result():
+                    yield obj
+        finally:
+            # if the consumer stopped early, e.g. because the client disconnected, don't fetch objects nobody will read
+            for future in prefetched:
+                future.cancel()
@@ -1,21 +1,102 @@
 """Functions for writing objects from an S3 bucket--the "C" and "U" in CRUD."""
 
-from typing import Optional
+import hashlib
+from dataclasses import (
+    dataclass,
+    replace,
+)
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+)
+
+from files_api.s3.codecs import (
+    UNCOMPRESSED_SIZE_METADATA_KEY,
+    CompressingReader,
+    StorageEncoding,
+)
+from files_api.s3.concurrency import map_with_bounded_concurrency
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import (
+    IndexedObject,
+    ObjectMetadataIndex,
+    get_body_size,
+)
+from files_api.s3.read_objects import is_object_not_found_error
 
 try:
     from mypy_boto3_s3 import S3Client
 except ImportError:
     ...
 
+# S3 rejects multipart uploads whose parts (other than the last) are smaller than 5 MiB
+MIN_MULTIPART_CHUNKSIZE_BYTES = 5 * 1024**2
+DEFAULT_MULTIPART_THRESHOLD_BYTES = 8 * 1024**2
+DEFAULT_MULTIPART_CHUNKSIZE_BYTES = 8 * 1024**2
+DEFAULT_MULTIPART_MAX_CONCURRENCY = 4
+DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY = 16
+DEFAULT_HASH_CHUNK_SIZE_BYTES = 1024**2
+
+# user metadata in which deduplicated uploads record the SHA-256 of their content, i.e. `x-amz-meta-sha256`
+SHA256_METADATA_KEY = "sha256"
+
+
+@dataclass(frozen=True)
+class S3ObjectToUpload:
+    """One object of a bulk upload."""
+
+    object_key: str
+    body: Union[bytes, IO[bytes]]
+    content_type: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ObjectUploadResult:
+    """Outcome of uploading one object of a bulk upload."""
+
+    object_key: str
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error_code is None
+
 
-def upload_s3_object(
+@dataclass(frozen=True)
+class DeduplicatedUploadResult:
+    """Outcome of `upload_s3_object_if_changed`."""
+
+    sha256: str
+    """Hex SHA-256 digest of the content."""
+    existed: bool
+    """Whether there was an object at the key before."""
+    skipped: bool
+    """Whether the object already had the same content and content type, so nothing was uploaded."""
+
+
+def upload_s3_object(  # pylint: disable=too-many-arguments
     bucket_name: str,
     object_key: str,
     file_content: bytes,
     content_type: Optional[str] = None,
     s3_client: Optional["S3Client"] = None,
+    *,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
 ) -> None:
     """
     Upload a file to an S3 bucket.
@@ -25,12 +106,231 @@ def upload_s3_object(
     :param file_content: The content of the file to upload.
     :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
     :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param metadata_cache: An optional metadata cache in which to invalidate the overwritten object.
+    :param metadata_index: An optional metadata index in which to record the uploaded object.
     """
     content_type = content_type or "application/octet-stream"
     s3_client = s3_client or boto3.client("s3")
-    s3_client.put_object(
+    indexed_object = IndexedObject.just_written(object_key, file_content, content_type) if metadata_index else None
+    response = s3_client.put_object(
         Bucket=bucket_name,
         Key=object_key,
         Body=file_content,
         ContentType=content_type,
     )
+    if metadata_cache:
+        metadata_cache.invalidate(bucket_name, object_key)
+    if metadata_index:
+        _update_metadata_index(metadata_index, bucket_name, object_key, indexed_object, etag=response.get("ETag"))
+
+
+def upload_s3_object_from_file(  # pylint: disable=too-many-arguments,too-many-locals
+    bucket_name: str,
+    object_key: str,
+    file_obj: IO[bytes],
+    content_type: Optional[str] = None,
+    *,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    multipart_chunksize: int = DEFAULT_MULTIPART_CHUNKSIZE_BYTES,
+    max_concurrency: int = DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+    metadata: Optional[Dict[str, str]] = None,
+    content_encoding: Optional[StorageEncoding] = None,
+) -> None:
+    """
+    Stream a file-like object to an S3 bucket without reading it into memory all at once.
+
+    Files smaller than `multipart_threshold` are sent with a single PUT. Larger files are sent as a
+    multipart upload whose parts are read in `multipart_chunksize` chunks and uploaded in parallel.
+    At most `max_concurrency` parts are buffered in memory at a time, and the multipart upload is
+    aborted if any part fails so that no orphaned parts are left behind in the bucket.
+
+    With a `content_encoding`, the file is compressed as it's streamed and the codec is stored as the object's
+    `ContentEncoding`. The compressed size isn't known until the upload is done, so the object's entry in the
+    metadata index is updated from a `head_object` call afterwards.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param file_obj: A binary file-like object opened for reading, e.g. `UploadFile.file`.
+    :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
+    :param multipart_threshold: Size in bytes at which the upload switches to a multipart upload.
+    :param multipart_chunksize: Size in bytes of each part of a multipart upload.
+    :param max_concurrency: Maximum number of parts uploaded in parallel.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param metadata_cache: An optional metadata cache in which to invalidate the overwritten object.
+    :param metadata_index: An optional metadata index in which to record the uploaded object.
+    :param metadata: Optional user metadata to store with the object, sent as `x-amz-meta-*` headers.
+    :param content_encoding: Optional codec with which to compress the file, see `files_api.s3.codecs`.
+    """
+    content_type = content_type or "application/octet-stream"
+    s3_client = s3_client or boto3.client("s3")
+    extra_args = {"ContentType": content_type, **({"Metadata": metadata} if metadata else {})}
+    if content_encoding:
+        indexed_object = None
+        # lets archives of directories size the entries of compressed files without decompressing them first
+        if (uncompressed_size := get_body_size(file_obj)) is not None:
+            extra_args["Metadata"] = {**(metadata or {}), UNCOMPRESSED_SIZE_METADATA_KEY: str(uncompressed_size)}
+        extra_args["ContentEncoding"] = content_encoding
+        file_obj = CompressingReader(file_obj, content_encoding)  # type: ignore[assignment]
+    else:
+        indexed_object = IndexedObject.just_written(object_key, file_obj, content_type) if metadata_index else None
+    transfer_config = TransferConfig(
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=max(multipart_chunksize, MIN_MULTIPART_CHUNKSIZE_BYTES),
+        max_concurrency=max_concurrency,
+    )
+    # bound the parts read ahead of the uploader threads for streams that cannot be seeked
+    transfer_config.max_in_memory_upload_chunks = max_concurrency
+    s3_client.upload_fileobj(
+        Fileobj=file_obj,
+        Bucket=bucket_name,
+        Key=object_key,
+        ExtraArgs=extra_args,
+        Config=transfer_config,
+    )
+    if metadata_cache:
+        metadata_cache.invalidate(bucket_name, object_key)
+    if metadata_index and content_encoding:
+        response = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        metadata_index.put(bucket_name, IndexedObject.from_head_object_response(object_key, response))
+    elif metadata_index:
+        # the transfer manager doesn't return the ETag of the object
+        _update_metadata_index(metadata_index, bucket_name, object_key, indexed_object)
+
+
+def upload_s3_object_if_changed(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    file_obj: IO[bytes],
+    content_type: Optional[str] = None,
+    *,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+    **upload_options: Any,
+) -> DeduplicatedUploadResult:
+    """
+    Upload a file with `upload_s3_object_from_file` unless the object at `object_key` already has the same content.
+
+    The SHA-256 of the file is computed first, in chunks, and compared with the digest stored in the metadata
+    of the existing object by a previous call. A re-upload of an unchanged file then costs one `head_object`
+    instead of sending every byte to S3 again. The digest is stored with each upload, so S3 keeps it for
+    the next comparison. Objects uploaded by other means have no digest and are always overwritten.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param file_obj: A seekable binary file-like object opened for reading, e.g. `UploadFile.file`.
+    :param content_type: The MIME type of the file. A change of content type alone is uploaded too.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param metadata_cache: An optional metadata cache in which to invalidate the overwritten object.
+    :param metadata_index: An optional metadata index in which to record the uploaded object.
+    :param upload_options: `multipart_threshold`, `multipart_chunksize`, `max_concurrency` and `content_encoding`
+        for `upload_s3_object_from_file`.
+    """
+    content_type = content_type or "application/octet-stream"
+    s3_client = s3_client or boto3.client("s3")
+    sha256 = compute_sha256(file_obj)
+    try:
+        existing_object = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+    except ClientError as err:
+        if not is_object_not_found_error(err):
+            raise
+        existing_object = None
+
+    if (
+        existing_object
+        and existing_object.get("Metadata", {}).get(SHA256_METADATA_KEY) == sha256
+        and existing_object.get("ContentType") == content_type
+    ):
+        return DeduplicatedUploadResult(sha256=sha256, existed=True, skipped=True)
+
+    upload_s3_object_from_file(
+        bucket_name,
+        object_key,
+        file_obj,
+        content_type,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        metadata_index=metadata_index,
+        metadata={SHA256_METADATA_KEY: sha256},
+        **upload_options,
+    )
+    return DeduplicatedUploadResult(sha256=sha256, existed=existing_object is not None, skipped=False)
+
+
+def compute_sha256(file_obj: IO[bytes], chunk_size: int = DEFAULT_HASH_CHUNK_SIZE_BYTES) -> str:
+    """Return the hex SHA-256 of the rest of a seekable file, read in chunks, and seek back to where it was."""
+    position = file_obj.tell()
+    digest = hashlib.sha256()
+    while chunk := file_obj.read(chunk_size):
+        digest.update(chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def upload_s3_objects(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    objects: Iterable[S3ObjectToUpload],
+    s3_client: Optional["S3Client"] = None,
+    *,
+    max_concurrency: int = DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY,
+    metadata_cache: Optional[ObjectMetadataCache] = None,
+    metadata_index: Optional[ObjectMetadataIndex] = None,
+) -> List[ObjectUploadResult]:
+    """
+    Upload many small objects to an S3 bucket with up to `max_concurrency` `put_object` calls in flight.
+
+    Each object is sent with a single PUT, so this is meant for files below the multipart threshold.
+    A failed upload is reported in its result instead of stopping the others.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param objects: The objects to upload; consumed lazily, so that at most about `max_concurrency`
+        bodies need to be in memory at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param max_concurrency: Maximum number of uploads in flight at once.
+    :param metadata_cache: An optional metadata cache in which to invalidate the overwritten objects.
+    :param metadata_index: An optional metadata index in which to record the uploaded objects.
+
+    :return: One result per object, in the order of `objects`.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def upload(indexed_object: Tuple[int, S3ObjectToUpload]) -> Tuple[int, ObjectUploadResult]:
+        index, obj = indexed_object
+        try:
+            upload_s3_object(
+                bucket_name,
+                object_key=obj.object_key,
+                file_content=obj.body,  # type: ignore[arg-type]
+                content_type=obj.content_type,
+                s3_client=s3_client,
+                metadata_cache=metadata_cache,
+                metadata_index=metadata_index,
+            )
+        except ClientError as err:
+            error = err.response["Error"]
+            return index, ObjectUploadResult(obj.object_key, error_code=error["Code"], error_message=str(err))
+        except BotoCoreError as err:
+            return index, ObjectUploadResult(obj.object_key, error_code=type(err).__name__, error_message=str(err))
+        return index, ObjectUploadResult(obj.object_key)
+
+    indexed_results = map_with_bounded_concurrency(
+        upload, enumerate(objects), max_concurrency=max_concurrency, thread_name_prefix="s3-upload"
+    )
+    return [result for _, result in sorted(indexed_results, key=lambda indexed_result: indexed_result[0])]
+
+
+def _update_metadata_index(
+    metadata_index: ObjectMetadataIndex,
+    bucket_name: str,
+    object_key: str,
+    indexed_object: Optional[IndexedObject],
+    etag: Optional[str] = None,
+) -> None:
+    """Record an uploaded object in the index, or drop its stale entry if the size of the upload couldn't be told."""
+    if indexed_object:
+        metadata_index.put(bucket_name, replace(indexed_object, etag=etag))
+    else:
+        metadata_index.delete(bucket_name, object_key)
@@ -6,7 +6,9 @@ import re
 from datetime import datetime
 from enum import Enum
 from typing import (
+    Dict,
     List,
+    Literal,
     Optional,
 )
 
@@ -23,6 +25,9 @@ DEFAULT_GET_FILES_PAGE_SIZE = 10
 DEFAULT_GET_FILES_MIN_PAGE_SIZE = 10
 DEFAULT_GET_FILES_MAX_PAGE_SIZE = 100
 DEFAULT_GET_FILES_DIRECTORY = ""
+# the listing parameters carried by a page token
+PAGE_TOKEN_EXCLUSIVE_QUERY_PARAMS = {"page_size", "directory", "delimiter"}
+MAX_BULK_DELETE_FILE_PATHS = 10_000
 
 
 # read (cRud)
@@ -34,7 +39,9 @@ class FileMetadata(BaseModel):
         json_schema_extra={"example": "path/to/pyproject.toml"},
     )
     last_modified: datetime = Field(description="The last modified date of the file.")
-    size_bytes: int = Field(description="The size of the file in bytes.")
+    size_bytes: int = Field(
+        description="The size of the file in bytes, as stored: the compressed size for files stored compressed."
+    )
 
 
 # read (cRud)
@@ -42,7 +49,15 @@ class GetFilesResponse(BaseModel):
     """Response model for `GET /v1/files`."""
 
     files: List[FileMetadata]
+    directories: List[str] = Field(
+        default_factory=list,
+        description="With `delimiter`, the subdirectories directly in `directory`, each ending with the delimiter.",
+    )
     next_page_token: Optional[str]
+    file_count: Optional[int] = Field(None, description="With `mode=count`, the number of files in the directory.")
+    total_size_bytes: Optional[int] = Field(
+        None, description="With `mode=count`, the total size of the files in the directory."
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -59,6 +74,7 @@ class GetFilesResponse(BaseModel):
                         "size_bytes": 256,
                     },
                 ],
+                "directories": [],
                 "next_page_token": "next_page_token_example",
             }
         }
@@ -80,17 +96,54 @@ class GetFilesQueryParams(BaseModel):
     )
     page_token: Optional[str] = Field(
         None,
-        description="The token for the next page.",
+        description=(
+            "The `next_page_token` of the previous page. It carries the `directory`, `delimiter` and `page_size` "
+            "of the listing, so those can't be passed along with it."
+        ),
+    )
+    delimiter: Optional[str] = Field(
+        None,
+        min_length=1,
+        description=(
+            "List only the files directly in `directory`, e.g. with `/`, and its subdirectories in `directories`, "
+            "instead of every file below it."
+        ),
+        json_schema_extra={"example": "/"},
+    )
+    mode: Literal["page", "full", "count"] = Field(
+        "page",
+        description=(
+            "`page` lists one page of files. `full` lists every file in `directory` at once, and "
+            "`count` only counts them and adds up their sizes; both list subdirectories in parallel."
+        ),
+    )
+
+    stream: Optional[Literal["ndjson"]] = Field(
+        None,
+        description=(
+            "With `ndjson`, stream every file in `directory` in one response, as one JSON object per line, "
+            "instead of returning one page. `page_size` and `page_token` don't apply."
+        ),
     )
 
     @model_validator(mode="after")
-    def check_page_token_is_mutually_exclusive_with_page_size_and_directory(self) -> Self:
-        if self.page_token:
-            get_files_query_params: dict = self.model_dump(exclude_unset=True)
-            page_size_set = "page_size" in get_files_query_params.keys()
-            directory_set = "directory" in get_files_query_params.keys()
-            if page_size_set or directory_set:
-                raise ValueError("page_token is mutually exclusive with page_size and directory")
+    def check_stream_is_only_used_with_pages_of_every_file(self) -> Self:
+        if self.stream and (self.mode != "page" or self.delimiter or self.page_token):
+            raise ValueError("stream can't be combined with mode, delimiter or page_token")
+        return self
+
+    @model_validator(mode="after")
+    def check_delimiter_is_only_used_with_pages(self) -> Self:
+        if self.delimiter and self.mode != "page":
+            raise ValueError("delimiter can only be used with mode=page")
+        return self
+
+    # that `page_token` isn't passed along with the parameters it carries is checked by the route, see
+    # `get_files_query_params`: FastAPI passes every parameter to the model, so it can't tell which were given
+    @model_validator(mode="after")
+    def check_page_token_is_only_used_with_pages(self) -> Self:
+        if self.page_token and self.mode != "page":
+            raise ValueError("page_token can only be used with mode=page")
         return self
 
 
@@ -101,6 +154,47 @@ class DeleteFileResponse(BaseModel):
     message: str
 
 
+# delete (cruD)
+class BulkDeleteFilesRequest(BaseModel):
+    """Request body for `POST /v1/files/bulk-delete`."""
+
+    file_paths: Optional[List[str]] = Field(
+        None,
+        max_length=MAX_BULK_DELETE_FILE_PATHS,
+        description="The paths of the files to delete.",
+        json_schema_extra={"example": ["path/to/pyproject.toml", "path/to/Makefile"]},
+    )
+    directory: Optional[str] = Field(
+        None,
+        min_length=1,
+        description="Delete every file in this directory and its subdirectories. A trailing `/` is implied.",
+        json_schema_extra={"example": "path/to/"},
+    )
+
+    @model_validator(mode="after")
+    def check_exactly_one_of_file_paths_and_directory(self) -> Self:
+        if (self.file_paths is None) == (self.directory is None):
+            raise ValueError("exactly one of file_paths and directory must be given")
+        return self
+
+
+# delete (cruD)
+class BulkDeleteFileError(BaseModel):
+    """A file that could not be deleted."""
+
+    file_path: str = Field(description="The path of the file.")
+    code: str = Field(description="The S3 error code, e.g. `AccessDenied`.")
+    message: str = Field(description="A description of the error.")
+
+
+# delete (cruD)
+class BulkDeleteFilesResponse(BaseModel):
+    """Response model for `POST /v1/files/bulk-delete`."""
+
+    deleted_count: int = Field(description="The number of files deleted. Paths with no file count as deleted.")
+    errors: List[BulkDeleteFileError] = Field(description="The files that could not be deleted.")
+
+
 # create/update (CrUd)
 class PutFileResponse(BaseModel):
     """Response model for `PUT /v1/files/:file_path`."""
@@ -110,6 +204,58 @@ class PutFileResponse(BaseModel):
         json_schema_extra={"example": "path/to/pyproject.toml"},
     )
     message: str = Field(description="A message about the operation.")
+    sha256: Optional[str] = Field(
+        None,
+        description="With `UPLOAD_DEDUP_ENABLED`, the hex SHA-256 digest of the file's content.",
+        json_schema_extra={"example": "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"},
+    )
+
+
+# create/update (CrUd)
+class CopyFileRequest(BaseModel):
+    """Request body for `POST /v1/files/copy` and `POST /v1/files/move`."""
+
+    source_path: str = Field(
+        min_length=1,
+        description="The path of the file, or with `recursive`, of the directory to copy or move.",
+        json_schema_extra={"example": "path/to/pyproject.toml"},
+    )
+    destination_path: str = Field(
+        min_length=1,
+        description="The new path. An existing file at this path is overwritten.",
+        json_schema_extra={"example": "path/to/pyproject.backup.toml"},
+    )
+    recursive: bool = Field(
+        False,
+        description="Copy or move every file in the `source_path` directory, in a background job.",
+    )
+
+
+# create/update (CrUd)
+class CopyFileResponse(BaseModel):
+    """Response model for `POST /v1/files/copy` and `POST /v1/files/move`."""
+
+    source_path: str = Field(description="The path the file was copied or moved from.")
+    destination_path: str = Field(description="The path the file was copied or moved to.")
+    message: str = Field(description="A message about the operation.")
+
+
+# create/update (CrUd)
+class BulkUploadFileResult(BaseModel):
+    """Outcome of uploading one file of a bulk upload."""
+
+    file_path: str = Field(description="The path of the file.")
+    uploaded: bool = Field(description="Whether the file was uploaded.")
+    error: Optional[str] = Field(None, description="Why the file was not uploaded, if it wasn't.")
+
+
+# create/update (CrUd)
+class BulkUploadFilesResponse(BaseModel):
+    """Response model for `POST /v1/files/bulk-upload`."""
+
+    uploaded_count: int = Field(description="The number of files uploaded.")
+    failed_count: int = Field(description="The number of files that could not be uploaded.")
+    results: List[BulkUploadFileResult] = Field(description="One result per file, in the order they were sent.")
 
 
 class GeneratedFileType(str, Enum):
@@ -195,3 +341,196 @@ class PutGeneratedFileResponse(BaseModel):
             ]
         }
     )
+
+
+# presigned URLs
+class PresignDownloadRequest(BaseModel):
+    """Request body for `POST /v1/presigned-urls/download`."""
+
+    file_path: str = Field(min_length=1, description="The path of the file to download.")
+
+
+# presigned URLs
+class PresignUploadRequest(BaseModel):
+    """Request body for `POST /v1/presigned-urls/upload`."""
+
+    file_path: str = Field(min_length=1, description="The path to upload the file to.")
+    content_type: Optional[str] = Field(
+        None,
+        description="The MIME type of the file. The upload must then be sent with this `Content-Type` header.",
+        json_schema_extra={"example": "text/plain"},
+    )
+
+
+# presigned URLs
+class PresignedUrlResponse(BaseModel):
+    """A URL that transfers a file straight to or from S3, without going through this API."""
+
+    url: str = Field(description="The presigned URL.")
+    method: str = Field(description="The HTTP method to use with the URL.", json_schema_extra={"example": "PUT"})
+    headers: Dict[str, str] = Field(description="Headers that must be sent with the request.")
+    expires_at: datetime = Field(description="When the URL stops working.")
+
+
+# presigned URLs
+class CreateMultipartUploadRequest(BaseModel):
+    """Request body for `POST /v1/multipart-uploads`."""
+
+    file_path: str = Field(min_length=1, description="The path to upload the file to.")
+    size_bytes: int = Field(
+        ge=0,
+        le=5 * 1024**4,
+        description="The size of the file. S3 accepts files of up to 5 TiB.",
+    )
+    content_type: Optional[str] = Field(None, description="The MIME type of the file.")
+
+
+# presigned URLs
+class PresignedPart(BaseModel):
+    """Where to upload one part of a multipart upload."""
+
+    part_number: int = Field(description="The 1-based number of the part.")
+    url: str = Field(description="The presigned URL to `PUT` the part to.")
+
+
+# presigned URLs
+class CreateMultipartUploadResponse(BaseModel):
+    """Response model for `POST /v1/multipart-uploads`."""
+
+    upload_id: str = Field(description="The ID of the upload, to complete or abort it.")
+    file_path: str = Field(description="The path the file is uploaded to.")
+    part_size_bytes: int = Field(
+        description="The size of every part but the last. Part `n` starts at byte `(n - 1) * part_size_bytes`."
+    )
+    parts: List[PresignedPart] = Field(description="One presigned URL per part.")
+    expires_at: datetime = Field(description="When the part URLs stop working.")
+
+
+# presigned URLs
+class UploadedPart(BaseModel):
+    """A part of a multipart upload that the client uploaded."""
+
+    part_number: int = Field(ge=1, le=10_000, description="The 1-based number of the part.")
+    etag: str = Field(description="The `ETag` header of S3's response to the part's upload.")
+
+
+# presigned URLs
+class CompleteMultipartUploadRequest(BaseModel):
+    """Request body for `POST /v1/multipart-uploads/:upload_id/complete`."""
+
+    file_path: str = Field(min_length=1, description="The path the file is uploaded to.")
+    parts: List[UploadedPart] = Field(min_length=1, max_length=10_000, description="Every uploaded part.")
+
+
+# search
+class SearchFilesQueryParams(BaseModel):
+    """Query parameters for `GET /v1/search/files`."""
+
+    directory: str = Field("", description="Only search the files in this directory, and its subdirectories.")
+    path_contains: Optional[str] = Field(
+        None, min_length=1, description="Only files whose path contains this text, case-sensitively."
+    )
+    content_type: Optional[str] = Field(
+        None,
+        description="Only files of this content type, e.g. `text/csv`, or of any subtype, e.g. `image/*`.",
+        json_schema_extra={"example": "image/*"},
+    )
+    min_size_bytes: Optional[int] = Field(None, ge=0, description="Only files of at least this many bytes.")
+    max_size_bytes: Optional[int] = Field(None, ge=0, description="Only files of at most this many bytes.")
+    modified_after: Optional[datetime] = Field(None, description="Only files last modified at or after this time.")
+    modified_before: Optional[datetime] = Field(None, description="Only files last modified before this time.")
+    sort_by: Literal["file_path", "size_bytes", "last_modified"] = Field(
+        "file_path", description="The order of the files. Files that tie are ordered by path."
+    )
+    order: Literal["asc", "desc"] = Field("asc", description="Whether to sort in ascending or descending order.")
+    page_size: int = Field(100, ge=1, le=1000, description="The maximum number of files to return.")
+    page_token: Optional[str] = Field(
+        None, description="The token for the next page. Pass it along with the same filters and sort order."
+    )
+
+
+# search
+class SearchedFileMetadata(FileMetadata):
+    """Metadata of a file found by a search."""
+
+    content_type: Optional[str] = Field(description="The content type of the file, or null if it isn't known yet.")
+
+
+# search
+class SearchFilesResponse(BaseModel):
+    """Response model for `GET /v1/search/files`."""
+
+    files: List[SearchedFileMetadata]
+    next_page_token: Optional[str]
+
+
+# search
+class GetDirectoryStatsResponse(BaseModel):
+    """Response model for `GET /v1/directory-stats`."""
+
+    directory: str = Field(description="The directory, with a trailing `/`, or empty for the whole bucket.")
+    file_count: int = Field(description="The number of files in the directory and its subdirectories.")
+    total_size_bytes: int = Field(description="The total size of those files.")
+    first_modified: Optional[datetime] = Field(
+        description="When the file modified longest ago was last modified, or null if there are no files."
+    )
+    last_modified: Optional[datetime] = Field(
+        description="When the most recently modified file was last modified, or null if there are no files."
+    )
+
+
+# background jobs
+class GetJobResponse(BaseModel):
+    """Response model for `GET /v1/jobs/:job_id`, and for requests that start a background job."""
+
+    job_id: str = Field(description="The ID of the job, for polling `GET /v1/jobs/:job_id`.")
+    kind: str = Field(description="What the job does.", json_schema_extra={"example": "delete-directory"})
+    status: str = Field(
+        description="One of `pending`, `running`, `succeeded` or `failed`.",
+        json_schema_extra={"example": "running"},
+    )
+    created_at: datetime = Field(description="When the job was submitted.")
+    finished_at: Optional[datetime] = Field(description="When the job finished, or null if it has not.")
+    progress: Dict[str, int] = Field(
+        description="Counters updated while the job runs.",
+        json_schema_extra={"example": {"deleted_count": 12000, "error_count": 0}},
+    )
+    errors: List[str] = Field(
+        description="The first errors on individual files, e.g. files that could not be deleted."
+    )
+    error: Optional[str] = Field(description="Why the job as a whole failed, if it did.")
+
+
+# observability
+class MetadataCacheStatsSchema(BaseModel):
+    """Counters of the in-process S3 object metadata cache."""
+
+    hits: int = Field(description="Lookups answered from the cache without calling S3.")
+    misses: int = Field(description="Lookups that had to call S3, including expired entries.")
+    evictions: int = Field(description="Entries dropped to stay within the maximum number of entries.")
+    invalidations: int = Field(description="Entries dropped because the file was overwritten or deleted.")
+    entries: int = Field(description="Number of files currently cached.")
+
+
+# observability
+class ContentCacheStatsSchema(BaseModel):
+    """Counters of the in-process cache of small files' content."""
+
+    hits: int = Field(description="Downloads served from the cache without calling S3.")
+    misses: int = Field(description="Downloads of a current version of a file that was not cached.")
+    evictions: int = Field(description="Entries dropped to stay within the byte budgets.")
+    entries: int = Field(description="Number of file versions currently cached, in memory or spilled to disk.")
+    memory_bytes: int = Field(description="Total size of the content cached in memory.")
+    spill_bytes: int = Field(description="Total size of the content spilled to disk.")
+
+
+# observability
+class GetCacheStatsResponse(BaseModel):
+    """Response model for `GET /v1/cache-stats`."""
+
+    metadata_cache: Optional[MetadataCacheStatsSchema] = Field(
+        description="Metadata cache counters, or null if the cache is disabled.",
+    )
+    content_cache: Optional[ContentCacheStatsSchema] = Field(
+        description="Content cache counters, or null if the cache is disabled.",
+    )
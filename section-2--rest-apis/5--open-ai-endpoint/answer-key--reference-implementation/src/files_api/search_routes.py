@@ -0,0 +1,178 @@
+"""Routes that search files through the local metadata index, without listing the bucket."""
+
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from files_api.jobs import (
+    Job,
+    JobContext,
+)
+from files_api.routes import (
+    get_job_registry,
+    job_to_response,
+)
+from files_api.s3.aio import AsyncS3Backend
+from files_api.s3.metadata_index import (
+    IndexQuery,
+    ObjectMetadataIndex,
+    PrefixStats,
+    reconcile_metadata_index,
+)
+from files_api.schemas import (
+    GetDirectoryStatsResponse,
+    GetJobResponse,
+    SearchedFileMetadata,
+    SearchFilesQueryParams,
+    SearchFilesResponse,
+)
+from files_api.settings import Settings
+
+SEARCH_ROUTER = APIRouter(tags=["Search"])
+
+INDEX_DISABLED_RESPONSE = {
+    status.HTTP_404_NOT_FOUND: {"description": "The metadata index is disabled, see `METADATA_INDEX_ENABLED`."},
+}
+
+SORT_BY_INDEX_COLUMN = {"file_path": "key", "size_bytes": "size", "last_modified": "last_modified"}
+
+
+@SEARCH_ROUTER.get(
+    "/v1/search/files",
+    responses={
+        **INDEX_DISABLED_RESPONSE,
+        status.HTTP_400_BAD_REQUEST: {"description": "The `page_token` is invalid."},
+    },
+)
+async def search_files(
+    request: Request,
+    query_params: SearchFilesQueryParams = Depends(),
+) -> SearchFilesResponse:
+    """
+    Find files by path, content type, size and last-modified time, sorted by any of them.
+
+    Searches are answered by a local index of the files' metadata rather than by listing the bucket.
+    Files uploaded or deleted through this API are indexed right away, while changes made by
+    other means, e.g. presigned URLs, are picked up by a periodic crawl of the bucket.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_index = get_metadata_index(request.app)
+    query = IndexQuery(
+        prefix=query_params.directory,
+        key_contains=query_params.path_contains,
+        content_type=query_params.content_type,
+        min_size=query_params.min_size_bytes,
+        max_size=query_params.max_size_bytes,
+        modified_after=query_params.modified_after,
+        modified_before=query_params.modified_before,
+        sort_by=SORT_BY_INDEX_COLUMN[query_params.sort_by],  # type: ignore[arg-type]
+        descending=query_params.order == "desc",
+        limit=query_params.page_size,
+        page_token=query_params.page_token,
+    )
+    try:
+        # SQLite releases the GIL while it runs a query, so other requests are served in the meantime
+        page = await run_in_threadpool(metadata_index.search, settings.s3_bucket_name, query)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+
+    return SearchFilesResponse(
+        files=[
+            SearchedFileMetadata(
+                file_path=obj.key,
+                last_modified=obj.last_modified,
+                size_bytes=obj.size,
+                content_type=obj.content_type,
+            )
+            for obj in page.objects
+        ],
+        next_page_token=page.next_page_token,
+    )
+
+
+@SEARCH_ROUTER.get("/v1/directory-stats", responses=INDEX_DISABLED_RESPONSE)
+async def get_directory_stats(
+    request: Request,
+    directory: str = Query("", description="The directory, e.g. `path/to/`. Empty for the whole bucket."),
+) -> GetDirectoryStatsResponse:
+    """
+    Get the number, total size and last-modified range of the files in a directory and all of its subdirectories.
+
+    The stats are kept up to date in the metadata index as files are uploaded and deleted, so they
+    take the same time to get for a directory of millions of files as for one of a single file.
+    """
+    settings: Settings = request.app.state.settings
+    metadata_index = get_metadata_index(request.app)
+    prefix = f"{directory.rstrip('/')}/" if directory.strip("/") else ""
+    stats: PrefixStats = await run_in_threadpool(metadata_index.get_prefix_stats, settings.s3_bucket_name, prefix)
+    return GetDirectoryStatsResponse(
+        directory=stats.prefix,
+        file_count=stats.object_count,
+        total_size_bytes=stats.total_size,
+        first_modified=stats.first_modified,
+        last_modified=stats.last_modified,
+    )
+
+
+@SEARCH_ROUTER.post(
+    "/v1/search/reindex",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=GetJobResponse,
+    responses={
+        **INDEX_DISABLED_RESPONSE,
+        status.HTTP_400_BAD_REQUEST: {"description": "Background jobs are disabled."},
+    },
+)
+async def reindex_files(request: Request) -> Response:
+    """
+    Crawl the bucket in a background job to bring the metadata index up to date, without waiting for the next crawl.
+
+    Poll the URL in the `Location` header for the job's progress.
+    """
+    job = start_reconcile_metadata_index_job(request.app)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job_to_response(job).model_dump(mode="json"),
+        headers={"Location": f"/v1/jobs/{job.job_id}"},
+    )
+
+
+def get_metadata_index(app: FastAPI) -> ObjectMetadataIndex:
+    """Return the app's metadata index, or fail the request with a 404 if it's disabled."""
+    metadata_index: Optional[ObjectMetadataIndex] = app.state.metadata_index
+    if not metadata_index:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The metadata index is disabled")
+    return metadata_index
+
+
+def start_reconcile_metadata_index_job(app: FastAPI) -> Job:
+    """Submit a background job that crawls the whole bucket into the metadata index."""
+    settings: Settings = app.state.settings
+    jobs = get_job_registry(app)
+    s3_backend: AsyncS3Backend = app.state.s3_backend
+    metadata_index = get_metadata_index(app)
+    s3_client = s3_backend.clients.get_client()
+
+    def reconcile(context: JobContext) -> None:
+        context.increment("indexed_count", 0)
+        result = reconcile_metadata_index(
+            settings.s3_bucket_name,
+            metadata_index,
+            s3_client=s3_client,
+            max_concurrency=settings.s3_list_max_concurrency,
+            on_page_indexed=lambda indexed_count: context.increment("indexed_count", indexed_count),
+        )
+        context.increment("removed_count", result.removed_count)
+
+    return jobs.submit(kind="reconcile-metadata-index", func=reconcile)
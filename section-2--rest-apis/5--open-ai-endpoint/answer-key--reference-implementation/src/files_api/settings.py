@@ -1,8 +1,24 @@
-from pydantic import Field
+from typing import (
+    Literal,
+    Optional,
+)
+
+from pydantic import (
+    Field,
+    SecretStr,
+    field_validator,
+    model_validator,
+)
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
 )
+from typing_extensions import Self
+
+from files_api.s3.codecs import (
+    StorageEncoding,
+    is_codec_available,
+)
 
 
 class Settings(BaseSettings):
@@ -15,4 +31,257 @@ class Settings(BaseSettings):
 
     s3_bucket_name: str = Field(...)
 
+    # S3 client connection pooling, see https://botocore.amazonaws.com/v1/documentation/api/latest/reference/config.html
+    s3_max_pool_connections: int = Field(
+        50,
+        ge=1,
+        description="Maximum number of pooled connections kept open by the shared S3 client.",
+    )
+    s3_connect_timeout_seconds: float = Field(5, gt=0, description="Seconds to wait while connecting to S3.")
+    s3_read_timeout_seconds: float = Field(60, gt=0, description="Seconds to wait for S3 to respond.")
+    s3_retry_mode: Literal["legacy", "standard", "adaptive"] = Field(
+        "standard",
+        description="botocore retry mode used by the shared S3 client.",
+    )
+    s3_max_attempts: int = Field(3, ge=1, description="Maximum attempts per S3 request, including the first.")
+    s3_tcp_keepalive: bool = Field(True, description="Enable TCP keep-alive on pooled S3 connections.")
+
+    s3_backend: Literal["threadpool", "blocking"] = Field(
+        "threadpool",
+        description="How routes call S3: offloaded to worker threads, or inline on the event loop.",
+    )
+    s3_max_concurrency: int = Field(
+        40,
+        ge=1,
+        description="Maximum number of S3 calls running in worker threads at once.",
+    )
+
+    s3_multipart_threshold_bytes: int = Field(
+        8 * 1024**2,
+        ge=1,
+        description="Uploads of at least this many bytes are sent to S3 as a multipart upload.",
+    )
+    s3_multipart_chunksize_bytes: int = Field(
+        8 * 1024**2,
+        ge=5 * 1024**2,
+        description="Size of each part of a multipart upload. S3 requires at least 5 MiB.",
+    )
+    s3_multipart_max_concurrency: int = Field(
+        4,
+        ge=1,
+        description="Parts of a single multipart upload sent in parallel; also bounds parts held in memory.",
+    )
+
+    upload_dedup_enabled: bool = Field(
+        False,
+        description=(
+            "Hash each file uploaded with `PUT /v1/files/...` and skip sending it to S3 "
+            "when the file at that path already has the same SHA-256 and content type."
+        ),
+    )
+
+    storage_compression: Optional[StorageEncoding] = Field(
+        None,
+        description=(
+            "Compress text-like files, e.g. JSON, CSV or logs, with this codec as they're uploaded with "
+            "`PUT /v1/files/...`. `zstd` requires the `zstandard` package. Files already stored compressed "
+            "are served either way. Listings, searches and directory stats report the size of such files as "
+            "stored, i.e. compressed."
+        ),
+    )
+
+    s3_upload_max_concurrency: int = Field(
+        16,
+        ge=1,
+        description="Files uploaded in parallel by a bulk upload.",
+    )
+    bulk_upload_max_file_bytes: int = Field(
+        64 * 1024**2,
+        ge=1,
+        description="Largest file accepted by a bulk upload. Larger files must be uploaded one at a time.",
+    )
+    s3_delete_max_concurrency: int = Field(
+        8,
+        ge=1,
+        description="Batches of up to 1000 keys deleted in parallel by a bulk delete.",
+    )
+
+    s3_list_max_concurrency: int = Field(
+        8,
+        ge=1,
+        description="Subdirectories listed in parallel by full listings and counts of a directory.",
+    )
+    list_files_full_listing_max_files: int = Field(
+        100_000,
+        ge=1,
+        description="Most files returned by a full listing; larger directories must be paged through or counted.",
+    )
+
+    page_token_secret: Optional[SecretStr] = Field(
+        None,
+        description=(
+            "Key that signs the page tokens of file listings so that clients can't forge them. Set the same key on "
+            "every instance of the API. If unset, a key derived from the bucket name is used, which every instance "
+            "shares but anyone can compute: tokens can then be forged, and are only checked like any other input."
+        ),
+    )
+
+    s3_copy_multipart_threshold_bytes: int = Field(
+        1024**3,
+        ge=5 * 1024**2,
+        le=5 * 1024**3,
+        description="Files of at least this many bytes are copied in parallel parts. S3 can't copy over 5 GiB in one go.",
+    )
+    s3_copy_multipart_chunksize_bytes: int = Field(
+        256 * 1024**2,
+        ge=5 * 1024**2,
+        le=5 * 1024**3,
+        description="Size of each part of a multipart copy.",
+    )
+    s3_copy_max_concurrency: int = Field(
+        8,
+        ge=1,
+        description="Files copied in parallel when copying or moving a directory, and parts per multipart copy.",
+    )
+
+    presigned_url_expiration_seconds: int = Field(
+        3600,
+        ge=1,
+        le=7 * 24 * 3600,
+        description="Seconds for which presigned upload and download URLs are valid. S3 allows at most 7 days.",
+    )
+    presigned_multipart_part_size_bytes: int = Field(
+        64 * 1024**2,
+        ge=5 * 1024**2,
+        le=5 * 1024**3,
+        description="Size of the parts of multipart uploads sent by clients straight to S3.",
+    )
+
+    background_jobs_enabled: bool = Field(
+        True,
+        description=(
+            "Run recursive deletes, copies and moves, and reindexing, in background jobs that clients poll. "
+            "Disable it where the process doesn't outlive the request that started a job, e.g. on AWS Lambda; "
+            "such requests are then refused."
+        ),
+    )
+    jobs_max_workers: int = Field(
+        2,
+        ge=1,
+        description="Maximum number of background jobs, e.g. recursive deletes, running at once.",
+    )
+
+    archive_prefetch_count: int = Field(
+        8,
+        ge=1,
+        description="Files fetched from S3 ahead of the one being written when streaming a directory as an archive.",
+    )
+    archive_prefetch_max_object_bytes: int = Field(
+        1024**2,
+        ge=0,
+        description="Files up to this size are read in full while prefetched; larger ones are streamed when reached.",
+    )
+
+    s3_download_chunk_size_bytes: int = Field(
+        256 * 1024,
+        ge=1024,
+        description="Size of the chunks read from S3 and written to the client when streaming a file.",
+    )
+
+    response_compression_enabled: bool = Field(
+        True,
+        description="Compress responses with zstd, brotli or gzip for clients that accept it.",
+    )
+    response_compression_minimum_size_bytes: int = Field(
+        1024,
+        ge=0,
+        description="Responses smaller than this are sent uncompressed; compressing them saves less than it costs.",
+    )
+
+    metadata_cache_enabled: bool = Field(
+        False,
+        description=(
+            "Cache the size, content type, ETag and last-modified time of recently used files in memory. "
+            "Changes made by other instances of the API, or uploaded with presigned URLs, are only seen once "
+            "the cached entry expires."
+        ),
+    )
+    metadata_cache_max_entries: int = Field(
+        10_000,
+        ge=1,
+        description="Maximum number of files whose metadata is cached; least recently used entries are evicted.",
+    )
+    metadata_cache_ttl_seconds: float = Field(
+        10,
+        gt=0,
+        description="Seconds that cached metadata is trusted. Bounds how stale changes made by other processes can be.",
+    )
+
+    content_cache_enabled: bool = Field(
+        False,
+        description=(
+            "Cache the content of small files in memory. "
+            "Requires the metadata cache, which tells whether the cached content is still current."
+        ),
+    )
+    content_cache_max_object_bytes: int = Field(
+        1024**2,
+        ge=0,
+        description="Files larger than this are never cached.",
+    )
+    content_cache_max_memory_bytes: int = Field(
+        64 * 1024**2,
+        ge=0,
+        description="Maximum total size of the file content cached in memory.",
+    )
+    content_cache_spill_dir: Optional[str] = Field(
+        None,
+        description="Directory to which content evicted from memory is spilled, and read back from with mmap.",
+    )
+    content_cache_max_spill_bytes: int = Field(
+        1024**3,
+        ge=0,
+        description="Maximum total size of the file content spilled to `content_cache_spill_dir`.",
+    )
+
+    metadata_index_enabled: bool = Field(
+        False,
+        description=(
+            "Keep a local index of the metadata of every file, to search files with `GET /v1/search/files`. "
+            "Requires background jobs, which crawl the bucket into the index."
+        ),
+    )
+    metadata_index_path: str = Field(
+        ":memory:",
+        description="SQLite database file of the metadata index. `:memory:` rebuilds the index on every start.",
+    )
+    metadata_index_reconcile_interval_seconds: float = Field(
+        300,
+        gt=0,
+        description="Seconds between crawls of the bucket that pick up changes made outside of this process.",
+    )
+
     model_config = SettingsConfigDict(case_sensitive=False)
+
+    @field_validator("storage_compression")
+    @classmethod
+    def check_storage_compression_codec_is_installed(
+        cls, storage_compression: Optional[StorageEncoding]
+    ) -> Optional[StorageEncoding]:
+        if storage_compression and not is_codec_available(storage_compression):
+            raise ValueError(f"The {storage_compression} codec isn't installed")
+        return storage_compression
+
+    @model_validator(mode="after")
+    def check_content_cache_has_metadata_cache(self) -> Self:
+        # the content cache is keyed by ETag, which only the metadata cache provides without calling S3
+        if self.content_cache_enabled and not self.metadata_cache_enabled:
+            raise ValueError("content_cache_enabled requires metadata_cache_enabled")
+        return self
+
+    @model_validator(mode="after")
+    def check_metadata_index_has_background_jobs(self) -> Self:
+        # without the crawls, the index would only ever hold the files written through this process
+        if self.metadata_index_enabled and not self.background_jobs_enabled:
+            raise ValueError("metadata_index_enabled requires background_jobs_enabled")
+        return self
@@ -0,0 +1,41 @@
+"""Test cases for `s3.aio`."""
+
+import threading
+
+import anyio
+
+from files_api.s3.aio import AsyncS3Backend
+from files_api.s3.clients import S3ClientRegistry
+from files_api.s3.read_objects import object_exists_in_s3
+from files_api.s3.write_objects import upload_s3_object
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_threadpool_backend_calls_s3_off_the_event_loop(mocked_aws: None):
+    """Assert that `threadpool` mode runs helpers in a worker thread using the shared client."""
+    backend = AsyncS3Backend(clients=S3ClientRegistry(), mode="threadpool")
+    calling_threads = []
+
+    def record_thread(s3_client) -> bool:
+        calling_threads.append(threading.current_thread())
+        return s3_client is backend.clients.get_client()
+
+    async def main():
+        await backend.call(upload_s3_object, TEST_BUCKET_NAME, "testfile.txt", b"test content")
+        assert await backend.call(object_exists_in_s3, TEST_BUCKET_NAME, object_key="testfile.txt") is True
+        assert await backend.call(record_thread) is True
+
+    anyio.run(main)
+    assert calling_threads != [threading.main_thread()]
+
+
+# pylint: disable=unused-argument
+def test_blocking_backend_calls_s3_inline(mocked_aws: None):
+    """Assert that `blocking` mode runs helpers on the event loop thread."""
+    backend = AsyncS3Backend(clients=S3ClientRegistry(), mode="blocking")
+
+    async def main():
+        return await backend.call(lambda s3_client: threading.current_thread())
+
+    assert anyio.run(main) is threading.main_thread()
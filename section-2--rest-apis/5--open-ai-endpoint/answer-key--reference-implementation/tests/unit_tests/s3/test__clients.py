@@ -0,0 +1,37 @@
+"""Test cases for `s3.clients`."""
+
+from files_api.s3.clients import S3ClientRegistry
+from files_api.s3.write_objects import upload_s3_object
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_registry_reuses_client(mocked_aws: None):
+    """Assert that the registry hands out the same pooled client on every call."""
+    registry = S3ClientRegistry(max_pool_connections=7, retry_mode="adaptive", max_attempts=5)
+    s3_client = registry.get_client()
+    assert registry.get_client() is s3_client
+    assert s3_client.meta.config.max_pool_connections == 7
+    assert s3_client.meta.config.retries == {"mode": "adaptive", "total_max_attempts": 5}
+
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"test content", s3_client=s3_client)
+    assert s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")["ContentLength"] == 12
+
+
+# pylint: disable=unused-argument
+def test_registry_close(mocked_aws: None):
+    """Assert that closing the registry discards its clients so new ones are created on next use."""
+    registry = S3ClientRegistry()
+    s3_client = registry.get_client()
+    registry.close()
+    assert registry.get_client() is not s3_client
+
+
+# pylint: disable=unused-argument
+def test_registry_prewarm(mocked_aws: None):
+    """Assert that prewarming creates the client that requests then reuse."""
+    registry = S3ClientRegistry()
+    registry.prewarm()
+    s3_client = registry.get_client()
+    registry.prewarm()
+    assert registry.get_client() is s3_client
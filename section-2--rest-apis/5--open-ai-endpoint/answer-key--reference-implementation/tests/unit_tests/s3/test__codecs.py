@@ -0,0 +1,72 @@
+"""Test cases for `s3.codecs`."""
+
+import gzip
+from io import BytesIO
+
+import pytest
+
+from files_api.s3 import codecs
+from files_api.s3.codecs import (
+    UNCOMPRESSED_SIZE_METADATA_KEY,
+    CompressingReader,
+    decompress,
+    get_uncompressed_size,
+    is_compressible,
+    iter_decompressed,
+)
+
+CONTENT = b"".join(f'{{"line": {i}, "text": "some repetitive text"}}\n'.encode() for i in range(10_000))
+
+requires_zstandard = pytest.mark.skipif(codecs.zstandard is None, reason="zstandard is not installed")
+
+
+@pytest.mark.parametrize(
+    "content_type, expected",
+    [
+        ("text/plain", True),
+        ("text/csv; charset=utf-8", True),
+        ("application/json", True),
+        ("application/vnd.api+json", True),
+        ("image/svg+xml", True),
+        ("image/png", False),
+        ("application/zip", False),
+        ("application/octet-stream", False),
+        (None, False),
+    ],
+)
+def test_is_compressible(content_type, expected):
+    assert is_compressible(content_type) is expected
+
+
+def test_get_uncompressed_size():
+    assert get_uncompressed_size({"Metadata": {UNCOMPRESSED_SIZE_METADATA_KEY: "60000"}}) == 60000
+    # missing, e.g. on objects compressed by something else, or unusable
+    assert get_uncompressed_size({}) is None
+    assert get_uncompressed_size({"Metadata": {UNCOMPRESSED_SIZE_METADATA_KEY: "-1"}}) is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=requires_zstandard)])
+def test_compressing_reader_round_trip(encoding):
+    reader = CompressingReader(BytesIO(CONTENT), encoding, chunk_size=4096)
+    compressed = b""
+    # small reads, to span the reader's chunks
+    while chunk := reader.read(1000):
+        compressed += chunk
+
+    assert len(compressed) < len(CONTENT) / 5
+    assert decompress(compressed, encoding) == CONTENT
+    chunks = [compressed[slice(i, i + 777)] for i in range(0, len(compressed), 777)]
+    assert b"".join(iter_decompressed(chunks, encoding)) == CONTENT
+
+
+def test_compressing_reader_writes_standard_gzip():
+    assert gzip.decompress(CompressingReader(BytesIO(CONTENT), "gzip").read()) == CONTENT
+
+
+def test_compressing_reader_of_empty_file():
+    assert decompress(CompressingReader(BytesIO(b""), "gzip").read(), "gzip") == b""
+
+
+def test_unsupported_encoding():
+    with pytest.raises(ValueError):
+        CompressingReader(BytesIO(CONTENT), "br")  # type: ignore[arg-type]
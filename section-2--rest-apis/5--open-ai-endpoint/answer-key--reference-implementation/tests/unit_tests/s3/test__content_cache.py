@@ -0,0 +1,94 @@
+"""Test cases for `s3.content_cache`."""
+
+import os
+from pathlib import Path
+
+import boto3
+
+from files_api.s3.content_cache import ObjectContentCache
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.read_objects import fetch_s3_object
+from files_api.s3.write_objects import upload_s3_object
+from tests.consts import TEST_BUCKET_NAME
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = ObjectContentCache(max_object_bytes=10, max_memory_bytes=20)
+    cache.put(TEST_BUCKET_NAME, "a.txt", etag='"a"', content=b"a" * 10)
+    cache.put(TEST_BUCKET_NAME, "b.txt", etag='"b"', content=b"b" * 10)
+    cache.put(TEST_BUCKET_NAME, "too-big.txt", etag='"c"', content=b"c" * 11)
+    assert cache.get(TEST_BUCKET_NAME, "too-big.txt", etag='"c"') is None
+
+    # a.txt is the least recently used once c.txt no longer fits next to it
+    cache.put(TEST_BUCKET_NAME, "c.txt", etag='"c"', content=b"c" * 5)
+    assert cache.get(TEST_BUCKET_NAME, "a.txt", etag='"a"') is None
+    assert cache.get(TEST_BUCKET_NAME, "b.txt", etag='"b"') == b"b" * 10
+    assert cache.stats.memory_bytes == 15
+    assert cache.stats.evictions == 1
+
+
+def test_entries_are_keyed_by_etag():
+    cache = ObjectContentCache()
+    cache.put(TEST_BUCKET_NAME, "a.txt", etag='"v1"', content=b"version 1")
+    assert cache.get(TEST_BUCKET_NAME, "a.txt", etag='"v2"') is None
+    assert cache.get(TEST_BUCKET_NAME, "a.txt", etag='"v1"') == b"version 1"
+
+
+def test_evicted_content_spills_to_disk(tmp_path: Path):
+    cache = ObjectContentCache(max_object_bytes=10, max_memory_bytes=10, spill_dir=str(tmp_path), max_spill_bytes=15)
+    cache.put(TEST_BUCKET_NAME, "a.txt", etag='"a"', content=b"a" * 10)
+    cache.put(TEST_BUCKET_NAME, "b.txt", etag='"b"', content=b"b" * 10)
+    assert cache.stats.spill_bytes == 10
+
+    spilled_content = cache.get(TEST_BUCKET_NAME, "a.txt", etag='"a"')
+    assert spilled_content is not None
+    assert spilled_content[:] == b"a" * 10
+    # every hit is served from the same mapping
+    assert cache.get(TEST_BUCKET_NAME, "a.txt", etag='"a"') is spilled_content
+
+    # spilling b.txt evicts a.txt from disk, which only has room for one of them
+    cache.put(TEST_BUCKET_NAME, "c.txt", etag='"c"', content=b"c" * 10)
+    assert cache.get(TEST_BUCKET_NAME, "a.txt", etag='"a"') is None
+    spilled_content = cache.get(TEST_BUCKET_NAME, "b.txt", etag='"b"')
+    assert spilled_content[:] == b"b" * 10
+    assert cache.stats.spill_bytes == 10
+
+    cache.close()
+    assert spilled_content.closed
+    assert os.listdir(tmp_path) == []
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_serves_cached_content(mocked_aws):
+    s3_client = boto3.client("s3")
+    metadata_cache = ObjectMetadataCache()
+    content_cache = ObjectContentCache()
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"test content", content_type="text/plain")
+
+    s3_operations = []
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+
+    for _ in range(3):
+        response = fetch_s3_object(
+            TEST_BUCKET_NAME,
+            "testfile.txt",
+            metadata_cache=metadata_cache,
+            content_cache=content_cache,
+            s3_client=s3_client,
+        )
+        assert b"".join(response["Body"].iter_chunks(4)) == b"test content"
+        assert response["ContentType"] == "text/plain"
+        assert response["ContentLength"] == len(b"test content")
+    assert s3_operations == ["GetObject"]
+
+    # overwriting the object invalidates its metadata, so the new version is fetched from S3
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"new content", metadata_cache=metadata_cache)
+    response = fetch_s3_object(
+        TEST_BUCKET_NAME,
+        "testfile.txt",
+        metadata_cache=metadata_cache,
+        content_cache=content_cache,
+        s3_client=s3_client,
+    )
+    assert response["Body"].read() == b"new content"
+    assert s3_operations == ["GetObject", "GetObject"]
@@ -0,0 +1,119 @@
+"""Test cases for `s3.copy_objects`."""
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from files_api.s3.copy_objects import (
+    CopyOptions,
+    copy_s3_object,
+    copy_s3_objects_by_prefix,
+    move_s3_object,
+)
+from files_api.s3.read_objects import (
+    is_object_not_found_error,
+    object_exists_in_s3,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_copy_s3_object(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="a.txt", Body=b"test content", ContentType="text/plain")
+
+    s3_operations = []
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+    copy_s3_object(TEST_BUCKET_NAME, "a.txt", "b.txt", s3_client=s3_client)
+
+    assert s3_operations == ["HeadObject", "CopyObject"]
+    copy = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="b.txt")
+    assert copy["Body"].read() == b"test content"
+    assert copy["ContentType"] == "text/plain"
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "a.txt", s3_client=s3_client)
+
+
+# pylint: disable=unused-argument
+def test_copy_large_s3_object_in_parts(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    content = bytes(range(256)) * (12 * 1024**2 // 256)
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="large.bin", Body=content, ContentType="image/png")
+
+    s3_operations = []
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+    options = CopyOptions(multipart_threshold=5 * 1024**2, multipart_chunksize=5 * 1024**2)
+    copy_s3_object(TEST_BUCKET_NAME, "large.bin", "copy.bin", s3_client=s3_client, options=options)
+
+    assert s3_operations.count("UploadPartCopy") == 3
+    assert "CopyObject" not in s3_operations
+    copy = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="copy.bin")
+    assert copy["Body"].read() == content
+    assert copy["ContentType"] == "image/png"
+
+
+# pylint: disable=unused-argument
+def test_copy_nonexistent_s3_object(mocked_aws: None):
+    with pytest.raises(ClientError) as exc_info:
+        copy_s3_object(TEST_BUCKET_NAME, "nonexistent.txt", "b.txt")
+    assert is_object_not_found_error(exc_info.value)
+
+
+# pylint: disable=unused-argument
+def test_move_s3_object(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="a.txt", Body=b"test content")
+
+    move_s3_object(TEST_BUCKET_NAME, "a.txt", "b.txt", s3_client=s3_client)
+
+    assert not object_exists_in_s3(TEST_BUCKET_NAME, "a.txt", s3_client=s3_client)
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="b.txt")["Body"].read() == b"test content"
+
+
+# pylint: disable=unused-argument
+def test_move_s3_objects_by_prefix(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    object_keys = [f"dir/file-{i}.txt" for i in range(1200)] + ["directory.txt"]
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=object_key.encode())
+
+    page_results = []
+    result = copy_s3_objects_by_prefix(
+        TEST_BUCKET_NAME,
+        "dir/",
+        "moved/",
+        s3_client=s3_client,
+        delete_source=True,
+        on_page_copied=page_results.append,
+    )
+
+    assert result.copied_count == 1200
+    assert result.errors == []
+    assert [page_result.copied_count for page_result in page_results] == [1000, 200]
+    paginator = s3_client.get_paginator("list_objects_v2")
+    remaining_keys = [obj["Key"] for page in paginator.paginate(Bucket=TEST_BUCKET_NAME) for obj in page["Contents"]]
+    assert sorted(remaining_keys) == sorted(["directory.txt"] + [f"moved/file-{i}.txt" for i in range(1200)])
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="moved/file-7.txt")["Body"].read() == b"dir/file-7.txt"
+
+
+# pylint: disable=unused-argument
+def test_move_s3_objects_by_prefix_keeps_sources_that_failed_to_copy(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/a.txt", "dir/b.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+    def fail_copying_b(params, **_):
+        if params["Key"] == "moved/b.txt":
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "CopyObject")
+
+    s3_client.meta.events.register("before-parameter-build.s3.CopyObject", fail_copying_b)
+    result = copy_s3_objects_by_prefix(TEST_BUCKET_NAME, "dir/", "moved/", s3_client=s3_client, delete_source=True)
+
+    assert result.copied_count == 1
+    assert [(error.object_key, error.code) for error in result.errors] == [("dir/b.txt", "AccessDenied")]
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "dir/b.txt", s3_client=s3_client)
+    assert not object_exists_in_s3(TEST_BUCKET_NAME, "dir/a.txt", s3_client=s3_client)
+
+
+def test_copy_s3_objects_into_themselves_is_rejected():
+    with pytest.raises(ValueError):
+        copy_s3_objects_by_prefix(TEST_BUCKET_NAME, "dir/", "dir/nested/")
@@ -1,8 +1,13 @@
 """Test cases for `s3.delete_objects`."""
 
 import boto3
+from botocore.exceptions import ClientError
 
-from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3.delete_objects import (
+    delete_s3_object,
+    delete_s3_objects,
+    delete_s3_objects_by_prefix,
+)
 from files_api.s3.read_objects import object_exists_in_s3
 from files_api.s3.write_objects import upload_s3_object
 from tests.consts import TEST_BUCKET_NAME
@@ -26,3 +31,52 @@ def test_delete_nonexistent_s3_object(mocked_aws: None):
     delete_s3_object(TEST_BUCKET_NAME, "testfile.txt")
     # the file should still not be present
     assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt") is False
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_in_batches(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    object_keys = [f"dir/file-{i}.txt" for i in range(2500)]
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+    s3_operations = []
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+
+    result = delete_s3_objects(TEST_BUCKET_NAME, object_keys + ["nonexistent.txt"], s3_client=s3_client)
+
+    assert result.deleted_count == 2501
+    assert result.errors == []
+    assert s3_operations == ["DeleteObjects"] * 3
+    assert not s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME).get("Contents")
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_by_prefix(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/a.txt", "dir/nested/b.txt", "directory.txt", "other/c.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+    result = delete_s3_objects_by_prefix(TEST_BUCKET_NAME, "dir/", s3_client=s3_client)
+
+    assert result.deleted_count == 2
+    remaining_keys = [obj["Key"] for obj in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["Contents"]]
+    assert remaining_keys == ["directory.txt", "other/c.txt"]
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_reports_failures_per_key(mocked_aws: None):
+    s3_client = boto3.client("s3")
+
+    def fail_delete_objects(**_kwargs):
+        raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "DeleteObjects")
+
+    s3_client.meta.events.register("before-call.s3.DeleteObjects", fail_delete_objects)
+
+    result = delete_s3_objects(TEST_BUCKET_NAME, ["a.txt", "b.txt"], s3_client=s3_client)
+
+    assert result.deleted_count == 0
+    assert [(error.object_key, error.code) for error in result.errors] == [
+        ("a.txt", "AccessDenied"),
+        ("b.txt", "AccessDenied"),
+    ]
@@ -0,0 +1,128 @@
+"""Test cases for `s3.metadata_cache`."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3.metadata_cache import (
+    CachedObjectMetadata,
+    ObjectMetadataCache,
+)
+from files_api.s3.read_objects import (
+    fetch_s3_object,
+    fetch_s3_object_metadata,
+    object_exists_in_s3,
+)
+from files_api.s3.write_objects import upload_s3_object
+from tests.consts import TEST_BUCKET_NAME
+
+METADATA = CachedObjectMetadata(
+    content_length=12,
+    content_type="text/plain",
+    etag='"abc"',
+    last_modified=datetime(2022, 1, 1, 12, 0, 0, 500_000, tzinfo=timezone.utc),
+)
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = ObjectMetadataCache(max_entries=2)
+    cache.put(TEST_BUCKET_NAME, "a.txt", METADATA)
+    cache.put(TEST_BUCKET_NAME, "b.txt", METADATA)
+    assert cache.get(TEST_BUCKET_NAME, "a.txt") == METADATA  # a.txt is now the most recently used
+
+    cache.put(TEST_BUCKET_NAME, "c.txt", METADATA)
+
+    assert cache.get(TEST_BUCKET_NAME, "b.txt") is None
+    assert cache.get(TEST_BUCKET_NAME, "a.txt") == METADATA
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 2
+
+
+def test_cache_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ObjectMetadataCache(ttl_seconds=10, clock=clock)
+    cache.put(TEST_BUCKET_NAME, "a.txt", METADATA)
+
+    clock.now = 9.9
+    assert cache.get(TEST_BUCKET_NAME, "a.txt") == METADATA
+
+    clock.now = 10
+    assert cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.entries == 0
+
+
+def test_cached_metadata_evaluates_preconditions():
+    assert METADATA.is_not_modified(if_none_match='"abc"')
+    assert METADATA.is_not_modified(if_none_match='"xyz", W/"abc"')
+    assert METADATA.is_not_modified(if_none_match="*")
+    assert not METADATA.is_not_modified(if_none_match='"xyz"')
+
+    # If-Modified-Since has a resolution of one second, so a date in the same second is "not modified"
+    assert METADATA.is_not_modified(if_modified_since=datetime(2022, 1, 1, 12, 0, 0, tzinfo=timezone.utc))
+    assert not METADATA.is_not_modified(if_modified_since=datetime(2022, 1, 1, 11, 59, 59, tzinfo=timezone.utc))
+    assert not METADATA.is_not_modified()
+
+
+# pylint: disable=unused-argument
+def test_reads_are_served_from_the_cache(mocked_aws):
+    s3_client = boto3.client("s3")
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"test content", content_type="text/plain")
+    cache = ObjectMetadataCache()
+
+    s3_operations = []
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt", s3_client=s3_client, metadata_cache=cache)
+    metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", s3_client=s3_client, metadata_cache=cache)
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt", s3_client=s3_client, metadata_cache=cache)
+
+    assert s3_operations == ["HeadObject"]
+    assert metadata["ContentLength"] == len(b"test content")
+    assert metadata["ContentType"] == "text/plain"
+    assert cache.stats.hits == 2
+
+    # a conditional GET for the cached ETag is answered with a "304" without calling S3
+    with pytest.raises(ClientError) as exc_info:
+        fetch_s3_object(
+            TEST_BUCKET_NAME,
+            "testfile.txt",
+            if_none_match=metadata["ETag"],
+            s3_client=s3_client,
+            metadata_cache=cache,
+        )
+    assert exc_info.value.response["Error"]["Code"] == "304"
+    assert exc_info.value.response["ResponseMetadata"]["HTTPHeaders"]["etag"] == metadata["ETag"]
+    assert s3_operations == ["HeadObject"]
+
+
+# pylint: disable=unused-argument
+def test_writes_and_deletes_invalidate_the_cache(mocked_aws):
+    cache = ObjectMetadataCache()
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"test content", metadata_cache=cache)
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=cache)["ContentLength"] == 12
+
+    upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", b"new content!!", metadata_cache=cache)
+    assert cache.get(TEST_BUCKET_NAME, "testfile.txt") is None
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=cache)["ContentLength"] == 13
+
+    delete_s3_object(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=cache)
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=cache) is False
+    assert cache.stats.invalidations == 2
@@ -0,0 +1,205 @@
+"""Test cases for `s3.metadata_index`."""
+
+import io
+import sqlite3
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import boto3
+import pytest
+
+from files_api.s3.copy_objects import move_s3_object
+from files_api.s3.delete_objects import delete_s3_objects
+from files_api.s3.metadata_index import (
+    IndexedObject,
+    IndexQuery,
+    ObjectMetadataIndex,
+    get_body_size,
+    reconcile_metadata_index,
+)
+from files_api.s3.write_objects import (
+    upload_s3_object,
+    upload_s3_object_from_file,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+OBJECTS = [
+    IndexedObject("a/1.csv", 300, datetime(2024, 1, 3, tzinfo=timezone.utc), content_type="text/csv"),
+    IndexedObject("a/2.png", 100, datetime(2024, 1, 1, tzinfo=timezone.utc), content_type="image/png"),
+    IndexedObject("a/b/3.jpg", 200, datetime(2024, 1, 2, tzinfo=timezone.utc), content_type="image/jpeg"),
+    IndexedObject("ab/4.png", 100, datetime(2024, 1, 4, tzinfo=timezone.utc), content_type="image/png"),
+    IndexedObject("c.txt", 500, datetime(2024, 1, 5, tzinfo=timezone.utc)),
+]
+
+
+def search_keys(metadata_index: ObjectMetadataIndex, **query) -> list:
+    return [obj.key for obj in metadata_index.search(TEST_BUCKET_NAME, IndexQuery(**query)).objects]
+
+
+def test_search_filters_and_sorts():
+    metadata_index = ObjectMetadataIndex()
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+    metadata_index.put("other-bucket", OBJECTS[0])
+
+    assert search_keys(metadata_index) == ["a/1.csv", "a/2.png", "a/b/3.jpg", "ab/4.png", "c.txt"]
+    assert search_keys(metadata_index, prefix="a/") == ["a/1.csv", "a/2.png", "a/b/3.jpg"]
+    assert search_keys(metadata_index, key_contains="b/") == ["a/b/3.jpg", "ab/4.png"]
+    assert search_keys(metadata_index, content_type="image/png") == ["a/2.png", "ab/4.png"]
+    assert search_keys(metadata_index, content_type="image/*") == ["a/2.png", "a/b/3.jpg", "ab/4.png"]
+    assert search_keys(metadata_index, min_size=200, max_size=300) == ["a/1.csv", "a/b/3.jpg"]
+    assert search_keys(
+        metadata_index,
+        modified_after=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        modified_before=datetime(2024, 1, 4, tzinfo=timezone.utc),
+    ) == ["a/1.csv", "a/b/3.jpg"]
+    assert search_keys(metadata_index, sort_by="size") == ["a/2.png", "ab/4.png", "a/b/3.jpg", "a/1.csv", "c.txt"]
+    assert search_keys(metadata_index, sort_by="last_modified", descending=True) == [
+        "c.txt",
+        "ab/4.png",
+        "a/1.csv",
+        "a/b/3.jpg",
+        "a/2.png",
+    ]
+
+
+def test_search_pages_through_ties():
+    metadata_index = ObjectMetadataIndex()
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+
+    object_keys = []
+    page_token = None
+    for _ in range(3):
+        query = IndexQuery(sort_by="size", descending=True, limit=2, page_token=page_token)
+        page = metadata_index.search(TEST_BUCKET_NAME, query)
+        object_keys.extend(obj.key for obj in page.objects)
+        page_token = page.next_page_token
+    assert page_token is None
+    assert object_keys == ["c.txt", "a/1.csv", "a/b/3.jpg", "ab/4.png", "a/2.png"]
+
+    with pytest.raises(ValueError):
+        metadata_index.search(TEST_BUCKET_NAME, IndexQuery(page_token="not a token"))
+
+
+def test_get_body_size():
+    body = io.BytesIO(b"0123456789")
+    body.seek(4)
+    assert get_body_size(body) == 6
+    assert body.tell() == 4
+    assert get_body_size(b"0123") == 4
+
+
+# pylint: disable=unused-argument
+def test_writes_and_deletes_update_the_index(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    metadata_index = ObjectMetadataIndex()
+
+    upload_s3_object(TEST_BUCKET_NAME, "a.txt", b"hello", "text/plain", metadata_index=metadata_index)
+    upload_s3_object_from_file(
+        TEST_BUCKET_NAME, "b.csv", io.BytesIO(b"x,y\n"), "text/csv", metadata_index=metadata_index
+    )
+    move_s3_object(TEST_BUCKET_NAME, "b.csv", "c.csv", s3_client=s3_client, metadata_index=metadata_index)
+
+    indexed_objects = metadata_index.search(TEST_BUCKET_NAME, IndexQuery()).objects
+    assert [(obj.key, obj.size, obj.content_type) for obj in indexed_objects] == [
+        ("a.txt", 5, "text/plain"),
+        ("c.csv", 4, "text/csv"),
+    ]
+    assert indexed_objects[0].etag == s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="a.txt")["ETag"]
+
+    delete_s3_objects(TEST_BUCKET_NAME, ["a.txt", "c.csv"], metadata_index=metadata_index)
+    assert search_keys(metadata_index) == []
+
+
+# pylint: disable=unused-argument
+def test_reconcile_metadata_index(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/a.txt", "dir/sub/b.json", "c.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"content", ContentType="text/plain")
+    metadata_index = ObjectMetadataIndex()
+    metadata_index.put(TEST_BUCKET_NAME, IndexedObject("deleted.txt", 1, datetime.now(timezone.utc)))
+
+    result = reconcile_metadata_index(TEST_BUCKET_NAME, metadata_index, s3_client=s3_client)
+
+    assert (result.indexed_count, result.removed_count) == (3, 1)
+    indexed_objects = metadata_index.search(TEST_BUCKET_NAME, IndexQuery()).objects
+    assert [(obj.key, obj.size, obj.content_type) for obj in indexed_objects] == [
+        ("c.txt", 7, "text/plain"),
+        ("dir/a.txt", 7, "text/plain"),
+        ("dir/sub/b.json", 7, "text/plain"),
+    ]
+
+    # unchanged objects keep their content type without another head_object call
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="c.txt")
+    result = reconcile_metadata_index(TEST_BUCKET_NAME, metadata_index, "dir/", s3_client, fetch_content_types=False)
+    assert (result.indexed_count, result.removed_count) == (2, 0)
+    assert search_keys(metadata_index, content_type="text/plain") == ["c.txt", "dir/a.txt", "dir/sub/b.json"]
+
+
+def stats_tuple(metadata_index: ObjectMetadataIndex, prefix: str) -> tuple:
+    stats = metadata_index.get_prefix_stats(TEST_BUCKET_NAME, prefix)
+    return stats.object_count, stats.total_size, stats.first_modified, stats.last_modified
+
+
+def test_prefix_stats_follow_writes_and_deletes():
+    metadata_index = ObjectMetadataIndex()
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+    metadata_index.put("other-bucket", OBJECTS[0])
+
+    assert stats_tuple(metadata_index, "") == (
+        5,
+        1200,
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        OBJECTS[4].last_modified,
+    )
+    assert stats_tuple(metadata_index, "a/") == (3, 600, OBJECTS[1].last_modified, OBJECTS[0].last_modified)
+    assert stats_tuple(metadata_index, "a/b/") == (1, 200, OBJECTS[2].last_modified, OBJECTS[2].last_modified)
+    assert stats_tuple(metadata_index, "missing/") == (0, 0, None, None)
+    with pytest.raises(ValueError):
+        metadata_index.get_prefix_stats(TEST_BUCKET_NAME, "a")
+
+    # deleting the oldest and overwriting the newest object of a directory recomputes its range
+    metadata_index.delete(TEST_BUCKET_NAME, "a/2.png")
+    metadata_index.put(TEST_BUCKET_NAME, IndexedObject("a/1.csv", 50, datetime(2023, 12, 1, tzinfo=timezone.utc)))
+    assert stats_tuple(metadata_index, "a/") == (
+        2,
+        250,
+        datetime(2023, 12, 1, tzinfo=timezone.utc),
+        OBJECTS[2].last_modified,
+    )
+    metadata_index.copy(TEST_BUCKET_NAME, "a/b/3.jpg", "a/b/4.jpg")
+    metadata_index.delete_many(TEST_BUCKET_NAME, ["a/b/3.jpg"])
+    assert stats_tuple(metadata_index, "a/b/")[slice(0, 2)] == (1, 200)
+    metadata_index.delete_many(TEST_BUCKET_NAME, ["a/b/4.jpg"])
+    assert stats_tuple(metadata_index, "a/b/") == (0, 0, None, None)
+    assert stats_tuple(metadata_index, "")[slice(0, 2)] == (3, 650)
+
+    stats_before_rebuild = [stats_tuple(metadata_index, prefix) for prefix in ["", "a/", "ab/"]]
+    metadata_index.rebuild_prefix_stats()
+    assert [stats_tuple(metadata_index, prefix) for prefix in ["", "a/", "ab/"]] == stats_before_rebuild
+
+
+def test_upserting_unchanged_objects_leaves_prefix_stats_alone():
+    metadata_index = ObjectMetadataIndex()
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+    # pylint: disable=protected-access
+    changes_before_upsert = metadata_index._connection.total_changes
+
+    # as a crawl does: the rows of the objects are rewritten, but none of their ancestors' stats
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+    assert metadata_index._connection.total_changes - changes_before_upsert == len(OBJECTS)
+    assert stats_tuple(metadata_index, "a/")[slice(0, 2)] == (3, 600)
+
+
+def test_prefix_stats_are_built_for_an_index_from_before_they_existed(tmp_path):
+    path = str(tmp_path / "index.db")
+    metadata_index = ObjectMetadataIndex(path)
+    metadata_index.put_many(TEST_BUCKET_NAME, OBJECTS)
+    metadata_index.close()
+    connection = sqlite3.connect(path)
+    connection.executescript("DROP TABLE prefix_stats; PRAGMA user_version = 0;")
+    connection.close()
+
+    metadata_index = ObjectMetadataIndex(path)
+    assert stats_tuple(metadata_index, "a/")[slice(0, 2)] == (3, 600)
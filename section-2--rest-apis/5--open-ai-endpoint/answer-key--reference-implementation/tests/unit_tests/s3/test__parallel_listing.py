@@ -0,0 +1,99 @@
+"""Test cases for `s3.parallel_listing`."""
+
+from itertools import islice
+
+import boto3
+
+from files_api.s3.parallel_listing import (
+    count_s3_objects_in_parallel,
+    discover_listing_shards,
+    iter_s3_objects_in_parallel,
+    list_s3_objects_in_parallel,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+OBJECT_KEYS = [
+    "a.txt",
+    "a/1.txt",
+    "a/b/2.txt",
+    "a/b/c/3.txt",
+    "a/z.txt",
+    "a-b.txt",
+    "b/1.txt",
+    "b/2/3.txt",
+    "c.txt",
+    "d/1.txt",
+]
+
+
+def put_objects(s3_client) -> None:
+    for object_key in OBJECT_KEYS:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"x" * len(object_key))
+
+
+# pylint: disable=unused-argument
+def test_discover_listing_shards(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_objects(s3_client)
+
+    shards = discover_listing_shards(TEST_BUCKET_NAME, s3_client=s3_client, min_shards=4, max_depth=2)
+
+    assert shards.prefixes == ["a/b/", "b/2/"]
+    assert [obj["Key"] for obj in shards.objects] == [
+        "a-b.txt",
+        "a.txt",
+        "a/1.txt",
+        "a/z.txt",
+        "b/1.txt",
+        "c.txt",
+        "d/1.txt",
+    ]
+
+
+# pylint: disable=unused-argument
+def test_discover_listing_shards_keeps_large_levels_whole(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_key in ["a/1.txt", "c/1.txt"] + [f"b/{i:04}.txt" for i in range(1001)]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+    shards = discover_listing_shards(TEST_BUCKET_NAME, s3_client=s3_client, min_shards=8, max_depth=2)
+
+    assert shards.prefixes == ["b/"]
+    assert [obj["Key"] for obj in shards.objects] == ["a/1.txt", "c/1.txt"]
+    object_keys = [obj["Key"] for obj in iter_s3_objects_in_parallel(TEST_BUCKET_NAME, s3_client=s3_client)]
+    assert object_keys == ["a/1.txt"] + [f"b/{i:04}.txt" for i in range(1001)] + ["c/1.txt"]
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_objects_in_parallel(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_objects(s3_client)
+
+    object_keys = [obj["Key"] for obj in iter_s3_objects_in_parallel(TEST_BUCKET_NAME, s3_client=s3_client)]
+    assert object_keys == sorted(OBJECT_KEYS)
+
+    object_keys = [obj["Key"] for obj in iter_s3_objects_in_parallel(TEST_BUCKET_NAME, "a/", s3_client=s3_client)]
+    assert object_keys == ["a/1.txt", "a/b/2.txt", "a/b/c/3.txt", "a/z.txt"]
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_objects_in_parallel_stops_early(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_objects(s3_client)
+
+    objects = iter_s3_objects_in_parallel(TEST_BUCKET_NAME, s3_client=s3_client, max_concurrency=2)
+    assert [obj["Key"] for obj in islice(objects, 3)] == sorted(OBJECT_KEYS)[:3]
+    objects.close()
+
+    assert len(list_s3_objects_in_parallel(TEST_BUCKET_NAME, s3_client=s3_client, max_objects=5)) == 5
+
+
+# pylint: disable=unused-argument
+def test_count_s3_objects_in_parallel(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_objects(s3_client)
+
+    object_count = count_s3_objects_in_parallel(TEST_BUCKET_NAME, s3_client=s3_client)
+
+    assert object_count.count == len(OBJECT_KEYS)
+    assert object_count.total_size == sum(len(object_key) for object_key in OBJECT_KEYS)
@@ -0,0 +1,71 @@
+"""Test cases for `s3.presigned_urls`."""
+
+import boto3
+import pytest
+import requests  # type: ignore
+from botocore.exceptions import ClientError
+
+from files_api.s3.presigned_urls import (
+    MAX_MULTIPART_PARTS,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_presigned_multipart_upload,
+    generate_presigned_download_url,
+    generate_presigned_upload_url,
+    get_multipart_part_size,
+)
+from files_api.s3.write_objects import MIN_MULTIPART_CHUNKSIZE_BYTES
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_presigned_upload_and_download_urls(mocked_aws: None):
+    upload_url = generate_presigned_upload_url(TEST_BUCKET_NAME, "dir/file.txt", content_type="text/plain")
+    response = requests.put(upload_url, data=b"test content", headers={"Content-Type": "text/plain"}, timeout=5)
+    assert response.status_code == 200
+
+    download_url = generate_presigned_download_url(TEST_BUCKET_NAME, "dir/file.txt", expires_in=60)
+    response = requests.get(download_url, timeout=5)
+    assert response.content == b"test content"
+    assert response.headers["Content-Type"] == "text/plain"
+
+
+def test_get_multipart_part_size():
+    assert get_multipart_part_size(0, min_part_size=0) == MIN_MULTIPART_CHUNKSIZE_BYTES
+    assert get_multipart_part_size(100 * 1024**2, min_part_size=64 * 1024**2) == 64 * 1024**2
+    # 5 TiB doesn't fit in 10,000 parts of 64 MiB
+    part_size = get_multipart_part_size(5 * 1024**4, min_part_size=64 * 1024**2)
+    assert part_size * MAX_MULTIPART_PARTS >= 5 * 1024**4
+
+
+# pylint: disable=unused-argument
+def test_presigned_multipart_upload(mocked_aws: None):
+    content = b"a" * MIN_MULTIPART_CHUNKSIZE_BYTES + b"b" * 1024
+    upload = create_presigned_multipart_upload(
+        TEST_BUCKET_NAME, "large.bin", size=len(content), content_type="image/png", min_part_size=0
+    )
+    assert upload.part_size == MIN_MULTIPART_CHUNKSIZE_BYTES
+    assert [part.part_number for part in upload.part_urls] == [1, 2]
+
+    parts = []
+    for part in reversed(upload.part_urls):
+        start = (part.part_number - 1) * upload.part_size
+        response = requests.put(part.url, data=content[slice(start, start + upload.part_size)], timeout=5)
+        parts.append((part.part_number, response.headers["ETag"]))
+    complete_multipart_upload(TEST_BUCKET_NAME, "large.bin", upload.upload_id, parts)
+
+    response = boto3.client("s3").get_object(Bucket=TEST_BUCKET_NAME, Key="large.bin")
+    assert response["Body"].read() == content
+    assert response["ContentType"] == "image/png"
+
+
+# pylint: disable=unused-argument
+def test_abort_presigned_multipart_upload(mocked_aws: None):
+    upload = create_presigned_multipart_upload(TEST_BUCKET_NAME, "large.bin", size=1024)
+    abort_multipart_upload(TEST_BUCKET_NAME, "large.bin", upload.upload_id)
+
+    assert not boto3.client("s3").list_multipart_uploads(Bucket=TEST_BUCKET_NAME).get("Uploads")
+
+    with pytest.raises(ClientError) as exc_info:
+        abort_multipart_upload(TEST_BUCKET_NAME, "large.bin", upload.upload_id)
+    assert exc_info.value.response["Error"]["Code"] == "NoSuchUpload"
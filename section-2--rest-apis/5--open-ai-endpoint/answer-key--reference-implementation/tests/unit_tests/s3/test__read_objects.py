@@ -1,10 +1,18 @@
 """Test cases for `s3.read_objects`."""
 
 import boto3
+import pytest
+from botocore.exceptions import ClientError
 
 from files_api.s3.read_objects import (
+    fetch_s3_directory_listing,
+    fetch_s3_object,
+    fetch_s3_object_metadata,
     fetch_s3_objects_metadata,
     fetch_s3_objects_using_page_token,
+    is_object_not_found_error,
+    iter_s3_object_pages,
+    iter_s3_objects_with_content,
     object_exists_in_s3,
 )
 from tests.consts import TEST_BUCKET_NAME
@@ -19,6 +27,23 @@ def test_object_exists_in_s3(mocked_aws):
     assert object_exists_in_s3(TEST_BUCKET_NAME, "nonexistent.txt") is False
 
 
+# pylint: disable=unused-argument
+def test_missing_object_errors_are_recognized(mocked_aws):
+    """Assert that both GetObject and HeadObject errors for a missing key are recognized as "not found"."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="test content", ContentType="text/plain")
+
+    assert fetch_s3_object(TEST_BUCKET_NAME, "testfile.txt")["Body"].read() == b"test content"
+    metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt")
+    assert metadata["ContentLength"] == len(b"test content")
+    assert metadata["ContentType"] == "text/plain"
+
+    for fetch in (fetch_s3_object, fetch_s3_object_metadata):
+        with pytest.raises(ClientError) as exc_info:
+            fetch(TEST_BUCKET_NAME, "nonexistent.txt")
+        assert is_object_not_found_error(exc_info.value)
+
+
 # pylint: disable=unused-argument
 def test_pagination(mocked_aws):  # noqa: R701
     """Assert that pagination works correctly."""
@@ -102,3 +127,64 @@ def test_directory_queries(mocked_aws):  # noqa: R701 - too complex
     assert files[3]["Key"] == "folder2/file3.txt"
     assert files[4]["Key"] == "folder2/subfolder1/file4.txt"
     assert next_page_token is None
+
+
+# pylint: disable=unused-argument
+def test_directory_listing_with_delimiter(mocked_aws):
+    s3_client = boto3.client("s3")
+    for object_key in ["folder1/file1.txt", "folder2/file3.txt", "folder2/subfolder1/file4.txt", "file5.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body="content")
+
+    listing = fetch_s3_directory_listing(TEST_BUCKET_NAME)
+    assert [obj["Key"] for obj in listing.objects] == ["file5.txt"]
+    assert listing.directories == ["folder1/", "folder2/"]
+    assert listing.next_page_token is None
+
+    listing = fetch_s3_directory_listing(TEST_BUCKET_NAME, prefix="folder2/", max_keys=1)
+    assert [obj["Key"] for obj in listing.objects] == ["folder2/file3.txt"]
+    assert not listing.directories
+    listing = fetch_s3_directory_listing(
+        TEST_BUCKET_NAME, prefix="folder2/", max_keys=1, continuation_token=listing.next_page_token
+    )
+    assert not listing.objects
+    assert listing.directories == ["folder2/subfolder1/"]
+
+    listing = fetch_s3_directory_listing(TEST_BUCKET_NAME, delimiter=None, start_after="folder2/file3.txt")
+    assert [obj["Key"] for obj in listing.objects] == ["folder2/subfolder1/file4.txt"]
+    assert not listing.directories
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_pages(mocked_aws):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/1.txt", "dir/2.txt", "dir/3.txt", "dir/sub/4.txt", "dir/sub/5.txt", "other.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body="content")
+
+    pages = list(iter_s3_object_pages(TEST_BUCKET_NAME, prefix="dir/", s3_client=s3_client, max_keys=2))
+
+    assert [[obj["Key"] for obj in page] for page in pages] == [
+        ["dir/1.txt", "dir/2.txt"],
+        ["dir/3.txt", "dir/sub/4.txt"],
+        ["dir/sub/5.txt"],
+    ]
+    assert list(iter_s3_object_pages(TEST_BUCKET_NAME, prefix="nothing/", s3_client=s3_client)) == [[]]
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_objects_with_content(mocked_aws):
+    s3_client = boto3.client("s3")
+    for i in range(12):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"dir/file-{i:02}.txt", Body=f"content {i}".encode())
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="dir/large.bin", Body=b"x" * 100)
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="other.txt", Body=b"not in dir")
+
+    objects = list(
+        iter_s3_objects_with_content(
+            TEST_BUCKET_NAME, prefix="dir/", prefetch_count=4, prefetch_max_object_bytes=50, chunk_size=30
+        )
+    )
+
+    assert [obj.object_key for obj in objects] == [f"dir/file-{i:02}.txt" for i in range(12)] + ["dir/large.bin"]
+    assert b"".join(objects[3].chunks) == b"content 3"
+    assert objects[-1].size == 100
+    assert [len(chunk) for chunk in objects[-1].chunks] == [30, 30, 30, 10]
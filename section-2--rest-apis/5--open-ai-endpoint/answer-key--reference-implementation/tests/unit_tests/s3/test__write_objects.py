@@ -1,8 +1,27 @@
 """Test cases for `s3.write_objects`."""
 
+import hashlib
+from io import BytesIO
+
 import boto3
+import pytest
+from botocore.exceptions import ClientError
 
-from files_api.s3.write_objects import upload_s3_object
+from files_api.s3.codecs import (
+    UNCOMPRESSED_SIZE_METADATA_KEY,
+    decompress,
+)
+from files_api.s3.metadata_index import ObjectMetadataIndex
+from files_api.s3.write_objects import (
+    MIN_MULTIPART_CHUNKSIZE_BYTES,
+    SHA256_METADATA_KEY,
+    S3ObjectToUpload,
+    compute_sha256,
+    upload_s3_object,
+    upload_s3_object_from_file,
+    upload_s3_object_if_changed,
+    upload_s3_objects,
+)
 from tests.consts import TEST_BUCKET_NAME
 
 
@@ -13,3 +32,136 @@ def test_upload_s3_object(mocked_aws: None):
     upload_s3_object(TEST_BUCKET_NAME, "testfile.txt", file_content)
     response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")
     assert response["Body"].read() == file_content
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_object_from_file__single_put(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    upload_s3_object_from_file(TEST_BUCKET_NAME, "testfile.txt", BytesIO(b"test content"), content_type="text/plain")
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")
+    assert response["Body"].read() == b"test content"
+    assert response["ContentType"] == "text/plain"
+    assert "-" not in response["ETag"]
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_object_from_file__multipart(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    file_content = b"a" * MIN_MULTIPART_CHUNKSIZE_BYTES + b"b" * 1024
+    upload_s3_object_from_file(
+        TEST_BUCKET_NAME,
+        "testfile.bin",
+        BytesIO(file_content),
+        multipart_threshold=MIN_MULTIPART_CHUNKSIZE_BYTES,
+        multipart_chunksize=MIN_MULTIPART_CHUNKSIZE_BYTES,
+    )
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="testfile.bin")
+    assert response["Body"].read() == file_content
+    # multipart ETags end with the number of parts
+    assert response["ETag"].strip('"').endswith("-2")
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_object_from_file__aborts_failed_multipart_upload(mocked_aws: None):
+    s3_client = boto3.client("s3")
+
+    def fail_on_second_part(params, **_):
+        if params["PartNumber"] == 2:
+            raise ConnectionError("simulated network failure")
+
+    s3_client.meta.events.register("before-parameter-build.s3.UploadPart", fail_on_second_part)
+
+    with pytest.raises(ConnectionError):
+        upload_s3_object_from_file(
+            TEST_BUCKET_NAME,
+            "testfile.bin",
+            BytesIO(b"a" * MIN_MULTIPART_CHUNKSIZE_BYTES * 2),
+            multipart_threshold=MIN_MULTIPART_CHUNKSIZE_BYTES,
+            multipart_chunksize=MIN_MULTIPART_CHUNKSIZE_BYTES,
+            s3_client=s3_client,
+        )
+
+    assert not s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME).get("Uploads")
+    assert not s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME).get("Contents")
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_object_from_file__compressed(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    metadata_index = ObjectMetadataIndex()
+    file_content = b"a line of text\n" * 1000
+    upload_s3_object_from_file(
+        TEST_BUCKET_NAME,
+        "testfile.txt",
+        BytesIO(file_content),
+        content_type="text/plain",
+        metadata_index=metadata_index,
+        content_encoding="gzip",
+    )
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")
+    assert response["ContentEncoding"] == "gzip"
+    assert response["ContentType"] == "text/plain"
+    assert response["Metadata"][UNCOMPRESSED_SIZE_METADATA_KEY] == str(len(file_content))
+    compressed = response["Body"].read()
+    assert len(compressed) < len(file_content)
+    assert decompress(compressed, "gzip") == file_content
+
+    # indexed with the size and ETag of what's stored, as a crawl of the bucket would
+    indexed_object = metadata_index.get_many(TEST_BUCKET_NAME, ["testfile.txt"])["testfile.txt"]
+    assert indexed_object.size == len(compressed)
+    assert indexed_object.etag == response["ETag"]
+    assert indexed_object.content_type == "text/plain"
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_objects(mocked_aws: None):
+    s3_client = boto3.client("s3")
+
+    def fail_one_upload(params, **_):
+        if params["Key"] == "fails.txt":
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "PutObject")
+
+    s3_client.meta.events.register("before-parameter-build.s3.PutObject", fail_one_upload)
+
+    objects = [S3ObjectToUpload(object_key=f"file-{i}.txt", body=f"content {i}".encode()) for i in range(20)]
+    objects.insert(5, S3ObjectToUpload(object_key="fails.txt", body=BytesIO(b"content")))
+    results = upload_s3_objects(TEST_BUCKET_NAME, objects, s3_client=s3_client, max_concurrency=4)
+
+    assert [result.object_key for result in results] == [obj.object_key for obj in objects]
+    assert [result.object_key for result in results if not result.succeeded] == ["fails.txt"]
+    assert results[5].error_code == "AccessDenied"
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="file-19.txt")
+    assert response["Body"].read() == b"content 19"
+
+
+def test_compute_sha256():
+    file_obj = BytesIO(b"skip:content")
+    file_obj.seek(5)
+    assert compute_sha256(file_obj, chunk_size=2) == hashlib.sha256(b"content").hexdigest()
+    assert file_obj.tell() == 5
+
+
+# pylint: disable=unused-argument
+def test_upload_s3_object_if_changed(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_object_calls = []
+    s3_client.meta.events.register("before-call.s3.PutObject", lambda **kwargs: put_object_calls.append(kwargs))
+
+    def upload(content: bytes, content_type: str = "text/plain"):
+        return upload_s3_object_if_changed(
+            TEST_BUCKET_NAME, "artifact.txt", BytesIO(content), content_type, s3_client=s3_client
+        )
+
+    result = upload(b"v1")
+    assert (result.sha256, result.existed, result.skipped) == (hashlib.sha256(b"v1").hexdigest(), False, False)
+    metadata = s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="artifact.txt")["Metadata"]
+    assert metadata == {SHA256_METADATA_KEY: result.sha256}
+
+    result = upload(b"v1")
+    assert (result.existed, result.skipped) == (True, True)
+    assert len(put_object_calls) == 1
+
+    assert upload(b"v1", content_type="application/octet-stream").skipped is False
+    assert upload(b"v2").skipped is False
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="artifact.txt")["Body"].read() == b"v2"
+    assert len(put_object_calls) == 3
@@ -0,0 +1,75 @@
+"""Test cases for `archives`."""
+
+import io
+import tarfile
+import zipfile
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import pytest
+
+from files_api.archives import (
+    ArchiveEntry,
+    iter_archive_members,
+    iter_archive_stream,
+    normalize_archive_path,
+)
+
+FILES = {"a.txt": b"content of a", "dir/b.txt": b"content of b"}
+
+
+def make_zip() -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("dir/", b"")
+        for path, content in FILES.items():
+            zip_file.writestr(path, content)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tar(mode: str) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar_file:
+        directory_info = tarfile.TarInfo("dir")
+        directory_info.type = tarfile.DIRTYPE
+        tar_file.addfile(directory_info)
+        for path, content in FILES.items():
+            info = tarfile.TarInfo(path)
+            info.size = len(content)
+            tar_file.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("archive", [make_zip(), make_tar("w"), make_tar("w:gz")], ids=["zip", "tar", "tar.gz"])
+def test_iter_archive_members(archive: io.BytesIO):
+    members = {member.path: (member.size, member.read()) for member in iter_archive_members(archive)}
+    assert members == {path: (len(content), content) for path, content in FILES.items()}
+
+
+def test_iter_archive_members_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(iter_archive_members(io.BytesIO(b"not an archive")))
+
+
+def test_normalize_archive_path():
+    assert normalize_archive_path("./dir//a.txt") == "dir/a.txt"
+    assert normalize_archive_path("/a.txt") == "a.txt"
+    assert normalize_archive_path("dir/../../a.txt") is None
+    assert normalize_archive_path("./") is None
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "tar"])
+def test_iter_archive_stream_round_trips(archive_format):
+    last_modified = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    entries = [
+        ArchiveEntry(path=path, size=len(content), last_modified=last_modified, chunks=[content[:3], content[3:]])
+        for path, content in FILES.items()
+    ]
+    archive = io.BytesIO(b"".join(iter_archive_stream(archive_format, entries)))
+
+    members = {member.path: member.read() for member in iter_archive_members(archive)}
+    assert members == FILES
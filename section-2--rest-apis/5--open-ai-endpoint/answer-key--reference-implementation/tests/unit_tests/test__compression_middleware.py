@@ -0,0 +1,145 @@
+"""Test cases for `compression_middleware`."""
+
+import asyncio
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import (
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from fastapi.testclient import TestClient
+
+from files_api import compression_middleware
+from files_api.compression_middleware import (
+    CompressingSender,
+    CompressionMiddleware,
+    StreamCompressor,
+)
+
+TEXT = b"".join(f"line {i} of some text\n".encode() for i in range(1000))
+
+requires_zstandard = pytest.mark.skipif(compression_middleware.zstandard is None, reason="zstandard is not installed")
+requires_brotli = pytest.mark.skipif(compression_middleware.brotli is None, reason="brotli is not installed")
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.api_route("/text", methods=["GET", "HEAD"])
+    def text() -> Response:
+        return PlainTextResponse(TEXT, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small() -> Response:
+        return PlainTextResponse(b"small")
+
+    @app.get("/stream")
+    def stream() -> Response:
+        return StreamingResponse(iter([TEXT, b"", TEXT]), media_type="text/plain")
+
+    @app.get("/png")
+    def png() -> Response:
+        return Response(TEXT, media_type="image/png")
+
+    @app.get("/binary")
+    def binary() -> Response:
+        return Response(TEXT, media_type="application/octet-stream")
+
+    @app.get("/partial")
+    def partial() -> Response:
+        return PlainTextResponse(TEXT, status_code=206, headers={"Content-Range": f"bytes 0-{len(TEXT) - 1}/100000"})
+
+    @app.get("/no-transform")
+    def no_transform() -> Response:
+        return PlainTextResponse(TEXT, headers={"Cache-Control": "no-transform"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=["gzip"])
+    return TestClient(app)
+
+
+def test_compresses_response(client: TestClient):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"abc"'
+    assert int(response.headers["Content-Length"]) < len(TEXT)
+    assert response.content == TEXT
+
+
+def test_compresses_streamed_response(client: TestClient):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.content == TEXT * 2
+
+
+@pytest.mark.parametrize(
+    "path, accept_encoding",
+    [
+        ("/text", "identity"),
+        ("/text", "gzip;q=0"),
+        ("/text", "br"),
+        ("/small", "gzip"),
+        ("/png", "gzip"),
+        ("/binary", "gzip"),
+        ("/partial", "gzip"),
+        ("/no-transform", "gzip"),
+    ],
+)
+def test_passes_response_through(client: TestClient, path: str, accept_encoding: str):
+    response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers.get("ETag") in (None, '"abc"')
+
+
+def test_does_not_compress_head_responses(client: TestClient):
+    response = client.head("/text", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Length"] == str(len(TEXT))
+
+
+def test_compresses_each_chunk_as_it_is_sent():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def respond():
+        compressing_send = CompressingSender(send, "gzip", minimum_size=10)
+        await compressing_send(
+            {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]}
+        )
+        await compressing_send({"type": "http.response.body", "body": b"first", "more_body": True})
+        # less than `minimum_size` so far, so nothing is sent yet
+        assert not sent
+        await compressing_send({"type": "http.response.body", "body": b" chunk", "more_body": True})
+        assert len(sent) == 2
+        await compressing_send({"type": "http.response.body", "body": b" and the rest", "more_body": False})
+
+    asyncio.run(respond())
+    start, *body_messages = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # each chunk is flushed, so it can be decoded before the next one arrives
+    assert decompressor.decompress(body_messages[0]["body"]) == b"first chunk"
+    assert decompressor.decompress(body_messages[1]["body"]) == b" and the rest"
+    assert body_messages[-1]["more_body"] is False
+
+
+@pytest.mark.parametrize(
+    "encoding",
+    ["gzip", pytest.param("br", marks=requires_brotli), pytest.param("zstd", marks=requires_zstandard)],
+)
+def test_stream_compressor(encoding):
+    compressor = StreamCompressor(encoding)
+    compressed = compressor.compress(TEXT) + compressor.compress(b"") + compressor.compress(TEXT) + compressor.finish()
+    assert len(compressed) < len(TEXT)
+
+
+def test_unsupported_stream_encoding():
+    with pytest.raises(ValueError):
+        StreamCompressor("deflate")
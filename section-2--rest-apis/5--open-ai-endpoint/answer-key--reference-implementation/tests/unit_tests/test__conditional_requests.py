@@ -0,0 +1,28 @@
+"""Test cases for `conditional_requests`."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from files_api.conditional_requests import get_s3_preconditions
+
+
+def test_get_s3_preconditions():
+    assert not get_s3_preconditions({})
+    assert get_s3_preconditions({"If-None-Match": '"abc"'}) == {"if_none_match": '"abc"'}
+    assert get_s3_preconditions({"If-Modified-Since": "Sat, 01 Jan 2022 00:00:00 GMT"}) == {
+        "if_modified_since": datetime(2022, 1, 1, tzinfo=timezone.utc)
+    }
+
+    # If-Modified-Since is ignored when If-None-Match is present, or when it is not a valid date
+    assert get_s3_preconditions({"If-None-Match": '"abc"', "If-Modified-Since": "Sat, 01 Jan 2022 00:00:00 GMT"}) == {
+        "if_none_match": '"abc"'
+    }
+    assert not get_s3_preconditions({"If-Modified-Since": "yesterday"})
+
+    # the obsolete asctime format and a "-0000" zone are in UTC too
+    for if_modified_since in ("Sat Jan  1 00:00:00 2022", "Sat, 01 Jan 2022 00:00:00 -0000"):
+        assert get_s3_preconditions({"If-Modified-Since": if_modified_since}) == {
+            "if_modified_since": datetime(2022, 1, 1, tzinfo=timezone.utc)
+        }
@@ -0,0 +1,50 @@
+"""Test cases for `content_encoding`."""
+
+import pytest
+
+from files_api.content_encoding import (
+    accepts_encoding,
+    choose_encoding,
+    parse_accept_encoding,
+)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.8, BR , *;q=0, zstd;q=oops,") == {
+        "gzip": 0.8,
+        "br": 1.0,
+        "*": 0.0,
+        "zstd": 0.0,
+    }
+    assert not parse_accept_encoding("")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate", True),
+        ("deflate, gzip;q=0.5", True),
+        ("gzip;q=0", False),
+        ("*", True),
+        ("br, *;q=0", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_encoding(accept_encoding, "gzip") is expected
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, br, zstd", "zstd"),
+        ("gzip, br;q=0.9", "gzip"),
+        ("deflate", None),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("", None),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ["zstd", "br", "gzip"]) == expected
@@ -0,0 +1,121 @@
+"""
+Import-time budget of the Lambda handler, measured with `python -X importtime` in a fresh interpreter.
+
+Everything imported by `files_api.aws_lambda_handler` adds to every cold start. Run with `pytest -s`
+to print a report of the slowest imports, slowest first.
+"""
+
+import os
+import subprocess
+import sys
+from typing import (
+    List,
+    NamedTuple,
+)
+
+import pytest
+
+HANDLER_MODULE = "files_api.aws_lambda_handler"
+
+# about 1 s on a laptop; the slack absorbs slower CI machines, while importing the OpenAI SDK alone would use most of it
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+# imported by the routes that need them, never during a cold start
+LAZILY_IMPORTED_PACKAGES = {"openai", "httpx"}
+
+REPORT_TOP_IMPORTS = 25
+
+
+class ImportTime(NamedTuple):
+    """One line of `-X importtime` output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    """How deeply nested the import is; 0 for modules imported by the `-c` command itself."""
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    """Parse the `import time: <self us> | <cumulative us> | <module>` lines that `-X importtime` writes to stderr."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line.removeprefix("import time:").split("|")
+        # skip the header line
+        if not self_us.strip().isdigit():
+            continue
+        # nested imports are indented by two more spaces per level, after the one space that follows "|"
+        indent = len(module) - len(module.lstrip())
+        imports.append(
+            ImportTime(
+                module=module.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(indent - 1) // 2,
+            )
+        )
+    return imports
+
+
+def format_import_report(imports: List[ImportTime], top: int = REPORT_TOP_IMPORTS) -> str:
+    """Format the `top` slowest imports, by cumulative time, as a table."""
+    rows = [f"{'cumulative ms':>13} {'self ms':>8}  module"]
+    for imported in sorted(imports, key=lambda imported: imported.cumulative_us, reverse=True)[slice(0, top)]:
+        rows.append(
+            f"{imported.cumulative_us / 1000:>13.1f} {imported.self_us / 1000:>8.1f}  "
+            f"{'  ' * imported.depth}{imported.module}"
+        )
+    return "\n".join(rows)
+
+
+@pytest.fixture(scope="module")
+def handler_imports() -> List[ImportTime]:
+    """Import the Lambda handler in a fresh interpreter and return its import times."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {HANDLER_MODULE}"],
+        env={
+            **os.environ,
+            "S3_BUCKET_NAME": "import-time-test-bucket",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            # the handler resolves credentials while it's imported; keep botocore from probing for real ones
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_EC2_METADATA_DISABLED": "true",
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def test_handler_import_time_is_within_budget(handler_imports: List[ImportTime]):
+    report = format_import_report(handler_imports)
+    print(f"\n{report}")
+    handler_import = next(imported for imported in handler_imports if imported.module == HANDLER_MODULE)
+    assert handler_import.cumulative_us / 1e6 < IMPORT_TIME_BUDGET_SECONDS, report
+
+
+def test_heavy_packages_are_imported_lazily(handler_imports: List[ImportTime]):
+    imported_packages = {imported.module.split(".")[0] for imported in handler_imports}
+    assert not imported_packages & LAZILY_IMPORTED_PACKAGES
+
+
+def test_parse_importtime():
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     _json",
+            "import time:       800 |        920 |   json.decoder",
+            "import time:      1500 |       2420 | json",
+            "some other line on stderr",
+        ]
+    )
+    assert parse_importtime(output) == [
+        ImportTime(module="_json", self_us=120, cumulative_us=120, depth=2),
+        ImportTime(module="json.decoder", self_us=800, cumulative_us=920, depth=1),
+        ImportTime(module="json", self_us=1500, cumulative_us=2420, depth=0),
+    ]
+    assert format_import_report(parse_importtime(output)).splitlines()[1] == "          2.4      1.5  json"
@@ -0,0 +1,68 @@
+"""Test cases for `jobs`."""
+
+import threading
+import time
+
+from files_api.jobs import (
+    MAX_JOB_ERRORS,
+    Job,
+    JobContext,
+    JobRegistry,
+    JobStatus,
+)
+
+
+def wait_for_job(jobs: JobRegistry, job_id: str) -> Job:
+    """Poll a job until it finishes."""
+    for _ in range(100):
+        job = jobs.get(job_id)
+        assert job is not None
+        if job.finished_at:
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"job {job_id} did not finish")
+
+
+def test_job_reports_progress_while_running():
+    jobs = JobRegistry()
+    may_finish = threading.Event()
+
+    def count(context: JobContext) -> None:
+        context.increment("items", 2)
+        may_finish.wait()
+
+    job = jobs.submit(kind="count", func=count)
+    assert job.status in (JobStatus.PENDING, JobStatus.RUNNING)
+
+    for _ in range(100):
+        if jobs.get(job.job_id).progress == {"items": 2}:
+            break
+        time.sleep(0.01)
+    assert jobs.get(job.job_id).status == JobStatus.RUNNING
+    assert jobs.get(job.job_id).finished_at is None
+
+    may_finish.set()
+    job = wait_for_job(jobs, job.job_id)
+    assert job.status == JobStatus.SUCCEEDED
+    jobs.shutdown()
+
+
+def test_failed_jobs_keep_their_errors():
+    jobs = JobRegistry()
+
+    def raise_error(_context: JobContext) -> None:
+        raise RuntimeError("boom")
+
+    def report_errors(context: JobContext) -> None:
+        context.add_errors([f"error {i}" for i in range(MAX_JOB_ERRORS + 1)])
+
+    job = wait_for_job(jobs, jobs.submit(kind="raise", func=raise_error).job_id)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "boom"
+
+    job = wait_for_job(jobs, jobs.submit(kind="errors", func=report_errors).job_id)
+    assert job.status == JobStatus.FAILED
+    assert len(job.errors) == MAX_JOB_ERRORS
+
+    assert jobs.get("nonexistent") is None
+    jobs.shutdown()
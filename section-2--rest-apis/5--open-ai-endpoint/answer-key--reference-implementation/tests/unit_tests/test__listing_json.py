@@ -0,0 +1,62 @@
+"""Test cases for `listing_json`."""
+
+import json
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import pytest
+
+from files_api import listing_json
+from files_api.listing_json import (
+    files_to_ndjson,
+    get_files_response_json,
+)
+from files_api.schemas import (
+    FileMetadata,
+    GetFilesResponse,
+)
+
+S3_OBJECTS = [
+    {"Key": "a.txt", "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc), "Size": 1, "ETag": '"x"'},
+    {"Key": "dir/é.txt", "LastModified": datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=timezone.utc), "Size": 20},
+    {"Key": "b.txt", "LastModified": datetime(2024, 1, 3, tzinfo=timezone(timedelta(hours=2))), "Size": 300},
+]
+
+
+def to_file_metadata(obj: dict) -> FileMetadata:
+    return FileMetadata(file_path=obj["Key"], last_modified=obj["LastModified"], size_bytes=obj["Size"])
+
+
+@pytest.fixture(params=["orjson", "pydantic_core"])
+def json_library(request, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "pydantic_core":
+        monkeypatch.setattr(listing_json, "orjson", None)
+    elif listing_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.usefixtures("json_library")
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"next_page_token": None},
+        {"directories": ["dir/"], "next_page_token": "token"},
+        {"next_page_token": None, "file_count": 3, "total_size_bytes": 321},
+    ],
+)
+def test_get_files_response_json_matches_the_response_model(kwargs: dict):
+    expected = GetFilesResponse(files=[to_file_metadata(obj) for obj in S3_OBJECTS], **kwargs)
+
+    assert get_files_response_json(S3_OBJECTS, **kwargs) == expected.model_dump_json().encode()
+
+
+@pytest.mark.usefixtures("json_library")
+def test_files_to_ndjson_matches_the_response_model():
+    lines = files_to_ndjson(S3_OBJECTS).splitlines()
+
+    assert lines == [to_file_metadata(obj).model_dump_json().encode() for obj in S3_OBJECTS]
+    assert [json.loads(line)["file_path"] for line in lines] == ["a.txt", "dir/é.txt", "b.txt"]
@@ -0,0 +1,91 @@
+"""Test cases for `page_tokens`."""
+
+import pytest
+
+from files_api.page_tokens import (
+    InvalidPageTokenError,
+    PageToken,
+    decode_page_token,
+    derive_page_token_key,
+    encode_page_token,
+    resume_after,
+)
+from tests.utils import sign_page_token_payload
+
+SECRET = b"secret"
+
+
+@pytest.mark.parametrize(
+    "page_token",
+    [
+        PageToken(prefix="", delimiter=None, page_size=10, start_after="a.txt"),
+        PageToken(prefix="dir/é/", delimiter="/", page_size=100, start_after="dir/é/sub/\U0010ffff"),
+    ],
+)
+def test_page_token_round_trip(page_token: PageToken):
+    token = encode_page_token(page_token, SECRET)
+    assert token == encode_page_token(page_token, SECRET)
+    assert token.isascii() and "=" not in token
+    assert decode_page_token(token, SECRET) == page_token
+
+
+def test_tampered_page_tokens_are_rejected():
+    token = encode_page_token(PageToken(prefix="dir/", delimiter=None, page_size=10, start_after="dir/a"), SECRET)
+    payload, signature = token.split(".")
+    forged_payload = encode_page_token(
+        PageToken(prefix="dir/", delimiter=None, page_size=10_000, start_after="dir/a"), SECRET
+    ).split(".")[0]
+
+    for invalid_token in [
+        f"{forged_payload}.{signature}",
+        f"{payload}.{signature[::-1]}",
+        payload,
+        f"{token}.extra",
+        "not a token",
+        "é.é",
+        "",
+    ]:
+        with pytest.raises(InvalidPageTokenError):
+            decode_page_token(invalid_token, SECRET)
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(token, b"another secret")
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"not json",
+        b'{"a":1}',
+        b"[]",
+        b'[1,"",null,"x",""]',
+        b'[1,5,null,10,""]',
+        b'[1,"",7,10,""]',
+        b'[1,"",null,true,""]',
+        b'[1,"",null,10]',
+        b'[1,"",null,10,"",""]',
+    ],
+)
+def test_signed_page_tokens_with_malformed_payloads_are_rejected(payload: bytes):
+    assert decode_page_token(sign_page_token_payload(b'[1,"",null,10,""]', SECRET), SECRET) == PageToken(
+        prefix="", delimiter=None, page_size=10, start_after=""
+    )
+    with pytest.raises(InvalidPageTokenError, match="Invalid page token"):
+        decode_page_token(sign_page_token_payload(payload, SECRET), SECRET)
+
+
+def test_derived_page_token_key_is_shared_per_bucket():
+    assert derive_page_token_key("bucket") == derive_page_token_key("bucket")
+    assert derive_page_token_key("bucket") != derive_page_token_key("other-bucket")
+
+
+@pytest.mark.parametrize(
+    "object_keys, common_prefixes, expected_start_after",
+    [
+        (["a", "c"], [], "c"),
+        (["a", "c"], ["b/"], "c"),
+        (["a"], ["b/", "c/"], "c/\U0010ffff"),
+        ([], ["b/"], "b/\U0010ffff"),
+    ],
+)
+def test_resume_after(object_keys: list, common_prefixes: list, expected_start_after: str):
+    assert resume_after(object_keys, common_prefixes) == expected_start_after
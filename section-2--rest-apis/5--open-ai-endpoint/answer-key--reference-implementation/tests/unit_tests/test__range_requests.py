@@ -0,0 +1,68 @@
+"""Test cases for `range_requests`."""
+
+import pytest
+
+from files_api.range_requests import (
+    MAX_BYTE_RANGES_PER_REQUEST,
+    ByteRangeSpec,
+    iter_multipart_byteranges,
+    multipart_byteranges_content_length,
+    parse_range_header,
+)
+
+
+@pytest.mark.parametrize(
+    "range_header, expected_specs",
+    [
+        ("bytes=0-499", [ByteRangeSpec(first=0, last=499)]),
+        ("bytes=500-", [ByteRangeSpec(first=500, last=None)]),
+        ("bytes=-500", [ByteRangeSpec(first=None, last=500)]),
+        ("bytes=0-0, -1", [ByteRangeSpec(first=0, last=0), ByteRangeSpec(first=None, last=1)]),
+        # headers that must be ignored, so the full content is served
+        ("", []),
+        ("items=0-5", []),
+        ("bytes=", []),
+        ("bytes=-", []),
+        ("bytes=5-1", []),
+        ("bytes=a-b", []),
+        ("bytes=" + ",".join(["0-1"] * (MAX_BYTE_RANGES_PER_REQUEST + 1)), []),
+    ],
+)
+def test_parse_range_header(range_header: str, expected_specs: list):
+    assert parse_range_header(range_header) == expected_specs
+
+
+@pytest.mark.parametrize(
+    "spec, expected_byte_range",
+    [
+        (ByteRangeSpec(first=0, last=4), (0, 4)),
+        (ByteRangeSpec(first=8, last=100), (8, 9)),
+        (ByteRangeSpec(first=8, last=None), (8, 9)),
+        (ByteRangeSpec(first=None, last=3), (7, 9)),
+        (ByteRangeSpec(first=None, last=100), (0, 9)),
+        (ByteRangeSpec(first=10, last=None), None),
+        (ByteRangeSpec(first=None, last=0), None),
+    ],
+)
+def test_resolve_byte_range(spec: ByteRangeSpec, expected_byte_range: tuple):
+    assert spec.resolve(size=10) == expected_byte_range
+
+
+def test_multipart_byteranges_content_length_matches_body():
+    content = b"0123456789"
+    byte_ranges = [(0, 1), (5, 9)]
+    body = b"".join(
+        iter_multipart_byteranges(
+            boundary="boundary",
+            content_type="text/plain",
+            byte_ranges=byte_ranges,
+            size=len(content),
+            fetch_byte_range=lambda start, end: [content[slice(start, end + 1)]],
+        )
+    )
+    assert body == (
+        b"--boundary\r\nContent-Type: text/plain\r\nContent-Range: bytes 0-1/10\r\n\r\n01\r\n"
+        b"--boundary\r\nContent-Type: text/plain\r\nContent-Range: bytes 5-9/10\r\n\r\n56789\r\n"
+        b"--boundary--\r\n"
+    )
+    assert len(body) == multipart_byteranges_content_length("boundary", "text/plain", byte_ranges, len(content))
@@ -1,9 +1,18 @@
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.page_tokens import (
+    PageToken,
+    derive_page_token_key,
+    encode_page_token,
+)
+from files_api.s3.metadata_index import ObjectMetadataIndex
 from files_api.schemas import DEFAULT_GET_FILES_MAX_PAGE_SIZE
 from tests.consts import TEST_BUCKET_NAME
-from tests.utils import delete_s3_bucket
+from tests.utils import (
+    delete_s3_bucket,
+    sign_page_token_payload,
+)
 
 
 def test_get_nonexistant_file(client: TestClient):
@@ -12,6 +21,20 @@ def test_get_nonexistant_file(client: TestClient):
     assert response.json() == {"detail": "File not found"}
 
 
+def test_get_file_unsatisfiable_byte_range(client: TestClient):
+    client.put("/v1/files/test.txt", files={"file_content": ("test.txt", b"0123456789", "text/plain")})
+
+    for range_header in ["bytes=10-20", "bytes=10-20, 30-"]:
+        response = client.get("/v1/files/test.txt", headers={"Range": range_header})
+        assert response.status_code == status.HTTP_416_RANGE_NOT_SATISFIABLE
+        assert response.headers["Content-Range"] == "bytes */10"
+
+    # malformed Range headers are ignored and the full file is returned
+    response = client.get("/v1/files/test.txt", headers={"Range": "bytes=5-1"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b"0123456789"
+
+
 def test_head_nonexistent_file(client: TestClient):
     response = client.head("/v1/files/nonexistent_file.txt")
     assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -23,6 +46,82 @@ def test_delete_nonexistent_file(client: TestClient):
     assert response.json() == {"detail": "File not found"}
 
 
+def test_bulk_delete_requires_exactly_one_of_file_paths_and_directory(client: TestClient):
+    for body in ({}, {"file_paths": ["a.txt"], "directory": "dir/"}, {"directory": ""}):
+        response = client.post("/v1/files/bulk-delete", json=body)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_copy_nonexistent_file(client: TestClient):
+    response = client.post("/v1/files/copy", json={"source_path": "nonexistent.txt", "destination_path": "copy.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "File not found"}
+
+
+def test_move_directory_into_itself(client: TestClient):
+    response = client.post(
+        "/v1/files/move", json={"source_path": "dir", "destination_path": "dir/nested", "recursive": True}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_presign_download_of_nonexistent_file(client: TestClient):
+    response = client.post("/v1/presigned-urls/download", json={"file_path": "nonexistent.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get("/v1/files/nonexistent.txt", params={"redirect": True}, follow_redirects=False)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_abort_nonexistent_multipart_upload(client: TestClient):
+    response = client.delete("/v1/multipart-uploads/nonexistent-upload-id", params={"file_path": "large.bin"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Upload not found"}
+
+
+def test_search_files_without_metadata_index(client: TestClient):
+    response = client.get("/v1/search/files")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = client.get("/v1/directory-stats")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    client.app.state.metadata_index = ObjectMetadataIndex()
+    response = client.get("/v1/search/files", params={"page_token": "not a token"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_nonexistent_job(client: TestClient):
+    response = client.get("/v1/jobs/nonexistent-job-id")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Job not found"}
+
+
+def test_recursive_operations_without_background_jobs(client: TestClient):
+    client.app.state.jobs = None
+    response = client.delete("/v1/files/dir", params={"recursive": True})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Background jobs are disabled"}
+    response = client.post(
+        "/v1/files/copy", json={"source_path": "dir", "destination_path": "copy", "recursive": True}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    client.app.state.metadata_index = ObjectMetadataIndex()
+    response = client.post("/v1/search/reindex")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get("/v1/jobs/nonexistent-job-id")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_bulk_upload_requires_files_or_a_valid_archive(client: TestClient):
+    response = client.post("/v1/files/bulk-upload", data={"directory": "uploads"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post("/v1/files/bulk-upload", files={"archive": ("archive.zip", b"not an archive")})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_get_files_invalid_page_size(client: TestClient):
     response = client.get("/v1/files?page_size=-1")
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -31,6 +130,31 @@ def test_get_files_invalid_page_size(client: TestClient):
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+def test_get_files_full_listing_of_too_many_files(client: TestClient):
+    client.app.state.settings.list_files_full_listing_max_files = 1
+    for file_path in ["a.txt", "b.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, b"content", "text/plain")})
+
+    response = client.get("/v1/files", params={"mode": "full"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_files_with_invalid_page_token(client: TestClient):
+    response = client.get("/v1/files", params={"page_token": "not a token"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # without a configured secret, anyone can sign a token, but not one beyond what the query parameters allow
+    forged_page = PageToken(prefix="", delimiter=None, page_size=DEFAULT_GET_FILES_MAX_PAGE_SIZE + 1, start_after="")
+    forged_token = encode_page_token(forged_page, derive_page_token_key(TEST_BUCKET_NAME))
+    response = client.get("/v1/files", params={"page_token": forged_token})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for payload in [b'[1,"",null,"x",""]', b'{"a":1}', b'[1,5,null,10,""]', b"not json"]:
+        forged_token = sign_page_token_payload(payload, derive_page_token_key(TEST_BUCKET_NAME))
+        response = client.get("/v1/files", params={"page_token": forged_token})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_get_files_page_token_is_mutually_exclusive_with_page_size_and_directory(client: TestClient):
     response = client.get("/v1/files?page_token=token&page_size=10")
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -44,6 +168,19 @@ def test_get_files_page_token_is_mutually_exclusive_with_page_size_and_directory
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
     assert "mutually exclusive" in str(response.json())
 
+    response = client.get("/v1/files?page_token=token&delimiter=/")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "mutually exclusive" in str(response.json())
+
+    response = client.get("/v1/files?page_token=token&mode=count")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.get("/v1/files?delimiter=/&mode=full")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.get("/v1/files?stream=ndjson&mode=count")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
 
 def test_unforeseen_500_error(client: TestClient):
     # delete the S3 bucket and all objects inside
@@ -1,7 +1,21 @@
+import hashlib
+import io
+import json
+import tarfile
+import time
+import zipfile
+
+import boto3
+import requests  # type: ignore
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.main import create_app
+from files_api.s3.metadata_cache import ObjectMetadataCache
+from files_api.s3.metadata_index import ObjectMetadataIndex
 from files_api.schemas import GeneratedFileType
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
 
 # Constants for testing
 TEST_FILE_PATH = "test.txt"
@@ -40,6 +54,138 @@ def test__upload_file__happy_path(client: TestClient):
     }
 
 
+def test_bulk_upload_files(client: TestClient):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("nested/c.txt", b"content of c")
+        zip_file.writestr("../escaped.txt", b"")
+
+    response = client.post(
+        "/v1/files/bulk-upload",
+        data={"directory": "uploads"},
+        files=[
+            ("files", ("a.txt", b"content of a", "text/plain")),
+            ("files", ("dir/b.txt", b"content of b", "text/plain")),
+            ("archive", ("archive.zip", archive.getvalue(), "application/zip")),
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response_data = response.json()
+    assert response_data["uploaded_count"] == 3
+    assert response_data["failed_count"] == 1
+    assert {result["file_path"]: result["uploaded"] for result in response_data["results"]} == {
+        "../escaped.txt": False,
+        "uploads/a.txt": True,
+        "uploads/dir/b.txt": True,
+        "uploads/nested/c.txt": True,
+    }
+
+    response = client.get("/v1/files/uploads/nested/c.txt")
+    assert response.content == b"content of c"
+    assert response.headers["Content-Type"].startswith("text/plain")
+
+
+def test_upload_file_with_dedup(client: TestClient):
+    client.app.state.settings.upload_dedup_enabled = True
+    files = {"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+
+    response = client.put(f"/v1/files/{TEST_FILE_PATH}", files=files)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["sha256"] == hashlib.sha256(TEST_FILE_CONTENT).hexdigest()
+
+    response = client.put(f"/v1/files/{TEST_FILE_PATH}", files=files)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["message"] == f"Existing file unchanged at path: /{TEST_FILE_PATH}"
+
+    files = {"file_content": (TEST_FILE_PATH, b"updated content", TEST_FILE_CONTENT_TYPE)}
+    response = client.put(f"/v1/files/{TEST_FILE_PATH}", files=files)
+    assert response.json()["message"] == f"Existing file updated at path: /{TEST_FILE_PATH}"
+    assert client.get(f"/v1/files/{TEST_FILE_PATH}").content == b"updated content"
+
+
+def test_upload_and_download_compressed_file(client: TestClient):
+    client.app.state.settings.storage_compression = "gzip"
+    content = b"some,csv,columns\n" * 1000
+    client.put("/v1/files/data/file.csv", files={"file_content": ("file.csv", content, "text/csv")})
+    client.put("/v1/files/data/image.png", files={"file_content": ("image.png", b"\x89PNG" * 100, "image/png")})
+
+    s3_client = boto3.client("s3")
+    stored = s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="data/file.csv")
+    assert stored["ContentEncoding"] == "gzip"
+    assert stored["ContentLength"] < len(content)
+    assert "ContentEncoding" not in s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="data/image.png")
+
+    # passed through as is to clients that accept gzip, and decoded by the test client
+    response = client.get("/v1/files/data/file.csv", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Length"] == str(stored["ContentLength"])
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.content == content
+
+    # decompressed for other clients, and sent whole even when ranges are requested
+    for range_header in ["", "bytes=0-9", "bytes=0-9,20-29"]:
+        response = client.get(
+            "/v1/files/data/file.csv", headers={"Accept-Encoding": "identity", "Range": range_header}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Accept-Ranges"] == "none"
+        assert response.headers["Content-Type"].startswith("text/csv")
+        assert response.headers["Content-Length"] == str(len(content))
+        # a different representation than the stored bytes, so only weakly the same as S3's ETag
+        assert response.headers["ETag"] == f"W/{stored['ETag']}"
+        assert response.content == content
+
+    for metadata_cache in (None, ObjectMetadataCache()):
+        client.app.state.metadata_cache = metadata_cache
+        for _ in range(2):
+            response = client.head("/v1/files/data/file.csv", headers={"Accept-Encoding": "identity"})
+            assert "Content-Encoding" not in response.headers
+            assert response.headers["Content-Length"] == str(len(content))
+            assert response.headers["ETag"] == f"W/{stored['ETag']}"
+            response = client.head("/v1/files/data/file.csv", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["Content-Length"] == str(stored["ContentLength"])
+            assert response.headers["ETag"] == stored["ETag"]
+
+    # either ETag revalidates the decoded file
+    for etag in (stored["ETag"], f"W/{stored['ETag']}"):
+        response = client.get(
+            "/v1/files/data/file.csv", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # listings report the stored size
+    response = client.get("/v1/files", params={"directory": "data"})
+    assert response.json()["files"][0] == {
+        "file_path": "data/file.csv",
+        "last_modified": response.json()["files"][0]["last_modified"],
+        "size_bytes": stored["ContentLength"],
+    }
+
+    response = client.get("/v1/files/data", params={"archive": "zip"})
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
+        assert zip_file.read("file.csv") == content
+
+
+def test_responses_are_compressed(client: TestClient):
+    for i in range(50):
+        client.put(f"/v1/files/dir/file{i}.txt", files={"file_content": ("f.txt", TEST_FILE_CONTENT, "text/plain")})
+    response = client.get("/v1/files?page_size=50", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["files"]) == 50
+
+    client.put("/v1/files/big.txt", files={"file_content": ("big.txt", TEST_FILE_CONTENT * 200, "text/plain")})
+    response = client.get("/v1/files/big.txt", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == TEST_FILE_CONTENT * 200
+    # the compressed download's weak ETag still revalidates the file
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+    response = client.get("/v1/files/big.txt", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
 def test_list_files_with_pagination(client: TestClient):
     # Upload files
     for i in range(15):
@@ -55,6 +201,107 @@ def test_list_files_with_pagination(client: TestClient):
     assert "next_page_token" in data
 
 
+def test_page_through_a_directory_with_page_tokens(client: TestClient):
+    file_paths = [f"dir/file{i:02}.txt" for i in range(25)]
+    for file_path in file_paths + ["elsewhere.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    listed_file_paths = []
+    page_tokens = []
+    response = client.get("/v1/files", params={"directory": "dir/", "page_size": 10})
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        listed_file_paths.extend(file["file_path"] for file in data["files"])
+        if not data["next_page_token"]:
+            break
+        page_tokens.append(data["next_page_token"])
+        response = client.get("/v1/files", params={"page_token": data["next_page_token"]})
+
+    assert listed_file_paths == file_paths
+    assert len(page_tokens) == 2
+    # the same page always gets the same token, so page URLs can be cached and shared
+    response = client.get("/v1/files", params={"page_token": page_tokens[0]})
+    assert response.json()["next_page_token"] == page_tokens[1]
+
+    # tokens work on every instance of the API, not just the one that issued them
+    with TestClient(create_app(Settings(s3_bucket_name=TEST_BUCKET_NAME))) as other_client:
+        response = other_client.get("/v1/files", params={"page_token": page_tokens[0]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next_page_token"] == page_tokens[1]
+
+
+def test_list_all_files_and_count_them(client: TestClient):
+    file_paths = ["dir/a.txt", "dir/nested/b.txt", "dir/other/c.txt", "directory.txt"]
+    for file_path in file_paths:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.get("/v1/files", params={"mode": "full"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [file["file_path"] for file in response.json()["files"]] == file_paths
+    assert response.json()["next_page_token"] is None
+
+    response = client.get("/v1/files", params={"mode": "count", "directory": "dir/"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["files"] == []
+    assert (data["file_count"], data["total_size_bytes"]) == (3, 3 * len(TEST_FILE_CONTENT))
+
+
+def test_list_directory_with_delimiter(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/nested/b.txt", "dir/nested/deeper/c.txt", "dir/other/d.txt", "e.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.get("/v1/files", params={"directory": "dir/", "delimiter": "/"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [file["file_path"] for file in data["files"]] == ["dir/a.txt"]
+    assert data["directories"] == ["dir/nested/", "dir/other/"]
+
+    response = client.get("/v1/files", params={"directory": "dir/"})
+    assert response.json()["directories"] == []
+
+    # a page that ends with a subdirectory resumes after every file in it
+    for i in range(10):
+        client.put(
+            f"/v1/files/dir/sub{i}/file.txt",
+            files={"file_content": ("file.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+    response = client.get("/v1/files", params={"directory": "dir/", "delimiter": "/", "page_size": 10})
+    data = response.json()
+    assert data["directories"][-1] == "dir/sub6/"
+    response = client.get("/v1/files", params={"page_token": data["next_page_token"]})
+    data = response.json()
+    assert data["files"] == []
+    assert data["directories"] == ["dir/sub7/", "dir/sub8/", "dir/sub9/"]
+    assert data["next_page_token"] is None
+
+
+def test_stream_files_as_ndjson(client: TestClient):
+    file_paths = [f"export/file{i:02}.txt" for i in range(15)]
+    for file_path in file_paths + ["elsewhere.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.get("/v1/files", params={"directory": "export/", "stream": "ndjson"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    files = [json.loads(line) for line in response.text.splitlines()]
+    assert [file["file_path"] for file in files] == file_paths
+    assert files[0]["size_bytes"] == len(TEST_FILE_CONTENT)
+
+
 def test_get_file_metadata(client: TestClient):
     # Upload a file
     client.put(
@@ -82,6 +329,189 @@ def test_get_file(client: TestClient):
     assert response.content == TEST_FILE_CONTENT
 
 
+def test_get_file_headers(client: TestClient):
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}")
+    assert response.headers["Content-Length"] == str(len(TEST_FILE_CONTENT))
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert "Transfer-Encoding" not in response.headers
+
+
+def test_get_file_single_byte_range(client: TestClient):
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[0:5]
+    assert response.headers["Content-Range"] == f"bytes 0-4/{len(TEST_FILE_CONTENT)}"
+    assert response.headers["Content-Length"] == "5"
+
+    # suffix ranges select the last N bytes
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=-6"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[-6:]
+
+
+def test_get_file_multiple_byte_ranges(client: TestClient):
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4, 7-"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.headers["Content-Type"].startswith("multipart/byteranges; boundary=")
+    assert response.headers["Content-Length"] == str(len(response.content))
+
+    boundary = response.headers["Content-Type"].split("boundary=")[1]
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[1].endswith(b"\r\n\r\n" + TEST_FILE_CONTENT[0:5] + b"\r\n")
+    assert b"Content-Range: bytes 0-4/13" in parts[1]
+    assert parts[2].endswith(b"\r\n\r\n" + TEST_FILE_CONTENT[7:] + b"\r\n")
+    assert b"Content-Range: bytes 7-12/13" in parts[2]
+    assert parts[3] == b"--\r\n"
+
+
+def test_get_directory_as_archive(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/nested/b.txt", "directory.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, file_path.encode(), TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.get("/v1/files/dir", params={"archive": "zip"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/zip"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="dir.zip"'
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
+        assert {name: zip_file.read(name) for name in zip_file.namelist()} == {
+            "a.txt": b"dir/a.txt",
+            "nested/b.txt": b"dir/nested/b.txt",
+        }
+
+    response = client.get("/v1/files/dir/", params={"archive": "tar"})
+    assert response.status_code == status.HTTP_200_OK
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as tar_file:
+        assert tar_file.getnames() == ["a.txt", "nested/b.txt"]
+
+
+def test_get_directory_as_archive_skips_folder_markers_and_unsafe_paths(client: TestClient):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/", "dir/sub/", "dir/a.txt", "dir/sub/b.txt", "dir/../escaped.txt", "dir//c.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"" if object_key.endswith("/") else b"x")
+
+    response = client.get("/v1/files/dir", params={"archive": "zip"})
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
+        assert zip_file.namelist() == ["c.txt", "a.txt", "sub/b.txt"]
+
+    response = client.get("/v1/files/dir", params={"archive": "tar"})
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as tar_file:
+        assert tar_file.getnames() == ["c.txt", "a.txt", "sub/b.txt"]
+        assert all(member.isfile() for member in tar_file.getmembers())
+
+
+def test_get_file_conditional_requests(client: TestClient):
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    for method in (client.get, client.head):
+        # the client's cached copy is still fresh
+        for headers in ({"If-None-Match": etag}, {"If-Modified-Since": last_modified}):
+            response = method(f"/v1/files/{TEST_FILE_PATH}", headers=headers)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert response.headers["ETag"] == etag
+            assert response.content == b""
+
+        # the client's cached copy is stale
+        response = method(f"/v1/files/{TEST_FILE_PATH}", headers={"If-None-Match": '"stale-etag"'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] == etag
+
+    # the file changed since the client cached it
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, b"updated content", TEST_FILE_CONTENT_TYPE)},
+    )
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b"updated content"
+
+
+def test_get_file_conditional_requests_with_metadata_cache(client: TestClient):
+    client.app.state.metadata_cache = ObjectMetadataCache()
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    client.get(f"/v1/files/{TEST_FILE_PATH}")
+
+    # legal HTTP dates that parse without a time zone, both answered from the cached metadata
+    for if_modified_since in ("Sun Nov  6 08:49:37 2094", "Sun, 06 Nov 2094 08:49:37 -0000"):
+        for method in (client.get, client.head):
+            response = method(f"/v1/files/{TEST_FILE_PATH}", headers={"If-Modified-Since": if_modified_since})
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_get_file_and_metadata_make_a_single_s3_call(client: TestClient):
+    client.app.state.metadata_cache = ObjectMetadataCache()
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    # record the name of every S3 API operation the app makes
+    s3_operations = []
+    s3_client = client.app.state.s3_clients.get_client()
+    s3_client.meta.events.register("before-call.s3", lambda model, **_: s3_operations.append(model.name))
+
+    client.get(f"/v1/files/{TEST_FILE_PATH}")
+    assert s3_operations == ["GetObject"]
+
+    # the GET cached the file's metadata, so the HEAD is answered without calling S3
+    s3_operations.clear()
+    client.head(f"/v1/files/{TEST_FILE_PATH}")
+    assert not s3_operations
+
+    client.app.state.metadata_cache.clear()
+    client.head(f"/v1/files/{TEST_FILE_PATH}")
+    assert s3_operations == ["HeadObject"]
+
+
+def test_get_cache_stats(client: TestClient):
+    client.app.state.metadata_cache = ObjectMetadataCache()
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    client.head(f"/v1/files/{TEST_FILE_PATH}")
+    client.head(f"/v1/files/{TEST_FILE_PATH}")
+
+    response = client.get("/v1/cache-stats")
+    assert response.status_code == status.HTTP_200_OK
+    # the upload's existence check and the first HEAD miss, the second HEAD hits
+    assert response.json()["metadata_cache"] == {
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+        "invalidations": 0,
+        "entries": 1,
+    }
+    # the content cache is opt-in
+    assert response.json()["content_cache"] is None
+
+
 def test_delete_file(client: TestClient):
     # Upload a file
     client.put(
@@ -98,6 +528,222 @@ def test_delete_file(client: TestClient):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+def test_bulk_delete_files(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/b.txt", "dir/nested/c.txt", "other.txt", "directory.txt", "dir2/d.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.post("/v1/files/bulk-delete", json={"file_paths": ["dir/a.txt", "other.txt"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"deleted_count": 2, "errors": []}
+    assert client.head("/v1/files/other.txt").status_code == status.HTTP_404_NOT_FOUND
+
+    # "dir" is the directory, so files that merely share its prefix are kept
+    response = client.post("/v1/files/bulk-delete", json={"directory": "dir"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"deleted_count": 2, "errors": []}
+    assert [file["file_path"] for file in client.get("/v1/files").json()["files"]] == ["dir2/d.txt", "directory.txt"]
+
+
+def test_delete_directory_recursively(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/nested/b.txt", "directory.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.delete("/v1/files/dir", params={"recursive": True})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.headers["Location"] == f"/v1/jobs/{response.json()['job_id']}"
+
+    for _ in range(100):
+        job = client.get(response.headers["Location"]).json()
+        if job["finished_at"]:
+            break
+        time.sleep(0.05)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"deleted_count": 2, "error_count": 0}
+
+    remaining_files = [file["file_path"] for file in client.get("/v1/files").json()["files"]]
+    assert remaining_files == ["directory.txt"]
+
+
+def test_copy_and_move_file(client: TestClient):
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.post("/v1/files/copy", json={"source_path": TEST_FILE_PATH, "destination_path": "copy.txt"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["destination_path"] == "copy.txt"
+    assert client.get("/v1/files/copy.txt").content == TEST_FILE_CONTENT
+
+    response = client.post("/v1/files/move", json={"source_path": "copy.txt", "destination_path": "moved.txt"})
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get("/v1/files/copy.txt").status_code == status.HTTP_404_NOT_FOUND
+    response = client.get("/v1/files/moved.txt")
+    assert response.content == TEST_FILE_CONTENT
+    assert response.headers["Content-Type"].startswith(TEST_FILE_CONTENT_TYPE)
+
+
+def test_move_directory_recursively(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/nested/b.txt", "directory.txt"]:
+        client.put(
+            f"/v1/files/{file_path}",
+            files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+
+    response = client.post(
+        "/v1/files/move", json={"source_path": "dir", "destination_path": "moved", "recursive": True}
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["kind"] == "move-directory"
+
+    for _ in range(100):
+        job = client.get(response.headers["Location"]).json()
+        if job["finished_at"]:
+            break
+        time.sleep(0.05)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"copied_count": 2, "error_count": 0}
+
+    remaining_files = sorted(file["file_path"] for file in client.get("/v1/files").json()["files"])
+    assert remaining_files == ["directory.txt", "moved/a.txt", "moved/nested/b.txt"]
+
+
+def test_presigned_upload_and_download(client: TestClient):
+    response = client.post(
+        "/v1/presigned-urls/upload", json={"file_path": TEST_FILE_PATH, "content_type": TEST_FILE_CONTENT_TYPE}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    presigned_upload = response.json()
+    assert presigned_upload["method"] == "PUT"
+    assert presigned_upload["headers"] == {"Content-Type": TEST_FILE_CONTENT_TYPE}
+    response = requests.put(
+        presigned_upload["url"], data=TEST_FILE_CONTENT, headers=presigned_upload["headers"], timeout=5
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.post("/v1/presigned-urls/download", json={"file_path": TEST_FILE_PATH})
+    assert response.status_code == status.HTTP_200_OK
+    assert requests.get(response.json()["url"], timeout=5).content == TEST_FILE_CONTENT
+
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", params={"redirect": True}, follow_redirects=False)
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert requests.get(response.headers["Location"], timeout=5).content == TEST_FILE_CONTENT
+
+
+def test_presigned_multipart_upload(client: TestClient):
+    content = b"a" * 5 * 1024**2 + b"b" * 1024
+    response = client.post("/v1/multipart-uploads", json={"file_path": "large.bin", "size_bytes": len(content)})
+    assert response.status_code == status.HTTP_201_CREATED
+    upload = response.json()
+    assert len(upload["parts"]) == 1
+
+    parts = []
+    for part in upload["parts"]:
+        start = (part["part_number"] - 1) * upload["part_size_bytes"]
+        part_content = content[slice(start, start + upload["part_size_bytes"])]
+        etag = requests.put(part["url"], data=part_content, timeout=5).headers["ETag"]
+        parts.append({"part_number": part["part_number"], "etag": etag})
+
+    response = client.post(
+        f"/v1/multipart-uploads/{upload['upload_id']}/complete", json={"file_path": "large.bin", "parts": parts}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get("/v1/files/large.bin").content == content
+
+
+def test_search_files(client: TestClient):
+    client.app.state.metadata_index = ObjectMetadataIndex()
+    for file_path, content, content_type in [
+        ("data/small.csv", b"a,b", "text/csv"),
+        ("data/large.csv", b"a,b\n1,2\n3,4", "text/csv"),
+        ("data/image.png", b"png", "image/png"),
+        ("notes.txt", b"some notes", "text/plain"),
+    ]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, content, content_type)})
+    client.delete("/v1/files/notes.txt")
+
+    response = client.get(
+        "/v1/search/files",
+        params={"content_type": "text/csv", "sort_by": "size_bytes", "order": "desc", "page_size": 1},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [(file["file_path"], file["content_type"]) for file in data["files"]] == [("data/large.csv", "text/csv")]
+
+    response = client.get(
+        "/v1/search/files",
+        params={
+            "content_type": "text/csv",
+            "sort_by": "size_bytes",
+            "order": "desc",
+            "page_token": data["next_page_token"],
+        },
+    )
+    data = response.json()
+    assert [file["file_path"] for file in data["files"]] == ["data/small.csv"]
+    assert data["next_page_token"] is None
+
+    response = client.get("/v1/search/files", params={"directory": "data/", "path_contains": "image"})
+    assert [file["file_path"] for file in response.json()["files"]] == ["data/image.png"]
+
+
+def test_get_directory_stats(client: TestClient):
+    client.app.state.metadata_index = ObjectMetadataIndex()
+    for file_path, content in [("data/a.csv", b"a,b\n"), ("data/raw/b.csv", b"a,b\n1,2\n"), ("notes.txt", b"notes")]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, content, "text/plain")})
+    client.delete("/v1/files/notes.txt")
+
+    response = client.get("/v1/directory-stats", params={"directory": "data"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["directory"], data["file_count"], data["total_size_bytes"]) == ("data/", 2, 12)
+    assert data["first_modified"] <= data["last_modified"]
+
+    response = client.get("/v1/directory-stats")
+    assert (response.json()["directory"], response.json()["file_count"]) == ("", 2)
+
+    response = client.get("/v1/directory-stats", params={"directory": "missing/"})
+    assert (response.json()["file_count"], response.json()["last_modified"]) == (0, None)
+
+
+def test_reindex_files(client: TestClient):
+    client.app.state.metadata_index = ObjectMetadataIndex()
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="uploaded-elsewhere.txt", Body=b"content")
+
+    response = client.post("/v1/search/reindex")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    for _ in range(100):
+        job = client.get(response.headers["Location"]).json()
+        if job["finished_at"]:
+            break
+        time.sleep(0.05)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"indexed_count": 1, "removed_count": 0}
+
+    response = client.get("/v1/search/files")
+    assert [file["file_path"] for file in response.json()["files"]] == ["uploaded-elsewhere.txt"]
+
+
+# pylint: disable=unused-argument
+def test_metadata_index_is_crawled_on_startup(mocked_aws: None):
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="existing.txt", Body=b"content")
+    app = create_app(Settings(s3_bucket_name=TEST_BUCKET_NAME, metadata_index_enabled=True))
+
+    with TestClient(app) as client:
+        for _ in range(100):
+            files = client.get("/v1/search/files").json()["files"]
+            if files:
+                break
+            time.sleep(0.05)
+    assert [file["file_path"] for file in files] == ["existing.txt"]
+
+
 def test_generate_text(client: TestClient):
     """Test generating text using POST method."""
     response = client.post(
@@ -0,0 +1,18 @@
+import pytest
+from pydantic import ValidationError
+
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
+
+def test_content_cache_requires_metadata_cache():
+    with pytest.raises(ValidationError, match="content_cache_enabled requires metadata_cache_enabled"):
+        Settings(s3_bucket_name=TEST_BUCKET_NAME, content_cache_enabled=True)
+
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, content_cache_enabled=True, metadata_cache_enabled=True)
+    assert settings.content_cache_enabled
+
+
+def test_metadata_index_requires_background_jobs():
+    with pytest.raises(ValidationError, match="metadata_index_enabled requires background_jobs_enabled"):
+        Settings(s3_bucket_name=TEST_BUCKET_NAME, metadata_index_enabled=True, background_jobs_enabled=False)
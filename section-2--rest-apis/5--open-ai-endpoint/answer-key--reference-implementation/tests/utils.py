@@ -1,9 +1,21 @@
+import base64
+import hashlib
+import hmac
+
 import boto3
 
+from files_api.page_tokens import SIGNATURE_BYTES
+from files_api.s3.delete_objects import delete_s3_objects_by_prefix
+
 
 def delete_s3_bucket(bucket_name: str) -> None:
     """Delete an S3 bucket and all objects inside."""
-    s3_client = boto3.resource("s3")
-    bucket = s3_client.Bucket(bucket_name)
-    bucket.objects.all().delete()
-    bucket.delete()
+    s3_client = boto3.client("s3")
+    delete_s3_objects_by_prefix(bucket_name, prefix="", s3_client=s3_client)
+    s3_client.delete_bucket(Bucket=bucket_name)
+
+
+def sign_page_token_payload(payload: bytes, key: bytes) -> str:
+    """Build a page token around any payload, signed the same way as `files_api.page_tokens` signs them."""
+    signature = hmac.new(key, payload, hashlib.sha256).digest()[slice(0, SIGNATURE_BYTES)]
+    return ".".join(base64.urlsafe_b64encode(data).rstrip(b"=").decode() for data in (payload, signature))